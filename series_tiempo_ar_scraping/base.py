@@ -1,25 +1,63 @@
+import gc
+import hashlib
+import json
 import logging
+import multiprocessing
 import os
+import sys
+import threading
 import traceback
+import uuid
 import yaml
+from collections import Counter, OrderedDict
 import smtplib
 import arrow
 from email.mime.application import MIMEApplication
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.utils import formatdate
+from concurrent.futures import ProcessPoolExecutor
 
 import pandas as pd
-from xlseries import XlSeries
 
 import pydatajson.readers as readers
 import pydatajson.writers as writers
 
 from series_tiempo_ar import TimeSeriesDataJson
-from series_tiempo_ar.validations import validate_distribution
 from series_tiempo_ar.readers.readers import get_ts_distributions_by_method
 
 from series_tiempo_ar_scraping import download
+from series_tiempo_ar_scraping.cache import (
+    ParsedSheetCache,
+    DEFAULT_PARSED_SHEETS_CACHE_MB,
+)
+from series_tiempo_ar_scraping.columnar import (
+    get_columnar_path,
+    normalize_columnar_formats,
+    write_columnar_distribution,
+)
+from series_tiempo_ar_scraping.csv_writer import write_distribution_csv
+from series_tiempo_ar_scraping.memory import (
+    get_peak_rss,
+    get_rss,
+    reset_peak_rss,
+)
+from series_tiempo_ar_scraping.plans import get_scraping_plan
+from series_tiempo_ar_scraping.store import SourceStore, get_source_file_name
+from series_tiempo_ar_scraping.utils import (
+    UNCHANGED,
+    WRITTEN,
+    render_if_changed,
+    write_atomically,
+    xlsx_files_are_equal,
+)
+from series_tiempo_ar_scraping.validations import DistributionValidator
+from series_tiempo_ar_scraping.workbooks import WorkbookCache, MEGABYTE
+from series_tiempo_ar_scraping.writer_pool import (
+    DEFAULT_WRITER_QUEUE_SIZE,
+    DEFAULT_WRITER_THREADS,
+    WriterPool,
+)
 from series_tiempo_ar_scraping.processors import (
     DirectDownloadProcessor,
     TXTProcessor,
@@ -33,6 +71,8 @@ CONFIG_DIR = os.path.join(ROOT_DIR, "config")
 OUTPUT_DIR = os.path.join(ROOT_DIR, "data", "output")
 CATALOGS_DIR = os.path.join(DATOS_DIR, "output", "catalog")
 CATALOGS_DIR_INPUT = os.path.join(DATOS_DIR, "input", "catalog")
+STORE_DIR_INPUT = os.path.join(DATOS_DIR, "input", "store")
+PARSED_SHEETS_DIR_INPUT = os.path.join(DATOS_DIR, "input", "cache", "sheets")
 CONFIG_DOWNLOAD_PATH = os.path.join(CONFIG_DIR, "config_downloads.yaml")
 CONFIG_EMAIL_PATH = os.path.join(CONFIG_DIR, "config_email.yaml")
 REPORTES_DIR = os.path.join(DATOS_DIR, "reports")
@@ -40,6 +80,28 @@ SCHEMAS_DIR = os.path.join(CONFIG_DIR, "schemas")
 
 SEPARATOR_WIDTH = 60
 
+# se incrementa cuando un cambio en el scraping invalida las huellas de las
+# distribuciones generadas en corridas anteriores
+FINGERPRINT_VERSION = 1
+
+# parámetros de config_general.yaml que determinan los archivos de salida de
+# las distribuciones, y forman parte de sus huellas
+OUTPUT_CONFIG_KEYS = [
+    'csv_float_format',
+    'csv_compression',
+    'distribution_formats',
+]
+
+FINGERPRINTS_FILE_NAME = 'fingerprints.json'
+TIME_COMPOSED_FILE_NAME = 'time_composed.json'
+
+# parámetros de config_downloads.yaml que configuran la etapa de descargas y
+# no se pasan a download.download_to_file()
+DOWNLOAD_STAGE_PARAMS = (
+    'workers', 'max_per_host', 'pool_connections', 'pool_maxsize',
+    'max_host_failures',
+)
+
 EXTRACTION_MAIL_CONFIG = {
     "attachments": {
         "errors_report": "reporte-catalogo-errores.xlsx",
@@ -60,6 +122,28 @@ GROUP_CONFIGS = {
 }
 
 
+def get_parsed_sheet_cache(config=None):
+    """Devuelve el caché de distribuciones scrapeadas, con el tamaño máximo
+    configurado en 'parsed_sheets_cache_mb' de config_general.yaml."""
+    cache_mb = (config or {}).get(
+        'parsed_sheets_cache_mb', DEFAULT_PARSED_SHEETS_CACHE_MB)
+
+    return ParsedSheetCache(
+        os.path.join(ROOT_DIR, PARSED_SHEETS_DIR_INPUT),
+        max_size=int(cache_mb * MEGABYTE) if cache_mb else None,
+    )
+
+
+def get_memory_config(config=None):
+    """Devuelve si se procesa en modo de memoria acotada ('bounded_memory'
+    en config_general.yaml) y el máximo de memoria residente por proceso
+    ('max_rss_mb'), en bytes. Configurar el máximo activa el modo."""
+    max_rss_mb = (config or {}).get('max_rss_mb')
+    max_rss = int(max_rss_mb * MEGABYTE) if max_rss_mb else None
+
+    return bool((config or {}).get('bounded_memory') or max_rss), max_rss
+
+
 class ETLObject:
 
     def __init__(self, identifier, parent, context):
@@ -82,8 +166,7 @@ class ETLObject:
         pass
 
     def ensure_dir_exists(self, directory):
-        if not os.path.exists(directory):
-            os.makedirs(directory)
+        os.makedirs(directory, exist_ok=True)
 
     def print_log_separator(self, l, message):
         l.info("=" * SEPARATOR_WIDTH)
@@ -97,10 +180,15 @@ class ETLObject:
 
 class Distribution(ETLObject):
 
+    # la escritura de sus archivos sigue en segundo plano (ver
+    # Catalog.submit_write())
+    write_pending = False
+
     def __init__(self, identifier, parent, context, **kwargs):
         self.config = kwargs.get('config')
         super().__init__(identifier, parent, context)
         self.processor = None
+        self.fingerprint = None
 
         self.report = {
             'dataset_identifier': self.parent.identifier,
@@ -111,6 +199,10 @@ class Distribution(ETLObject):
             'distribution_source': None,
             'distribution_sheet': None,
             'time_index_coord': None,
+            'source_host_status': None,
+            'distribution_validation': None,
+            'distribution_peak_memory_mb': None,
+            'distribution_output': None,
         }
 
         self.processor = self.init_processor()
@@ -126,7 +218,8 @@ class Distribution(ETLObject):
         if self.metadata.get('downloadURL'):
             processor = DirectDownloadProcessor(
                 distribution_metadata=self.metadata,
-                catalog_metadata=self.parent.parent.metadata
+                catalog_metadata=self.parent.parent.metadata,
+                catalog_context=self.parent.parent.context,
             )
 
         if not self.metadata.get("downloadURL"):
@@ -137,6 +230,7 @@ class Distribution(ETLObject):
                 processor = TXTProcessor(
                     distribution_metadata=self.metadata,
                     catalog_metadata=self.parent.parent.metadata,
+                    catalog_context=self.parent.parent.context,
                 )
 
         if not self.metadata.get("downloadURL"):
@@ -156,13 +250,28 @@ class Distribution(ETLObject):
         return os.path.exists(self.context['distribution_output_path'])
 
     def process(self):
+        self.run()
+        self.post_process()
+
+    def run(self):
+        """Genera la distribución, sin registrar su resultado en el catálogo
+        (ver post_process())."""
         self.pre_process()
+        reset_peak_rss()
 
         if self.processor:
 
             if not self.csv_exists() or self.context['replace']:
                 try:
-                    if isinstance(self.processor, SpreadsheetProcessor):
+                    self.parent.parent.wait_for_source(
+                        self.metadata.get('scrapingFileURL'))
+                    self.fingerprint = self.get_fingerprint()
+                    unchanged = self.is_unchanged()
+
+                    if unchanged:
+                        self.report['distribution_note'] = 'Unchanged'
+
+                    elif isinstance(self.processor, SpreadsheetProcessor):
                         diccionario = self.processor.run()
                         self._df = diccionario["df"]
                         table_end = diccionario["table_end"]
@@ -190,45 +299,172 @@ class Distribution(ETLObject):
                         if self.csv_exists() and self.context['replace']:
                             self.report['distribution_note'] = 'Replaced'
 
-                    self.write_distribution_dataframe()
-                    self.context['metadata'].get_distribution(self.identifier)[
-                        'downloadURL'] = self._get_new_downloadURL()
-
+                    if not unchanged:
+                        self.parent.parent.submit_write(self)
+                    else:
+                        self.report['distribution_output'] = UNCHANGED
+                        self.set_downloadURLs()
 
                 except Exception as e:
-                    self.report['distribution_status'] = 'ERROR'
-                    self.report['distribution_note'] = repr(e)
-                    self.report['distribution_traceback'] = traceback.format_exc()
-                    self.report['distribution_source'] = self.metadata.get('scrapingFileURL')
-                    self.report['distribution_sheet'] = self.metadata.get('scrapingFileSheet')
-                    for field in self.metadata["field"]:
-                        if field["title"] == "indice_tiempo":
-                            self.report['time_index_coord'] = field['scrapingIdentifierCell']
-                            break
+                    self.set_error(e)
 
+        if self.processor:
+            self.processor.release()
+        self.parent.parent.release_source(self.metadata.get('scrapingFileURL'))
+        self.report['distribution_peak_memory_mb'] = round(
+            get_peak_rss() / MEGABYTE, 1)
+
+    def report_output(self, file_path=None):
+        """Registra en el catálogo si se escribió el CSV de la distribución o
+        si quedó intacto porque no cambió."""
+        if self.report.get('distribution_output'):
+            self.context.setdefault('catalog_outputs_reports', []).append({
+                'file_path':
+                    file_path or self.context['distribution_output_path'],
+                'output_status': self.report['distribution_output'],
+            })
+
+    def finish_write(self, future, file_path):
+        """Registra el resultado de una escritura hecha en segundo plano (ver
+        Catalog.finish_writes()). Si falló, la distribución queda con
+        error."""
+        self.write_pending = False
+        try:
+            self.report['distribution_output'] = future.result()
+        except Exception as e:
+            self.set_error(e)
+            self.context.get('fingerprints', {}).pop(self.identifier, None)
+            self.log_status()
+            return
 
+        self.set_downloadURLs(file_path)
+        self.report_output(file_path)
+        self.log_status()
+
+    def release_memory(self):
+        """Libera el DataFrame de la distribución, una vez escrito."""
+        self._df = None
+
+    def set_error(self, exception):
+        self.report['distribution_status'] = 'ERROR'
+        self.report['distribution_note'] = repr(exception)
+        self.report['distribution_traceback'] = traceback.format_exc()
+        self.report['distribution_source'] = self.metadata.get('scrapingFileURL')
+        self.report['distribution_sheet'] = self.metadata.get('scrapingFileSheet')
+        for field in self.metadata["field"]:
+            if field["title"] == "indice_tiempo":
+                self.report['time_index_coord'] = field['scrapingIdentifierCell']
+                break
+
+    def get_result(self):
+        """Devuelve el resultado de run(), para procesar la distribución en
+        otro proceso (ver Catalog.process_in_parallel()).
 
+        Returns:
+            dict: Reporte, huella, 'downloadURL' y 'additionalDownloadURLs'
+                de la distribución, y los
+                índices de tiempo compuestos detectados en el proceso (ver
+                SpreadsheetProcessor.scrape_dataframe()).
+        """
+        return {
+            'report': self.report,
+            'fingerprint': self.fingerprint,
+            'downloadURL': self.metadata.get('downloadURL'),
+            'additionalDownloadURLs': self.metadata.get(
+                'additionalDownloadURLs'),
+            'time_composed': self.context.get('time_composed', {}),
+        }
 
+    def set_result(self, result):
+        """Incorpora el resultado de run() obtenido en otro proceso.
 
+        Args:
+            result (dict): Resultado devuelto por get_result().
+        """
+        self.report = result['report']
+        self.fingerprint = result['fingerprint']
+        self.context.setdefault('time_composed', {}).update(
+            result.get('time_composed', {}))
+        if result['downloadURL'] is not None:
+            self.context['metadata'].get_distribution(self.identifier)[
+                'downloadURL'] = result['downloadURL']
+        if result.get('additionalDownloadURLs'):
+            self.context['metadata'].get_distribution(self.identifier)[
+                'additionalDownloadURLs'] = result['additionalDownloadURLs']
 
+    def pre_process(self):
+        self.init_context_paths()
+        self.source_url = self.get_source_url()
 
-        self.post_process()
+    def get_source_url(self):
+        return (self.metadata.get('downloadURL') or
+                self.metadata.get('scrapingFileURL'))
 
+    def get_fingerprint(self):
+        """Calcula una huella de las entradas de la distribución: el hash del
+        archivo fuente, los metadatos de scraping (hoja, celdas y fields) y
+        la configuración de los archivos de salida (ver
+        get_output_config()).
 
-    def pre_process(self):
-        self.init_context_paths()
+        Returns:
+            str: Hash SHA-256 de las entradas, o None si la distribución no se
+                genera a partir de un archivo fuente descargado.
+        """
+        source_hash = self.parent.parent.get_source_hash(
+            self.metadata.get('scrapingFileURL'))
+        if not source_hash:
+            return None
+
+        scraping_metadata = {
+            key: value for key, value in self.metadata.items()
+            if key.startswith('scraping') or key == 'field'
+        }
+        content = json.dumps(
+            {
+                'version': FINGERPRINT_VERSION,
+                'source': source_hash,
+                'metadata': scraping_metadata,
+                'output': self.get_output_config(),
+            },
+            sort_keys=True,
+            default=str,
+        )
 
-    def _get_new_downloadURL(self):
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    def get_output_config(self):
+        """Devuelve la configuración de config_general.yaml que determina los
+        archivos de salida de la distribución: si cambia, la distribución se
+        vuelve a escribir."""
+        config = self.config or {}
+
+        return {key: config.get(key) for key in OUTPUT_CONFIG_KEYS}
+
+    def is_unchanged(self):
+        """Indica si las entradas de la distribución no cambiaron desde la
+        última corrida exitosa y su CSV sigue existiendo."""
+        return bool(
+            not self.context.get('full_rebuild') and
+            self.fingerprint and
+            self.csv_exists() and
+            self.context.get('fingerprints', {}).get(
+                self.identifier) == self.fingerprint
+        )
+
+    def _get_new_downloadURL(self, file_path=None):
         """
-        Devuelve una url de descarga para la distribución.
+        Devuelve una url de descarga para la distribución, o para otro de sus
+        archivos de salida si se indica file_path (ver
+        set_additional_downloadURLs()).
 
         Returns:
             String. En caso de que la verificación sea True, reemplaza el ROOT_DIR por el contenido que haya
                     en el host dentro de la configuración, y el resto del path se mantiene.
                     Si es False, devuelve un string vacío.
         """
-        if OUTPUT_DIR in self.context['distribution_output_path']:
-            downloadURL = self.context['distribution_output_path'].replace(
+        file_path = file_path or self.context['distribution_output_path']
+        if OUTPUT_DIR in file_path:
+            downloadURL = file_path.replace(
                 OUTPUT_DIR, self.config['host']
             )
         else:
@@ -249,48 +485,148 @@ class Distribution(ETLObject):
         )
 
     def validate(self):
+        """Valida el DataFrame de la distribución en una única pasada (ver
+        validations.DistributionValidator) y guarda el resultado en el
+        reporte.
+
+        Raises:
+            TimeSeriesError: Primer error encontrado, si la distribución es
+                inválida.
+        """
         logging.debug('Valida la distribución')
 
-        try:
-            validate_distribution(
-                df=self._df,
-                catalog=self.parent.parent.metadata,
-                _dataset_meta=self.parent.metadata,
-                distrib_meta=self.metadata,
-            )
-            logging.debug(f'Distribución {self.identifier} válida')
-        except Exception as ex:
+        validator = self.context.get('validator')
+        if validator is None:
+            validator = DistributionValidator(self.parent.parent.metadata)
+            self.context['validator'] = validator
+
+        result, errors = validator.validate(self._df, self.metadata)
+        self.report['distribution_validation'] = result
+
+        if errors:
             logging.debug(f'Distribución {self.identifier} inválida')
-            raise
+            raise errors[0]
 
-    def write_distribution_dataframe(self):
+        logging.debug(f'Distribución {self.identifier} válida')
+
+    def write_outputs(self, df, file_path):
+        """Escribe el CSV de la distribución y sus archivos en formatos
+        columnares. Puede ejecutarse en segundo plano (ver
+        Catalog.submit_write()), por lo que no usa el DataFrame ni los paths
+        del contexto, que cambian con cada distribución.
+
+        Returns:
+            str: WRITTEN si se escribió el CSV, o UNCHANGED.
+        """
+        status = self.write_distribution_dataframe(df, file_path)
+        self.write_columnar_files(df, file_path)
+
+        return status
+
+    def write_distribution_dataframe(self, df=None, file_path=None):
         logging.debug('Escribe el dataframe de la distribución')
-        self.ensure_dir_exists(
-            os.path.dirname(self.context['distribution_output_path'])
+        df = self._df if df is None else df
+        file_path = file_path or self.context['distribution_output_path']
+        self.ensure_dir_exists(os.path.dirname(file_path))
+
+        config = self.config or {}
+        status = write_distribution_csv(
+            df,
+            file_path,
+            float_format=config.get('csv_float_format'),
+            compressions=config.get('csv_compression') or [],
         )
-        try:
-            self._df.to_csv(
-                self.context['distribution_output_path'],
-                encoding="utf-8",
-                index_label="indice_tiempo"
-            )
+        if status == WRITTEN:
             logging.debug(f'CSV de Distribución {self.identifier} escrito')
-        except Exception as e:
-            logging.info(f'ERROR {repr(e)}')
+        else:
+            logging.debug(f'CSV de Distribución {self.identifier} sin cambios')
 
-    def post_process(self):
+        return status
+
+    def get_columnar_formats(self):
+        """Devuelve los formatos columnares a escribir junto al CSV
+        ('distribution_formats' en config_general.yaml)."""
+        return (self.config or {}).get('distribution_formats') or []
+
+    def write_columnar_files(self, df, file_path):
+        """Escribe la distribución en los formatos columnares configurados,
+        junto a su CSV (file_path), con el índice de tiempo tipado y la
+        frecuencia en la metadata del archivo. Los errores no invalidan la
+        distribución."""
+        metadata = {
+            'distribution_identifier': self.identifier,
+            'frequency': self.get_time_index_frequency(),
+        }
+
+        for file_format in self.get_columnar_formats():
+            try:
+                columnar_path = get_columnar_path(file_path, file_format)
+                write_columnar_distribution(
+                    df, columnar_path, file_format, metadata)
+            except Exception as e:
+                logging.warning(
+                    f'Distribución {self.identifier}: no se pudo escribir '
+                    f'en formato {file_format} ({repr(e)})')
+
+    def get_time_index_frequency(self):
+        for field in self.metadata.get('field', []):
+            if field.get('specialType') == 'time_index':
+                return field.get('specialTypeDetail')
+
+        return None
+
+    def set_downloadURLs(self, file_path=None):
+        """Publica en la metadata de la distribución las URLs de descarga de
+        su CSV (file_path) y de sus archivos en formatos columnares. Se llama
+        una vez que están escritos."""
+        self.context['metadata'].get_distribution(self.identifier)[
+            'downloadURL'] = self._get_new_downloadURL(file_path)
+        self.set_additional_downloadURLs(file_path)
+
+    def set_additional_downloadURLs(self, csv_path=None):
+        """Publica en la metadata de la distribución las URLs de descarga de
+        sus archivos en formatos columnares ('additionalDownloadURLs', por
+        formato), escritos junto a su CSV (csv_path)."""
+        csv_path = csv_path or self.context['distribution_output_path']
+        urls = {}
+        for file_format in self.get_columnar_formats():
+            file_path = get_columnar_path(csv_path, file_format)
+            if os.path.exists(file_path):
+                urls[file_format] = self._get_new_downloadURL(file_path)
+
+        if urls:
+            self.context['metadata'].get_distribution(self.identifier)[
+                'additionalDownloadURLs'] = urls
+
+    def log_status(self):
         if self.report['distribution_status'] == 'ERROR':
             logging.info(f"Distribución {self.identifier}: ERROR {self.report['distribution_note']}")
             logging.debug(self.report['distribution_traceback'])
         elif self.report['distribution_status'] == 'WARNING':
             logging.info(f"Distribución {self.identifier}: WARNING {self.report['distribution_note']}")
         elif self.report['distribution_status'] == 'OK':
-            if self.report['distribution_note'] == 'Replaced':
-                logging.info(f"Distribución {self.identifier}: OK (Replaced)")
+            if self.report['distribution_note'] in ['Replaced', 'Unchanged']:
+                logging.info(f"Distribución {self.identifier}: OK ({self.report['distribution_note']})")
             else:
                 logging.info(f'Distribución {self.identifier}: OK')
+
+    def post_process(self):
+        # si la escritura sigue pendiente, el estado se informa al terminar
+        # (ver finish_write())
+        if not self.write_pending:
+            self.log_status()
+        self.report['source_host_status'] = \
+            self.parent.parent.get_host_status(self.source_url)
+
+        fingerprints = self.context.get('fingerprints', {})
+        if self.report['distribution_status'] != 'OK':
+            fingerprints.pop(self.identifier, None)
+        elif self.fingerprint:
+            fingerprints[self.identifier] = self.fingerprint
         self.context['catalog_distributions_reports'].append(self.report)
+        self.report_output()
         logging.debug(self.report)
+        self.parent.parent.release_memory(self)
         # TODO: unset distribution_output_path in context
         # TODO: unset distribution_output_download_path in context
 
@@ -366,14 +702,18 @@ class Catalog(ETLObject):
         self.url = kwargs.get('url')
         self.extension = kwargs.get('extension')
         self.replace = kwargs.get('replace')
+        self.full_rebuild = kwargs.get('full_rebuild', False)
+        self.distribution_jobs = kwargs.get('distribution_jobs') or 1
         self.config = kwargs.get('config')
+        self.bounded_memory, self.max_rss = get_memory_config(self.config)
         self.distribution_id_filter = kwargs.get('distribution_id_filter')
         self.interactive = kwargs.get('interactive', False)
+        self.write_xlsx = kwargs.get('write_xlsx', False)
         logging.info(f'=== Catálogo: {identifier} ===')
 
         super().__init__(identifier, parent, context)
 
-    def init_metadata(self, write=True):
+    def init_metadata(self):
         logging.info('Descarga y lectura del catálogo')
         self.fetch_metadata_file()
 
@@ -387,20 +727,20 @@ class Catalog(ETLObject):
             'metadata'] = self.filter_metadata()
         self.metadata = self.context['catalog'][self.identifier]['metadata']
 
-        if write:
-            self.write_metadata()
-
     def fetch_metadata_file(self):
 
         if self.extension in ['xlsx', 'json']:
-            config = self.get_catalog_download_config(
+            download_config = self.get_catalog_download_config(
                 self.identifier
-            ).get('catalog')
+            )
+            config = download_config.get('catalog')
 
             self.download_with_config(
                 self.url,
                 self.get_original_metadata_path(),
                 config,
+                session=self.get_download_session(
+                    config, download_config.get('sources')),
             )
         else:
             raise ValueError()
@@ -466,6 +806,8 @@ class Catalog(ETLObject):
         self.context['catalog'][self.identifier]['catalog_time_series_distributions_identifiers'] = \
             self.get_time_series_distributions_identifiers()
         self.context['catalog'][self.identifier]['replace'] = self.replace
+        self.context['catalog'][self.identifier][
+            'full_rebuild'] = self.full_rebuild
         logging.info(f'Datasets: {len(self.get_time_series_distributions_datasets_ids())}')
         logging.info(f"Distribuciones: {len(self.context['catalog'][self.identifier]['catalog_time_series_distributions_identifiers'])}")
         logging.info(f"Fields: {len(self.metadata.get_time_series())}")
@@ -474,6 +816,8 @@ class Catalog(ETLObject):
             'catalog_datasets_reports'] = []
         self.context['catalog'][self.identifier][
             'catalog_distributions_reports'] = []
+        self.context['catalog'][self.identifier][
+            'catalog_outputs_reports'] = []
 
     def get_time_series_distributions_identifiers(self):
         return [
@@ -486,22 +830,46 @@ class Catalog(ETLObject):
             )
         ]
 
-    def write_metadata(self):
-        logging.info('Escribe metadata')
-        self.write_json_metadata()
-        self.write_xlsx_metadata()
-
     def write_json_metadata(self):
         file_path = self.get_json_metadata_path()
 
+        logging.info(f'Escribiendo una nueva versión de {file_path}')
+
         self.ensure_dir_exists(os.path.dirname(file_path))
-        writers.write_json_catalog(self.metadata, file_path)
+        self.report_output(file_path, render_if_changed(
+            file_path,
+            lambda path: writers.write_json_catalog(self.metadata, path),
+        ))
 
     def write_xlsx_metadata(self):
+        """Escribe la metadata del catálogo en Excel, si se pidió para el
+        catálogo ('xlsx' en index.yaml). Se escribe al final, una vez
+        publicados el data.json y los reportes, porque es lenta para
+        catálogos grandes."""
+        if not self.write_xlsx:
+            return
+
         file_path = self.get_xlsx_metadata_path()
 
+        logging.info(f'Escribiendo una nueva versión de {file_path}')
+
         self.ensure_dir_exists(os.path.dirname(file_path))
-        self.metadata.to_xlsx(file_path)
+        self.report_output(file_path, render_if_changed(
+            file_path, self.metadata.to_xlsx,
+            same_content=xlsx_files_are_equal,
+        ))
+
+    def report_output(self, file_path, status):
+        """Registra si se escribió un archivo de salida del catálogo o si se
+        dejó intacto porque no cambió su contenido."""
+        if status == UNCHANGED:
+            logging.info(f'{file_path} no cambió')
+
+        outputs_reports = self.context['catalog'][self.identifier].get(
+            'catalog_outputs_reports')
+        if outputs_reports is not None:
+            outputs_reports.append(
+                {'file_path': file_path, 'output_status': status})
 
     def init_childs(self):
         datasets_identifiers = \
@@ -530,64 +898,600 @@ class Catalog(ETLObject):
     def process(self):
         self.pre_process()
 
-        for child in self.childs:
-            child.process()
+        if self.distribution_jobs > 1 and self.can_process_in_parallel():
+            self.process_in_parallel()
+        else:
+            self.start_downloads()
+            for child in self.childs:
+                child.process()
         self.post_process()
 
+    def can_process_in_parallel(self):
+        if not process_pools_available():
+            return False
+
+        if multiprocessing.current_process().daemon:
+            logging.warning(
+                'No se pueden crear procesos desde un proceso daemon, '
+                'las distribuciones se procesan en serie')
+            return False
+
+        # un fork con otros hilos en ejecución puede heredar locks tomados
+        # (p. ej. el de un handler de logging) y bloquear los procesos hijos
+        if threading.active_count() > 1:
+            logging.warning(
+                'Hay otros hilos en ejecución, las distribuciones se '
+                'procesan en serie')
+            return False
+
+        return sum(len(dataset.childs) for dataset in self.childs) > 1
+
+    def process_in_parallel(self):
+        """Procesa las distribuciones de todos los datasets del catálogo en
+        hasta self.distribution_jobs procesos simultáneos.
+
+        Los procesos se crean antes de comenzar las descargas, para que
+        ningún otro hilo esté en ejecución al hacer el fork. Las
+        distribuciones que usan un mismo archivo fuente se envían juntas al
+        mismo proceso (ver get_distribution_batches()), cuando termina la
+        descarga del archivo. Los procesos sólo generan las distribuciones
+        (ver Distribution.run()): los reportes y los cambios en la metadata
+        del catálogo se registran en este proceso, en el mismo orden que en
+        una corrida en serie.
+        """
+        global _PARALLEL_CATALOG
+        _PARALLEL_CATALOG = self
+
+        logging.info(f'Procesando distribuciones en {self.distribution_jobs} procesos')
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.distribution_jobs,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_init_distribution_worker,
+        )
+        try:
+            # crea todos los procesos antes de iniciar los hilos de descarga
+            executor.submit(os.getpid).result()
+            self.start_downloads()
+
+            futures = {}
+            for url, positions in self.get_distribution_batches():
+                self.wait_for_download(url)
+                future = executor.submit(
+                    _process_distributions_in_worker, positions)
+                for batch_index, position in enumerate(positions):
+                    futures[position] = (future, batch_index)
+
+            for dataset_index, dataset in enumerate(self.childs):
+                dataset.pre_process()
+                for distribution_index, distribution in enumerate(
+                        dataset.childs):
+                    distribution.pre_process()
+                    future, batch_index = futures[
+                        (dataset_index, distribution_index)]
+                    try:
+                        distribution.set_result(
+                            future.result()[batch_index])
+                    except Exception as e:
+                        distribution.set_error(e)
+                    distribution.post_process()
+                dataset.post_process()
+        finally:
+            executor.shutdown()
+            _PARALLEL_CATALOG = None
+
+    def get_distribution_batches(self):
+        """Agrupa las distribuciones del catálogo por archivo fuente, para
+        procesar juntas las que lo comparten: así el proceso que las genera
+        abre el archivo una sola vez y lo libera al terminar (ver
+        release_source()).
+
+        Returns:
+            list: Tuplas (url, posiciones), con la URL del archivo fuente (o
+                None) y las posiciones (índice de dataset, índice de
+                distribución) de sus distribuciones, en el orden en que se
+                usan los archivos.
+        """
+        batches = OrderedDict()
+
+        for dataset_index, dataset in enumerate(self.childs):
+            for distribution_index, distribution in enumerate(
+                    dataset.childs):
+                position = (dataset_index, distribution_index)
+                url = distribution.metadata.get('scrapingFileURL')
+                if not isinstance(distribution.processor,
+                                  (TXTProcessor, SpreadsheetProcessor)):
+                    url, key = None, position
+                else:
+                    key = url
+                batches.setdefault(key, (url, []))[1].append(position)
+
+        return list(batches.values())
+
+    def init_worker_resources(self):
+        """Reemplaza, en un proceso que procesa distribuciones, los recursos
+        del catálogo que no pueden compartirse con el proceso principal.
+
+        Las descargas de archivos fuente las realiza el proceso principal
+        antes de enviar cada distribución (ver process_in_parallel()).
+        """
+        catalog_context = self.context['catalog'][self.identifier]
+        catalog_context['sources'] = dict.fromkeys(
+            catalog_context.get('sources', {}))
+        # se cuentan en cada grupo de distribuciones que recibe el proceso
+        # (ver _process_distributions_in_worker())
+        catalog_context['source_uses'] = Counter()
+        # los resultados se devuelven al terminar cada distribución, con sus
+        # archivos ya escritos
+        catalog_context['writer_pool'] = None
+        catalog_context['download_queue'] = None
+
+        self.context['sessions'] = download.SessionPool()
+        download_config = self.get_catalog_download_config(self.identifier)
+        catalog_context['session'] = self.get_download_session(
+            download_config.get('catalog'), download_config.get('sources'))
+
     def pre_process(self):
         logging.info(f'=== Catálogo: {self.identifier} ===')
         logging.info(f'Hay {len(get_ts_distributions_by_method(self.metadata, "csv_file"))} distribuciones para descarga directa')
         logging.info(f'Hay {len(get_ts_distributions_by_method(self.metadata, "text_file"))} distribuciones de archivo de texto')
         logging.info(f'Hay {len(get_ts_distributions_by_method(self.metadata, "excel_file"))} distribuciones de archivo excel')
 
-        config = self.get_catalog_download_config(
-            self.identifier).get('catalog')
+        download_config = self.get_catalog_download_config(self.identifier)
+        self.context['catalog'][self.identifier][
+            'session'] = self.get_download_session(
+                download_config.get('catalog'),
+                download_config.get('sources'))
 
-        txt_list = set([
-            distribution['scrapingFileURL']
-            for distribution
-            in get_ts_distributions_by_method(self.metadata, "text_file")
-            if (
-                not self.distribution_id_filter or
-                distribution['identifier'] == self.distribution_id_filter
-            )
-        ])
+        # las descargas comienzan en start_downloads()
+        self.context['catalog'][self.identifier]['sources'] = dict.fromkeys(
+            self.get_sources_urls())
+        self.context['catalog'][self.identifier][
+            'scraping_plans'] = self.compile_scraping_plans()
+        self.context['catalog'][self.identifier][
+            'source_sheets'] = self.get_source_sheets()
+        self.context['catalog'][self.identifier][
+            'source_uses'] = self.get_source_uses()
+        self.context['catalog'][self.identifier][
+            'validator'] = DistributionValidator(self.metadata)
+        self.context['catalog'][self.identifier]['workbook_keys'] = {}
+        self.context['catalog'][self.identifier]['text_panels'] = {}
+        self.context['catalog'][self.identifier][
+            'writer_pool'] = self.get_writer_pool()
+        self.context['catalog'][self.identifier][
+            'fingerprints'] = self.read_state(FINGERPRINTS_FILE_NAME)
+        self.context['catalog'][self.identifier][
+            'time_composed'] = self.read_state(TIME_COMPOSED_FILE_NAME)
 
-        for txt_url in txt_list:
-            logging.info(f'Descargando {txt_url}')
-            self.download_with_config(
-                txt_url,
-                self.get_txt_path(txt_url.split('/')[-1]),
-                config=config,
-            )
+        self.init_context_paths()
 
-        excel_list = set([
-            distribution['scrapingFileURL']
-            for distribution
-            in get_ts_distributions_by_method(self.metadata, "excel_file")
-            if (
-                not self.distribution_id_filter or
-                distribution['identifier'] == self.distribution_id_filter
-            )
-        ])
+    def start_downloads(self):
+        """Comienza a descargar en segundo plano los archivos fuente del
+        catálogo (ver download_sources())."""
+        catalog_context = self.context['catalog'][self.identifier]
+        download_config = self.get_catalog_download_config(self.identifier)
 
-        xl = {}
+        download_jobs = [
+            (url, self.get_source_path(url))
+            for url in catalog_context.get('sources', {})
+        ]
 
-        for excel_url in excel_list:
-            logging.info(f'Descargando {excel_url}')
-            self.download_with_config(
-                excel_url,
-                self.get_excel_path(excel_url.split('/')[-1]),
-                config=config,
-            )
+        catalog_context['sources'] = self.download_sources(
+            download_jobs,
+            download_config.get('catalog'),
+            download_config.get('sources'),
+            catalog_context.get('session'),
+        )
 
-            xl[excel_url.split(
-                '/')[-1]] = XlSeries(self.get_excel_path(excel_url.split('/')[-1]))
+    def get_sources_urls(self):
+        """Devuelve las URLs de los archivos fuente (TXT y Excel) del
+        catálogo, en el orden en que las van a usar sus distribuciones."""
+        urls = []
 
-        self.context['catalog'][self.identifier]['xl'] = xl
+        for dataset in self.childs:
+            for distribution in dataset.childs:
+                if not isinstance(distribution.processor,
+                                  (TXTProcessor, SpreadsheetProcessor)):
+                    continue
 
-        self.init_context_paths()
+                url = distribution.metadata.get('scrapingFileURL')
+                if url not in urls:
+                    urls.append(url)
+
+        return urls
+
+    def get_source_path(self, url):
+        file_name = get_source_file_name(url)
+
+        if file_name.split('.')[-1].lower() == 'txt':
+            return self.get_txt_path(file_name)
 
+        return self.get_excel_path(file_name)
+
+    def download_sources(self, download_jobs, config, sources_config,
+                         session=None):
+        """Encola en segundo plano la descarga de los archivos fuente del
+        catálogo.
+
+        Las descargas se realizan en paralelo mientras se procesan las
+        distribuciones, que esperan sólo por su propio archivo fuente (ver
+        wait_for_source()).
+
+        Args:
+            download_jobs (list): Tuplas (url, file_path) a descargar, en el
+                orden en que se van a usar.
+            config (dict): Configuración de descarga de cada archivo.
+            sources_config (dict): Configuración de la etapa de descargas
+                ('workers' y 'max_per_host').
+            session (requests.Session): Sesión HTTP compartida.
+
+        Returns:
+            dict: Descargas en curso (concurrent.futures.Future) por URL.
+        """
+        def download_with_log(url, file_path):
+            logging.info(f'Descargando {url}')
+            return self.download_with_config(
+                url, file_path, config=config, session=session)
+
+        def download_source(url, file_path):
+            store = self.context.get('store')
+            if not store:
+                return download_with_log(url, file_path)
+
+            result = store.fetch(url, download_with_log)
+            store.link(url, file_path)
+
+            return result
+
+        download_queue = download.DownloadQueue(
+            download_source,
+            workers=sources_config.get('workers', download.DEFAULT_WORKERS),
+            max_per_host=sources_config.get(
+                'max_per_host', download.DEFAULT_MAX_PER_HOST),
+        )
+        self.context['catalog'][self.identifier][
+            'download_queue'] = download_queue
+
+        return {
+            url: download_queue.submit(url, file_path)
+            for url, file_path in download_jobs
+        }
+
+    def wait_for_source(self, url):
+        """Espera a que termine la descarga de un archivo fuente y, si es un
+        Excel, lo registra en el caché de Excels de la corrida para que lo
+        abran las distribuciones que lo usan (ver get_workbook()).
+
+        Args:
+            url (str): URL del archivo fuente ('scrapingFileURL').
+        """
+        catalog_context = self.context['catalog'][self.identifier]
+        if url not in catalog_context.get('sources', {}):
+            return
+
+        self.wait_for_download(url)
+
+        if url in catalog_context.get('source_sheets', {}) and \
+                url not in catalog_context['workbook_keys']:
+            key = self.get_workbook_key(url)
+            self.context['workbooks'].add_uses(key)
+            catalog_context['workbook_keys'][url] = key
+
+    def compile_scraping_plans(self):
+        """Compila los planes de scraping de las distribuciones del catálogo
+        que se generan a partir de un Excel, antes de abrir cualquier Excel.
+
+        Las distribuciones con metadata de scraping inválida se informan y
+        quedan sin plan: fallan al procesarse.
+
+        Returns:
+            dict: Planes de scraping (ScrapingPlan) por identificador de
+                distribución.
+        """
+        plans = {}
+
+        for dataset in self.childs:
+            for distribution in dataset.childs:
+                if not isinstance(distribution.processor,
+                                  SpreadsheetProcessor):
+                    continue
+
+                try:
+                    plans[distribution.identifier] = get_scraping_plan(
+                        distribution.metadata)
+                except Exception as e:
+                    logging.warning(
+                        f'Distribución {distribution.identifier}: plan de '
+                        f'scraping inválido ({repr(e)})')
+
+        return plans
+
+    def get_workbook_sheets(self):
+        """Devuelve las hojas de cada Excel fuente que usan las
+        distribuciones del catálogo, según su metadata de scraping."""
+        sheets = {}
+
+        for dataset in self.childs:
+            for distribution in dataset.childs:
+                if not isinstance(distribution.processor,
+                                  SpreadsheetProcessor):
+                    continue
+
+                url_sheets = sheets.setdefault(
+                    distribution.metadata.get('scrapingFileURL'), [])
+                worksheet = distribution.metadata.get('scrapingFileSheet')
+                if worksheet not in url_sheets:
+                    url_sheets.append(worksheet)
+
+        return sheets
+
+    def get_source_sheets(self):
+        """Devuelve las hojas de cada Excel fuente que usan las
+        distribuciones del catálogo, según sus planes de scraping.
+
+        Si otros catálogos de la corrida usan el mismo Excel, se cargan
+        también sus hojas (ver ETL.count_workbook_uses()), para que lo
+        compartan sin volver a abrirlo.
+        """
+        plans = self.context['catalog'][self.identifier].get(
+            'scraping_plans', {})
+        run_sheets = self.context.get('workbook_sheets', {})
+        sheets = {}
+
+        for dataset in self.childs:
+            for distribution in dataset.childs:
+                if distribution.identifier not in plans:
+                    continue
+
+                url_sheets = sheets.setdefault(
+                    distribution.metadata.get('scrapingFileURL'), [])
+                worksheet = plans[distribution.identifier].worksheet
+                if worksheet not in url_sheets:
+                    url_sheets.append(worksheet)
+
+        return {
+            url: list(run_sheets.get(url) or url_sheets)
+            for url, url_sheets in sheets.items()
+        }
+
+    def get_source_uses(self, distributions=None):
+        """Cuenta las distribuciones que usan cada archivo fuente (TXT o
+        Excel): las indicadas, o todas las del catálogo."""
+        if distributions is None:
+            distributions = [
+                distribution
+                for dataset in self.childs
+                for distribution in dataset.childs
+            ]
+
+        return Counter(
+            distribution.metadata.get('scrapingFileURL')
+            for distribution in distributions
+            if isinstance(distribution.processor,
+                          (TXTProcessor, SpreadsheetProcessor))
+        )
+
+    def is_workbook_used_later(self, url):
+        """Indica si otro catálogo de la corrida, todavía no terminado, usa
+        el mismo Excel fuente (ver ETL.count_workbook_uses())."""
+        return self.context.get('workbook_catalogs', {}).get(url, 0) > 1
+
+    def release_workbooks(self):
+        """Descuenta el catálogo de los que usan cada uno de sus Excels
+        fuente, y cierra los que no va a usar ningún catálogo siguiente."""
+        workbook_catalogs = self.context.get('workbook_catalogs', {})
+
+        for url in self.get_workbook_sheets():
+            if not workbook_catalogs.get(url):
+                continue
+
+            workbook_catalogs[url] -= 1
+            if workbook_catalogs[url] == 0:
+                self.context['workbooks'].discard(self.get_workbook_key(url))
+
+    def release_source(self, url):
+        """Indica que una distribución terminó de usar su archivo fuente.
+        Cuando lo terminan de usar todas las distribuciones del catálogo, el
+        Excel se libera del caché, salvo que lo use otro catálogo de la
+        corrida, o se descarta el archivo de texto leído."""
+        catalog_context = self.context['catalog'][self.identifier]
+        source_uses = catalog_context.get('source_uses', {})
+        if not source_uses.get(url):
+            return
+
+        source_uses[url] -= 1
+        if source_uses[url] == 0:
+            key = catalog_context['workbook_keys'].pop(url, None)
+            if key:
+                self.context['workbooks'].release(
+                    key, keep=self.is_workbook_used_later(url))
+            catalog_context.get('text_panels', {}).pop(url, None)
+
+    def submit_write(self, distribution):
+        """Escribe los archivos de salida de una distribución en segundo
+        plano, si el catálogo tiene hilos de escritura, o en el momento.
+
+        Las escrituras en segundo plano esperan si hay demasiadas pendientes
+        (ver WriterPool) y se completan en finish_writes(): recién entonces
+        se publican las URLs de descarga de la distribución.
+        """
+        catalog_context = self.context['catalog'][self.identifier]
+        file_path = distribution.context['distribution_output_path']
+        writer_pool = catalog_context.get('writer_pool')
+
+        if writer_pool is None:
+            distribution.report['distribution_output'] = \
+                distribution.write_outputs(distribution._df, file_path)
+            distribution.set_downloadURLs(file_path)
+            return
+
+        future = writer_pool.submit(
+            distribution.write_outputs, distribution._df, file_path)
+        distribution.write_pending = True
+        catalog_context.setdefault('pending_writes', []).append(
+            (distribution, future, file_path))
+
+    def finish_writes(self):
+        """Espera a que terminen las escrituras en segundo plano y registra
+        sus resultados en los reportes de las distribuciones."""
+        catalog_context = self.context['catalog'][self.identifier]
+        writer_pool = catalog_context.pop('writer_pool', None)
+        if writer_pool is None:
+            return
+
+        writer_pool.shutdown()
+        for distribution, future, file_path in catalog_context.pop(
+                'pending_writes', []):
+            distribution.finish_write(future, file_path)
+
+    def get_writer_pool(self):
+        """Devuelve los hilos de escritura del catálogo ('writer_threads' y
+        'writer_queue_size' en config_general.yaml), o None si se configuró
+        escribir en el momento (writer_threads: 0)."""
+        config = self.config or {}
+        threads = config.get('writer_threads', DEFAULT_WRITER_THREADS)
+        if not threads:
+            return None
+
+        return WriterPool(
+            threads=threads,
+            queue_size=config.get(
+                'writer_queue_size', DEFAULT_WRITER_QUEUE_SIZE),
+        )
+
+    def release_memory(self, distribution):
+        """En modo de memoria acotada, libera los datos de una distribución
+        apenas se escribieron sus salidas y su reporte.
+
+        Si además se configuró un máximo de memoria residente y el proceso
+        lo supera, se cierran los Excels abiertos y se descartan los
+        archivos de texto leídos: las distribuciones siguientes los vuelven
+        a abrir si los necesitan.
+        """
+        if not self.bounded_memory:
+            return
+
+        distribution.release_memory()
+
+        if not self.max_rss or (get_rss() or 0) <= self.max_rss:
+            return
+
+        self.context['workbooks'].close_all()
+        self.context['catalog'][self.identifier].get(
+            'text_panels', {}).clear()
+        gc.collect()
+
+        rss = get_rss() or 0
+        if rss > self.max_rss:
+            logging.warning(
+                f'La memoria del proceso ({rss // MEGABYTE} MB) supera el '
+                f'máximo configurado ({self.max_rss // MEGABYTE} MB)')
+
+    def wait_for_download(self, url):
+        """Espera a que termine la descarga de un archivo fuente, sin
+        abrirlo."""
+        sources = self.context['catalog'][self.identifier].get('sources', {})
+        if sources.get(url):
+            sources[url].result()
+
+    def get_source_hash(self, url):
+        """Devuelve el hash del contenido descargado de un archivo fuente, o
+        None si no está en el almacén."""
+        store = self.context.get('store')
+        if not store or not url:
+            return None
+
+        return store.get_hash(url)
+
+    def get_state_path(self, file_name):
+        return os.path.join(
+            ROOT_DIR,
+            CATALOGS_DIR_INPUT,
+            self.identifier,
+            file_name
+        )
+
+    def read_state(self, file_name):
+        """Lee un estado del catálogo guardado en la última corrida, como
+        las huellas de las distribuciones generadas con éxito (ver
+        Distribution.get_fingerprint())."""
+        try:
+            with open(self.get_state_path(file_name), encoding='utf-8') as f:
+                return json.load(f)
+        except (IOError, ValueError):
+            return {}
+
+    def write_state(self, file_name, state):
+        write_atomically(
+            self.get_state_path(file_name),
+            [json.dumps(state, indent=4, sort_keys=True).encode('utf-8')]
+        )
+
+    def get_time_composed_state(self):
+        """Devuelve qué índices de tiempo son compuestos (ver
+        SpreadsheetProcessor.get_time_composed_key()) para el contenido
+        actual de los archivos fuente del catálogo. Se descartan los de
+        contenidos anteriores, para que el estado no crezca cada vez que
+        cambia una fuente."""
+        store = self.context.get('store')
+        sources = set()
+        for dataset in self.metadata.get('dataset', []):
+            for distribution in dataset.get('distribution', []):
+                url = distribution.get('scrapingFileURL')
+                if url:
+                    sources.add(
+                        (store.get_hash(url) if store else None) or url)
+
+        prefixes = tuple(f'{source}|' for source in sources)
+        time_composed = self.context['catalog'][self.identifier].get(
+            'time_composed', {})
+
+        return {
+            key: value for key, value in time_composed.items()
+            if key.startswith(prefixes)
+        }
+
+    def get_workbook_key(self, url):
+        """Devuelve la clave de un Excel fuente en el caché de Excels: el
+        hash de su contenido, o su path si no está en el almacén, y las hojas
+        que se cargan.
+
+        Los catálogos que usan el mismo Excel cargan las mismas hojas (ver
+        get_source_sheets()), por lo que comparten la clave: el Excel se
+        abre una vez por corrida y se cierra cuando lo termina de usar el
+        último catálogo (ver release_workbooks()).
+        """
+        sheets = self.context['catalog'][self.identifier].get(
+            'source_sheets', {}).get(url)
+
+        return (
+            self.get_source_hash(url) or self.get_source_path(url),
+            tuple(sheets) if sheets else None,
+        )
+
+    def finish_downloads(self):
+        """Espera a que terminen todas las descargas de archivos fuente y
+        registra sus resultados."""
+        catalog_context = self.context['catalog'][self.identifier]
+        sources = catalog_context.get('sources', {})
+
+        catalog_context['catalog_downloads_reports'] = [
+            {
+                'url': url,
+                'file_path': self.get_source_path(url),
+                'download_status': future.result(),
+            }
+            for url, future in sources.items()
+        ]
+
+        if catalog_context.get('download_queue'):
+            catalog_context['download_queue'].shutdown()
+
+        logging.info(
+            f"Descargas: {self._get_download_reports_indicator(download.FRESH)} nuevas, "
+            f"{self._get_download_reports_indicator(download.REVALIDATED)} sin cambios, "
+            f"{self._get_download_reports_indicator(download.FAILED)} con error"
+        )
 
     def get_txt_path(self, txt_name):
         return os.path.join(
@@ -655,6 +1559,19 @@ class Catalog(ETLObject):
         )
 
     def post_process(self):
+        self.finish_writes()
+        self.finish_downloads()
+        self.release_workbooks()
+        self.write_state(
+            FINGERPRINTS_FILE_NAME,
+            self.context['catalog'][self.identifier].get('fingerprints', {}))
+        self.write_state(
+            TIME_COMPOSED_FILE_NAME, self.get_time_composed_state())
+        self.context['catalog'][self.identifier].pop(
+            'sheet_extractions', None)
+        self.context['catalog'][self.identifier].pop(
+            'sheet_group_pending', None)
+
         # TODO: unset dataset_path
 
         # TODO: Configurar source de llaves a excluir
@@ -670,12 +1587,8 @@ class Catalog(ETLObject):
                     field.pop('dataset_identifier', None)
                     field.pop('distribution_identifier', None)
 
-        logging.info(f'Escribiendo una nueva versión de {self.get_json_metadata_path()}')
         self.write_json_metadata()
 
-        logging.info(f'Escribiendo una nueva versión de {self.get_xlsx_metadata_path()}')
-        self.write_xlsx_metadata()
-
         datasets_report = self.get_datasets_report()
 
         distributions_report = self.get_distributions_report()
@@ -702,6 +1615,8 @@ class Catalog(ETLObject):
             index=False
         )
 
+        self.write_xlsx_metadata()
+
         self.log_indicators()
 
     def send_email(self, mailer_config, subject, message, recipients, files=None):
@@ -892,7 +1807,10 @@ class Catalog(ETLObject):
             'distribution_source',
             'distribution_sheet',
             'time_index_coord',
-
+            'source_host_status',
+            'distribution_validation',
+            'distribution_peak_memory_mb',
+            'distribution_output',
         )
 
         distributions_report = pd.DataFrame(
@@ -900,6 +1818,10 @@ class Catalog(ETLObject):
                 'catalog_distributions_reports'],
             columns=columns,
         )
+        distributions_report['distribution_validation'] = \
+            distributions_report['distribution_validation'].map(
+                lambda result: json.dumps(result, ensure_ascii=False)
+                if result else None)
         custom_order = ['ERROR', 'WARNING', 'OK']
 
         distributions_report['distribution_status'] = pd.Categorical(
@@ -914,7 +1836,55 @@ class Catalog(ETLObject):
 
         return distributions_report
 
-    def download_with_config(self, url, file_path, config):
+    def get_download_session(self, config, sources_config=None):
+        """Devuelve la sesión HTTP compartida de la corrida para una
+        configuración de descargas.
+
+        Args:
+            config (dict): Configuración de descarga ('proxies',
+                'try_timeout', 'verify').
+            sources_config (dict): Configuración de la etapa de descargas
+                ('pool_connections', 'pool_maxsize').
+
+        Returns:
+            requests.Session: Sesión HTTP, o None si la corrida no tiene un
+                pool de sesiones.
+        """
+        sessions = self.context.get('sessions')
+        if not sessions:
+            return None
+
+        sources_config = sources_config or {}
+
+        return sessions.get_session(
+            proxies=config.get('proxies'),
+            try_timeout=config.get('try_timeout'),
+            pool_connections=sources_config.get(
+                'pool_connections', download.DEFAULT_POOL_CONNECTIONS),
+            pool_maxsize=sources_config.get(
+                'pool_maxsize', download.DEFAULT_POOL_MAXSIZE),
+            max_host_failures=sources_config.get(
+                'max_host_failures', download.DEFAULT_MAX_HOST_FAILURES),
+            verify=config.get('verify', True),
+        )
+
+    def get_host_status(self, url):
+        """Devuelve el estado del circuito (download.CIRCUIT_OPEN o
+        download.CIRCUIT_CLOSED) del host de una URL, o None si no se le
+        hicieron pedidos."""
+        sessions = self.context.get('sessions')
+        if not sessions or not url:
+            return None
+
+        return sessions.breaker.get_state(url)
+
+    def download_with_config(self, url, file_path, config, session=None):
+        """Descarga un archivo según la configuración de descargas.
+
+        Returns:
+            str: Resultado de la descarga (download.FRESH,
+                download.REVALIDATED, download.FAILED o download.SKIPPED).
+        """
         self.ensure_dir_exists(
             os.path.dirname(file_path),
         )
@@ -922,12 +1892,23 @@ class Catalog(ETLObject):
         if os.path.isfile(file_path) and self.interactive:
             logging.info('Saltando descarga de {}'.format(url))
             logging.info('Usando archivo {}'.format(file_path))
-            return
+            return download.SKIPPED
+        config = {
+            key: value for key, value in config.items()
+            if key not in DOWNLOAD_STAGE_PARAMS
+        }
         try:
-            download.download_to_file(url, file_path, **config)
+            result = download.download_to_file(
+                url, file_path, session=session, **config)
         except Exception as e:
             logging.info('Error al descargar {}'.format(url))
             logging.error(repr(e))
+            return download.FAILED
+
+        if result == download.REVALIDATED:
+            logging.debug('{} no cambió, se usa la copia local'.format(url))
+
+        return result
 
     def read_xlsx_catalog(self, catalog_xlsx_path):
         default_values = {}
@@ -991,6 +1972,27 @@ class Catalog(ETLObject):
             else self.context['catalog'][self.identifier]['catalog_distributions_reports']
         )
 
+    def _get_download_reports_indicator(self, status=None):
+        downloads_reports = self.context['catalog'][self.identifier].get(
+            'catalog_downloads_reports', [])
+
+        return len(
+            [r for r in downloads_reports
+                if r.get('download_status') == status]
+            if status
+            else downloads_reports
+        )
+
+    def _get_output_reports_indicator(self, status=None):
+        outputs_reports = self.context['catalog'][self.identifier].get(
+            'catalog_outputs_reports', [])
+
+        return len(
+            [r for r in outputs_reports if r.get('output_status') == status]
+            if status
+            else outputs_reports
+        )
+
     def _get_distributions_percentage_indicator(self):
         distributions_ok = self._get_distribution_reports_indicator(
             status='OK')
@@ -1013,6 +2015,12 @@ class Catalog(ETLObject):
             'distributions_ok': self._get_distribution_reports_indicator(status='OK'),
             'distributions_error': self._get_distribution_reports_indicator(status='ERROR'),
             'distributions_percentage': self._get_distributions_percentage_indicator(),
+            'downloads': self._get_download_reports_indicator(),
+            'downloads_fresh': self._get_download_reports_indicator(status=download.FRESH),
+            'downloads_revalidated': self._get_download_reports_indicator(status=download.REVALIDATED),
+            'downloads_failed': self._get_download_reports_indicator(status=download.FAILED),
+            'outputs_written': self._get_output_reports_indicator(status=WRITTEN),
+            'outputs_unchanged': self._get_output_reports_indicator(status=UNCHANGED),
         }
 
         return indicators
@@ -1030,6 +2038,12 @@ class Catalog(ETLObject):
             f'Distribuciones (ERROR): {_indicators.get("distributions_error")}',
             f'Distribuciones (OK): {_indicators.get("distributions_ok")}',
             f'Distribuciones (OK %): {_indicators.get("distributions_percentage")}',
+            f'Descargas: {_indicators.get("downloads")}',
+            f'Descargas (nuevas): {_indicators.get("downloads_fresh")}',
+            f'Descargas (sin cambios): {_indicators.get("downloads_revalidated")}',
+            f'Descargas (ERROR): {_indicators.get("downloads_failed")}',
+            f'Archivos escritos: {_indicators.get("outputs_written")}',
+            f'Archivos sin cambios: {_indicators.get("outputs_unchanged")}',
             ''
         ]
 
@@ -1043,6 +2057,82 @@ class Catalog(ETLObject):
             logging.info(indicator)
 
 
+# reportes de cada catálogo que un proceso de ETL.process_in_parallel()
+# devuelve al proceso principal
+CATALOG_RESULT_KEYS = (
+    'catalog_datasets_reports',
+    'catalog_distributions_reports',
+    'catalog_downloads_reports',
+    'catalog_outputs_reports',
+)
+
+def process_pools_available():
+    """Indica si se pueden procesar catálogos o distribuciones en paralelo:
+    ProcessPoolExecutor recibe mp_context e initializer desde Python 3.7."""
+    if sys.version_info < (3, 7):
+        logging.warning(
+            'El procesamiento en paralelo requiere Python 3.7 o superior, '
+            'se procesa en serie')
+        return False
+
+    return True
+
+
+# ETL que se está procesando en paralelo, heredado por los procesos hijos
+_PARALLEL_ETL = None
+
+
+# catálogo cuyas distribuciones se están procesando en paralelo, heredado por
+# los procesos hijos
+_PARALLEL_CATALOG = None
+
+
+def _init_distribution_worker():
+    _PARALLEL_CATALOG.init_worker_resources()
+
+
+def _process_distributions_in_worker(positions):
+    catalog = _PARALLEL_CATALOG
+    distributions = [
+        catalog.childs[dataset_index].childs[distribution_index]
+        for dataset_index, distribution_index in positions
+    ]
+    catalog.context['catalog'][catalog.identifier].setdefault(
+        'source_uses', Counter()).update(
+            catalog.get_source_uses(distributions))
+
+    results = []
+    for (dataset_index, _), distribution in zip(positions, distributions):
+        catalog.childs[dataset_index].pre_process()
+        distribution.run()
+        results.append(distribution.get_result())
+        catalog.release_memory(distribution)
+
+    return results
+
+
+def _process_catalog_in_worker(index):
+    etl = _PARALLEL_ETL
+    etl.init_run_resources()
+
+    catalog = etl.childs[index]
+    # cada proceso tiene su propio caché de Excels, por lo que no conserva
+    # Excels para los catálogos que procesan otros procesos
+    etl.context['workbook_catalogs'] = Counter()
+    # las distribuciones se procesan en serie dentro de cada proceso: los
+    # procesos que crearía el catálogo se sumarían a los de la corrida
+    catalog.distribution_jobs = 1
+    try:
+        catalog.process()
+    finally:
+        etl.context['sessions'].close()
+
+    return {
+        key: etl.context['catalog'][catalog.identifier].get(key, [])
+        for key in CATALOG_RESULT_KEYS
+    }
+
+
 class ETL(ETLObject):
 
     def __init__(self, identifier, parent=None, context=None, **kwargs):
@@ -1050,10 +2140,14 @@ class ETL(ETLObject):
         self.print_log_separator(logging, "Extracción de catálogos")
         logging.info(f'Hay {len(self.catalogs_from_config.keys())} catálogos')
         self.replace = kwargs.get('replace')
+        self.full_rebuild = kwargs.get('full_rebuild', False)
         self.config = kwargs.get('config')
         self.catalog_id_filter = kwargs.get('catalog_id_filter')
         self.distribution_id_filter = kwargs.get('distribution_id_filter')
         self.interactive = kwargs.get('interactive', False)
+        self.jobs = kwargs.get('jobs') or 1
+        self.distribution_jobs = kwargs.get('distribution_jobs') or 1
+        self.normalize_config()
         super().__init__(identifier, parent, context)
         self.print_log_separator(logging, "Envío de mails para: extracción")
 
@@ -1065,10 +2159,43 @@ class ETL(ETLObject):
                 "No hay configuración para envío de mails.")
             logging.warning("Salteando envío de mails...")
 
+    def normalize_config(self):
+        """Valida una sola vez las opciones de config_general.yaml que usan
+        todas las distribuciones, para que un valor inválido no haga fallar
+        a cada una."""
+        if self.config and 'distribution_formats' in self.config:
+            self.config['distribution_formats'] = normalize_columnar_formats(
+                self.config['distribution_formats'])
+
     def init_context(self):
         self.context = self._get_default_context()
         self.context['config_mail'] = self.read_config_mail()
         self.context['catalog'] = {}
+        # identifica la corrida en el almacén de fuentes, que comparten los
+        # procesos de una misma corrida (ver SourceStore)
+        self.context['run_id'] = uuid.uuid4().hex
+        self.init_run_resources()
+
+    def init_run_resources(self):
+        """Inicializa los recursos de la corrida que no pueden compartirse
+        entre procesos (sesiones HTTP, almacén de fuentes y Excels
+        abiertos)."""
+        self.context['sessions'] = download.SessionPool()
+        self.context['store'] = SourceStore(
+            os.path.join(ROOT_DIR, STORE_DIR_INPUT),
+            run_id=self.context.get('run_id'))
+        self.context['workbooks'] = WorkbookCache(
+            max_size=self.get_workbook_cache_size())
+        self.context['parsed_sheets'] = get_parsed_sheet_cache(self.config)
+
+    def get_workbook_cache_size(self):
+        """Devuelve el presupuesto de memoria para Excels abiertos
+        ('workbook_cache_mb' en config_general.yaml), en bytes."""
+        cache_mb = (self.config or {}).get('workbook_cache_mb')
+        if not cache_mb:
+            return None
+
+        return int(cache_mb * MEGABYTE)
 
     def init_childs(self):
         self.childs = [
@@ -1081,9 +2208,13 @@ class ETL(ETLObject):
                     'formato'
                 ),
                 replace=self.replace,
+                full_rebuild=self.full_rebuild,
+                distribution_jobs=self.distribution_jobs,
                 config=self.config,
                 distribution_id_filter=self.distribution_id_filter,
-                interactive=self.interactive
+                interactive=self.interactive,
+                write_xlsx=self.catalogs_from_config.get(catalog).get(
+                    'xlsx', False),
             )
             for catalog in self.catalogs_from_config.keys()
             if (not self.catalog_id_filter or
@@ -1111,14 +2242,70 @@ class ETL(ETLObject):
     def process(self):
         self.pre_process()
 
-        for child in self.childs:
-            child.process()
+        if self.jobs > 1 and len(self.childs) > 1 and \
+                process_pools_available():
+            self.process_in_parallel()
+        else:
+            for child in self.childs:
+                child.process()
         self.post_process()
 
+    def process_in_parallel(self):
+        """Procesa cada catálogo en un proceso propio, con hasta self.jobs
+        procesos simultáneos.
+
+        Cada proceso trabaja sobre una copia aislada del contexto y devuelve
+        los reportes del catálogo, que se incorporan al contexto de este
+        proceso para la etapa de envío de mails.
+        """
+        global _PARALLEL_ETL
+        _PARALLEL_ETL = self
+
+        logging.info(f'Procesando {len(self.childs)} catálogos en {self.jobs} procesos')
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.jobs,
+            mp_context=multiprocessing.get_context('fork'),
+        )
+        try:
+            futures = [
+                executor.submit(_process_catalog_in_worker, index)
+                for index in range(len(self.childs))
+            ]
+
+            for child, future in zip(self.childs, futures):
+                self.context['catalog'][child.identifier].update(
+                    future.result())
+        finally:
+            executor.shutdown()
+            _PARALLEL_ETL = None
+
     def pre_process(self):
         self.print_log_separator(logging, "Scraping de catálogos")
+        self.count_workbook_uses()
+
+    def count_workbook_uses(self):
+        """Registra qué catálogos usan cada Excel fuente y qué hojas, para
+        abrir una sola vez por corrida los que comparten varios catálogos
+        (ver Catalog.get_source_sheets() y Catalog.release_workbooks())."""
+        sheets, catalogs = {}, Counter()
+
+        for catalog in self.childs:
+            catalog_sheets = catalog.get_workbook_sheets()
+            catalogs.update(catalog_sheets.keys())
+            for url, url_sheets in catalog_sheets.items():
+                run_sheets = sheets.setdefault(url, [])
+                run_sheets.extend(
+                    sheet for sheet in url_sheets if sheet not in run_sheets)
+
+        self.context['workbook_sheets'] = sheets
+        self.context['workbook_catalogs'] = catalogs
 
     def post_process(self):
+        self.context['sessions'].close()
+        self.context['store'].prune()
+        self.context['parsed_sheets'].evict()
+
         self.print_log_separator(logging, "Envío de mails para: scraping")
 
         if self.context['config_mail']:
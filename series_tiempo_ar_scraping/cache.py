@@ -0,0 +1,192 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+from series_tiempo_ar_scraping.utils import write_atomically
+
+# se incrementa cuando cambia el formato de los archivos del caché o el
+# scraping de las hojas, para invalidar los resultados guardados
+PARSED_SHEETS_CACHE_VERSION = 1
+
+DEFAULT_PARSED_SHEETS_CACHE_MB = 1024
+
+CACHE_SUFFIX = ".npz"
+
+
+def get_parsed_sheet_key(source_hash, plan_key):
+    """Devuelve la clave del resultado de scrapear un archivo fuente con un
+    plan de scraping (ver plans.ScrapingPlan)."""
+    content = "{}|{}|{}".format(
+        PARSED_SHEETS_CACHE_VERSION, source_hash, plan_key)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _to_builtin(value):
+    if isinstance(value, np.generic):
+        return value.item()
+
+    raise TypeError(repr(value))
+
+
+def dump_parsed_sheet(diccionario):
+    """Serializa en formato .npz el resultado de scrapear una distribución.
+
+    Sólo se pueden serializar DataFrames con un índice de fechas y columnas
+    numéricas.
+
+    Args:
+        diccionario (dict): DataFrame ('df') y filas de fin de la tabla
+            ('table_end') y del índice de tiempo ('end').
+
+    Returns:
+        bytes: Contenido del archivo .npz, o None si no se puede serializar.
+    """
+    df = diccionario["df"]
+    if not isinstance(df, pd.DataFrame) or \
+            not isinstance(df.index, pd.DatetimeIndex) or \
+            df.index.tz is not None or \
+            any(dtype.kind not in "fiub" for dtype in df.dtypes):
+        return None
+
+    try:
+        metadata = json.dumps({
+            "columns": list(df.columns),
+            "index_name": df.index.name,
+            "freq": df.index.freqstr,
+            "table_end": diccionario.get("table_end"),
+            "end": diccionario.get("end"),
+        }, default=_to_builtin)
+    except TypeError:
+        return None
+
+    arrays = {
+        "metadata": np.array(metadata),
+        "index": df.index.values,
+    }
+    for position in range(len(df.columns)):
+        arrays["column_{}".format(position)] = df.iloc[:, position].values
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
+
+
+def load_parsed_sheet(file_obj):
+    """Reconstruye el resultado serializado con dump_parsed_sheet()."""
+    with np.load(file_obj, allow_pickle=False) as arrays:
+        metadata = json.loads(str(arrays["metadata"]))
+        index = pd.DatetimeIndex(
+            arrays["index"], name=metadata["index_name"],
+            freq=metadata["freq"])
+        df = pd.DataFrame(
+            {
+                position: arrays["column_{}".format(position)]
+                for position in range(len(metadata["columns"]))
+            },
+            index=index,
+        )
+
+    df.columns = metadata["columns"]
+
+    return {
+        "df": df,
+        "table_end": metadata["table_end"],
+        "end": metadata["end"],
+    }
+
+
+class ParsedSheetCache:
+    """Caché en disco de las distribuciones scrapeadas de Excels, por hash
+    del archivo fuente y plan de scraping.
+
+    Permite reconstruir en corridas siguientes el DataFrame de una
+    distribución cuyo archivo fuente no cambió sin abrir el Excel. Los
+    archivos usados menos recientemente se eliminan cuando el caché supera
+    su tamaño máximo (ver evict()).
+
+    Args:
+        cache_dir (str): Directorio del caché.
+        max_size (int): Tamaño máximo del caché en bytes, o None para no
+            limitarlo.
+    """
+
+    def __init__(self, cache_dir, max_size=None):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.max_size = max_size
+
+    def get_path(self, key):
+        return self.cache_dir / key[:2] / (key + CACHE_SUFFIX)
+
+    def read(self, key):
+        """Devuelve el resultado guardado para una clave, o None si no está
+        en el caché."""
+        path = self.get_path(key)
+
+        try:
+            diccionario = load_parsed_sheet(str(path))
+        except Exception as e:
+            if path.exists():
+                logging.debug(f'No se pudo leer {path}: {repr(e)}')
+            return None
+
+        # registra el uso, para la eliminación de los menos usados
+        os.utime(str(path))
+
+        return diccionario
+
+    def write(self, key, diccionario):
+        """Guarda el resultado de scrapear una distribución, si se puede
+        serializar.
+
+        Returns:
+            bool: True si se guardó.
+        """
+        content = dump_parsed_sheet(diccionario)
+        if content is None:
+            return False
+
+        write_atomically(str(self.get_path(key)), [content])
+        return True
+
+    def get_files(self):
+        if not self.cache_dir.is_dir():
+            return []
+
+        return [
+            path for path in self.cache_dir.glob("*/*" + CACHE_SUFFIX)
+            if path.is_file()
+        ]
+
+    def evict(self):
+        """Elimina los archivos usados menos recientemente hasta que el caché
+        no supere su tamaño máximo."""
+        if self.max_size is None:
+            return
+
+        files = [(path, path.stat()) for path in self.get_files()]
+        size = sum(stat.st_size for _, stat in files)
+
+        for path, stat in sorted(files, key=lambda item: item[1].st_mtime):
+            if size <= self.max_size:
+                break
+
+            path.unlink()
+            size -= stat.st_size
+
+    def clear(self):
+        """Elimina todos los archivos del caché.
+
+        Returns:
+            int: Cantidad de archivos eliminados.
+        """
+        files = self.get_files()
+        for path in files:
+            path.unlink()
+
+        return len(files)
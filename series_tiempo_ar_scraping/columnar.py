@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+
+from series_tiempo_ar_scraping.utils import render_if_changed
+
+try:
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+COLUMNAR_EXTENSIONS = {
+    "parquet": ".parquet",
+    "feather": ".feather",
+}
+
+# clave de la metadata propia en el esquema de los archivos
+METADATA_KEY = b"series_tiempo_ar"
+
+TIME_INDEX_LABEL = "indice_tiempo"
+
+
+def normalize_columnar_formats(formats):
+    """Normaliza los formatos columnares configurados ('distribution_formats'
+    en config_general.yaml): los pasa a minúsculas, quita los repetidos y
+    descarta con una advertencia los que no son válidos.
+
+    Returns:
+        list: Formatos válidos, en el orden configurado.
+    """
+    if isinstance(formats, str):
+        formats = [formats]
+
+    normalized = []
+    for file_format in formats or []:
+        key = str(file_format).strip().lower()
+        if key not in COLUMNAR_EXTENSIONS:
+            logging.warning(
+                f'Formato de distribución {file_format} inválido, se ignora '
+                f'(válidos: {", ".join(COLUMNAR_EXTENSIONS)})')
+        elif key not in normalized:
+            normalized.append(key)
+
+    return normalized
+
+
+def get_columnar_path(csv_path, file_format):
+    """Devuelve el path del archivo columnar de una distribución, junto a su
+    CSV y con el mismo nombre."""
+    root, extension = os.path.splitext(csv_path)
+    if extension.lower() != ".csv":
+        root = csv_path
+
+    return root + COLUMNAR_EXTENSIONS[file_format]
+
+
+def get_distribution_table(df, metadata=None):
+    """Convierte una distribución en una tabla de Arrow, con el índice de
+    tiempo como columna de tipo timestamp y la metadata indicada (p. ej.
+    la frecuencia) en el esquema."""
+    table = pyarrow.Table.from_pandas(
+        df.rename_axis(TIME_INDEX_LABEL), preserve_index=True)
+
+    schema_metadata = dict(table.schema.metadata or {})
+    schema_metadata[METADATA_KEY] = json.dumps(
+        metadata or {}, sort_keys=True).encode("utf-8")
+
+    return table.replace_schema_metadata(schema_metadata)
+
+
+def read_distribution_metadata(file_path, file_format):
+    """Devuelve la metadata guardada con write_columnar_distribution()."""
+    if file_format == "parquet":
+        schema = pyarrow.parquet.read_schema(file_path)
+    else:
+        schema = pyarrow.feather.read_table(file_path).schema
+
+    return json.loads(schema.metadata[METADATA_KEY].decode("utf-8"))
+
+
+def write_columnar_distribution(df, file_path, file_format, metadata=None):
+    """Escribe una distribución en un formato columnar tipado (Parquet o
+    Feather), sólo si cambió su contenido.
+
+    Args:
+        df (pandas.DataFrame): Series de la distribución, con el índice de
+            tiempo como índice.
+        file_path (str): Path del archivo.
+        file_format (str): 'parquet' o 'feather'.
+        metadata (dict): Metadata a guardar en el esquema del archivo.
+
+    Returns:
+        str: WRITTEN o UNCHANGED (ver utils.render_if_changed()).
+
+    Raises:
+        ImportError: Si no está instalado pyarrow.
+        ValueError: Si el formato no es válido.
+    """
+    if pyarrow is None:
+        raise ImportError("Se requiere pyarrow para escribir " + file_format)
+    if file_format not in COLUMNAR_EXTENSIONS:
+        raise ValueError(f"Formato {file_format} inválido")
+
+    table = get_distribution_table(df, metadata)
+
+    def render(path):
+        if file_format == "parquet":
+            pyarrow.parquet.write_table(table, path)
+        else:
+            pyarrow.feather.write_feather(table, path)
+
+    return render_if_changed(file_path, render)
@@ -0,0 +1,182 @@
+import logging
+import os
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from series_tiempo_ar_scraping.utils import (
+    WRITTEN,
+    write_atomically,
+    write_if_changed,
+)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+TIME_INDEX_LABEL = "indice_tiempo"
+
+# filas que se formatean por vez
+CSV_CHUNK_ROWS = 50000
+# bytes que se leen por vez del CSV para comprimirlo
+COMPRESSION_CHUNK_SIZE = 1024 * 1024
+
+COMPRESSION_SUFFIXES = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+}
+
+# nombres de columnas que to_csv() escribe sin comillas
+PLAIN_HEADER_REGEX = re.compile(r'^[^,"\r\n]*$')
+
+
+class UnsupportedDistributionError(Exception):
+    """La distribución no se puede formatear sin DataFrame.to_csv()."""
+
+
+def check_can_write_fast(df):
+    """Verifica que la distribución se pueda formatear por columnas con el
+    mismo resultado que DataFrame.to_csv(): nombres de columnas sin comillas,
+    índice de tiempo de fechas sin horas y series numéricas.
+
+    Raises:
+        UnsupportedDistributionError: Si hay que escribirla con to_csv().
+    """
+    if not len(df.columns) or not all(
+            isinstance(column, str) and PLAIN_HEADER_REGEX.match(column)
+            for column in df.columns):
+        raise UnsupportedDistributionError("Columnas no soportadas")
+
+    index = df.index
+    if not isinstance(index, pd.DatetimeIndex) or index.tz is not None or \
+            index.hasnans:
+        raise UnsupportedDistributionError("Índice de tiempo no soportado")
+
+    values = index.values
+    if (values != values.astype("datetime64[D]")).any():
+        raise UnsupportedDistributionError("El índice de tiempo tiene horas")
+
+    for dtype in df.dtypes:
+        if dtype.kind not in "iu" and dtype != np.float64:
+            raise UnsupportedDistributionError(
+                f"Tipo de datos {dtype} no soportado")
+
+
+def format_time_index(index):
+    """Formatea un índice de tiempo de fechas sin horas como lo hace
+    DataFrame.to_csv(), de una sola vez para todas las filas."""
+    days = index.values.astype("datetime64[D]")
+
+    return np.datetime_as_string(days, unit="D").tolist()
+
+
+def format_column(values, float_format=None):
+    """Formatea los valores de una serie entera o decimal como los escribe
+    DataFrame.to_csv(), con los faltantes como campos vacíos."""
+    if values.dtype.kind in "iu":
+        return list(map(str, values.tolist()))
+
+    # repr() da la representación más corta, la misma que usa to_csv()
+    format_value = float_format.__mod__ if float_format else repr
+
+    return [
+        "" if value != value else format_value(value)
+        for value in values.tolist()
+    ]
+
+
+def iter_csv_chunks(df, float_format=None, chunk_rows=CSV_CHUNK_ROWS):
+    """Genera el contenido de la distribución en formato CSV, en bloques de
+    bytes. La distribución debe pasar check_can_write_fast()."""
+    header = ",".join([TIME_INDEX_LABEL] + list(df.columns)) + "\n"
+    yield header.encode("utf-8")
+
+    for start in range(0, len(df), chunk_rows):
+        block = df.iloc[start:start + chunk_rows]
+
+        columns = [format_time_index(block.index)]
+        for position in range(len(block.columns)):
+            columns.append(format_column(
+                block.iloc[:, position].values, float_format))
+
+        lines = map(",".join, zip(*columns))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def compress_file(file_path, compression):
+    """Escribe una copia comprimida de un archivo junto a él (p. ej.
+    'distribucion.csv.gz').
+
+    Returns:
+        str: Path de la copia comprimida, o None si el formato de
+            compresión no está disponible.
+    """
+    if compression == "gzip":
+        # wbits=31: formato gzip, sin fecha, para que la salida no cambie
+        # si no cambia el archivo
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+    elif compression == "zstd" and zstandard is not None:
+        compressor = zstandard.ZstdCompressor().compressobj()
+    else:
+        logging.warning(f'Compresión {compression} no disponible')
+        return None
+
+    def chunks():
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(COMPRESSION_CHUNK_SIZE), b""):
+                yield compressor.compress(chunk)
+        yield compressor.flush()
+
+    compressed_path = file_path + COMPRESSION_SUFFIXES[compression]
+    write_atomically(compressed_path, chunks())
+
+    return compressed_path
+
+
+def write_distribution_csv(df, file_path, float_format=None,
+                           compressions=()):
+    """Escribe una distribución en CSV de forma atómica, sólo si cambió su
+    contenido.
+
+    Las fechas y los valores se formatean por columna y de una vez para
+    cada bloque de filas, con el mismo resultado que DataFrame.to_csv() con
+    sus parámetros por defecto. Las distribuciones que no se pueden
+    formatear así se escriben con to_csv().
+
+    Args:
+        df (pandas.DataFrame): Series de la distribución, con el índice de
+            tiempo como índice.
+        file_path (str): Path del CSV.
+        float_format (str): Formato de los valores decimales (p. ej.
+            '%.10g'), o None para usar el de to_csv().
+        compressions (list): Formatos de las copias comprimidas a escribir
+            junto al CSV ('gzip', 'zstd').
+
+    Returns:
+        str: WRITTEN si se escribió el CSV, o UNCHANGED si ya tenía ese
+            contenido y quedó intacto.
+    """
+    try:
+        check_can_write_fast(df)
+    except UnsupportedDistributionError as e:
+        logging.debug(f'Se escribe {file_path} con to_csv(): {repr(e)}')
+        content = df.to_csv(
+            encoding="utf-8",
+            index_label=TIME_INDEX_LABEL,
+            float_format=float_format,
+        )
+        status = write_if_changed(file_path, [content.encode("utf-8")])
+    else:
+        status = write_if_changed(
+            file_path, iter_csv_chunks(df, float_format))
+
+    for compression in compressions:
+        compressed_path = file_path + COMPRESSION_SUFFIXES.get(
+            compression, "")
+        if status == WRITTEN or not os.path.exists(compressed_path):
+            compress_file(file_path, compression)
+
+    return status
@@ -1,17 +1,184 @@
+import email.utils
+import json
+import random
 import time
+import threading
 import requests
 import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from series_tiempo_ar_scraping.utils import get_file_hash, write_atomically
 
 DEFAULT_TRIES = 1
 RETRY_DELAY = 1
+BACKOFF_FACTOR = 2
+MAX_RETRY_DELAY = 60
+RETRY_AFTER_STATUS = (429, 503)
+DEFAULT_MAX_HOST_FAILURES = 5
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PER_HOST = 2
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+METADATA_SUFFIX = ".meta.json"
+CHUNK_SIZE = 1024 * 1024
+
+# resultados de download_to_file()
+FRESH = "fresh"
+REVALIDATED = "revalidated"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# estados del circuito de un host
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
 
 
 class DownloadException(Exception):
     pass
 
 
+class HostUnavailableError(DownloadException):
+    """El host superó la cantidad de fallas permitidas en la corrida y sus
+    descargas se descartan sin intentar conectarse."""
+
+    def __init__(self, host):
+        self.host = host
+        super().__init__(
+            "El host {} no está disponible (circuito abierto)".format(host))
+
+
+def get_retry_after(exception):
+    """Devuelve los segundos a esperar indicados por el header Retry-After
+    de una respuesta 429 o 503, o None si no hay ninguno válido."""
+    response = getattr(exception, "response", None)
+    if response is None or response.status_code not in RETRY_AFTER_STATUS:
+        return None
+
+    retry_after = response.headers.get("Retry-After")
+    if not retry_after:
+        return None
+
+    try:
+        return max(0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_at is None:
+        return None
+
+    return max(0, retry_at.timestamp() - time.time())
+
+
+def get_retry_delay(attempt, retry_delay=RETRY_DELAY,
+                    backoff_factor=BACKOFF_FACTOR,
+                    max_retry_delay=MAX_RETRY_DELAY):
+    """Calcula la espera antes de un reintento, con backoff exponencial y
+    jitter: entre la mitad y el total de retry_delay * backoff_factor **
+    attempt, sin superar max_retry_delay."""
+    delay = min(max_retry_delay, retry_delay * backoff_factor ** attempt)
+
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def retry(function, tries=DEFAULT_TRIES, retry_delay=RETRY_DELAY,
+          backoff_factor=BACKOFF_FACTOR, max_retry_delay=MAX_RETRY_DELAY):
+    """Ejecuta una función que realiza pedidos HTTP en uno o más intentos.
+
+    Entre cada intento espera un tiempo que crece exponencialmente, salvo que
+    el servidor indique cuánto esperar con el header Retry-After (en
+    respuestas 429 o 503).
+
+    Args:
+        function (callable): Función sin argumentos a ejecutar.
+        tries (int): Intentos a realizar (default: 1).
+        retry_delay (int o float): Tiempo a esperar, en segundos, antes del
+            primer reintento.
+        backoff_factor (int o float): Factor por el que se multiplica la
+            espera en cada reintento.
+        max_retry_delay (int o float): Espera máxima, en segundos, entre
+            intentos.
+
+    Returns:
+        El resultado de la función.
+
+    """
+    for i in range(tries):
+        try:
+            return function()
+
+        except requests.exceptions.RequestException as e:
+            download_exception = e
+
+            if i < tries - 1:
+                delay = get_retry_after(e)
+                if delay is None:
+                    delay = get_retry_delay(
+                        i, retry_delay, backoff_factor, max_retry_delay)
+
+                time.sleep(min(delay, max_retry_delay))
+
+    # raise DownloadException() from download_exception
+    raise download_exception
+
+
+def get_response(url, tries=DEFAULT_TRIES, retry_delay=RETRY_DELAY,
+                 try_timeout=None, proxies=None, verify=True, headers=None,
+                 stream=False, session=None, backoff_factor=BACKOFF_FACTOR,
+                 max_retry_delay=MAX_RETRY_DELAY):
+    """Realiza un GET a través del protocolo HTTP, en uno o más intentos.
+
+    Args:
+        url (str): URL (schema HTTP) del archivo a descargar.
+        tries (int): Intentos a realizar (default: 1).
+        retry_delay (int o float): Tiempo a esperar, en segundos, antes del
+            primer reintento (ver retry()).
+        try_timeout (int o float): Tiempo máximo a esperar por intento.
+        proxies (dict): Proxies a utilizar. El diccionario debe contener los
+            valores 'http' y 'https', cada uno asociados a la URL del proxy
+            correspondiente.
+        headers (dict): Headers HTTP adicionales a enviar.
+        stream (bool): Si es True, el contenido no se descarga hasta que se
+            lo lee de la respuesta.
+        session (requests.Session): Sesión a utilizar. Si no se especifica,
+            se abre una conexión nueva.
+        backoff_factor (int o float): Ver retry().
+        max_retry_delay (int o float): Ver retry().
+
+    Returns:
+        requests.Response: Respuesta del servidor.
+
+    """
+    if session is None:
+        # TODO: remover cuando los métodos que llaman a "download()" le pasen
+        # la configuración de descarga correctamente.
+        verify = False
+    else:
+        # las sesiones compartidas ya tienen la verificación configurada
+        # (ver SessionPool.get_session())
+        verify = None
+
+    def get():
+        response = (session or requests).get(
+            url, timeout=try_timeout, proxies=proxies, verify=verify,
+            headers=headers, stream=stream)
+
+        response.raise_for_status()
+        return response
+
+    return retry(get, tries=tries, retry_delay=retry_delay,
+                 backoff_factor=backoff_factor,
+                 max_retry_delay=max_retry_delay)
+
+
 def download(url, tries=DEFAULT_TRIES, retry_delay=RETRY_DELAY,
-             try_timeout=None, proxies=None, verify = True):
+             try_timeout=None, proxies=None, verify = True, session=None,
+             **kwargs):
     """Descarga un archivo a través del protocolo HTTP, en uno o más intentos.
 
     Args:
@@ -23,54 +190,369 @@ def download(url, tries=DEFAULT_TRIES, retry_delay=RETRY_DELAY,
         proxies (dict): Proxies a utilizar. El diccionario debe contener los
             valores 'http' y 'https', cada uno asociados a la URL del proxy
             correspondiente.
+        session (requests.Session): Sesión a utilizar. Si no se especifica,
+            se abre una conexión nueva.
+        kwargs: Parámetros de reintento para get_response().
 
     Returns:
         bytes: Contenido del archivo
 
     """
-    # TODO: remover cuando los métodos que llaman a "download()" le pasen
-    # la configuración de descarga correctamente.
-    verify = False
+    return get_response(url, tries=tries, retry_delay=retry_delay,
+                        try_timeout=try_timeout, proxies=proxies,
+                        verify=verify, session=session, **kwargs).content
 
-    for i in range(tries):
-        try:
-            response = requests.get(url, timeout=try_timeout, proxies=proxies,
-                                    verify=verify)
 
-            response.raise_for_status()
-            return response.content
+def get_metadata_path(file_path):
+    """Devuelve el path del archivo de metadatos de descarga asociado a
+    file_path."""
+    return pathlib.Path("{}{}".format(file_path, METADATA_SUFFIX))
 
-        except requests.exceptions.RequestException as e:
-            download_exception = e
 
-            if i < tries - 1:
-                time.sleep(retry_delay)
+def read_file_metadata(file_path):
+    """Lee los metadatos de la última descarga de file_path.
 
-    # raise DownloadException() from download_exception
-    raise download_exception
+    Returns:
+        dict: Metadatos ('etag', 'last_modified', 'size', 'sha256'), o None
+            si no existen o el archivo local no coincide con ellos.
+    """
+    path = pathlib.Path(file_path)
+    metadata_path = get_metadata_path(file_path)
+
+    if not path.is_file() or not metadata_path.is_file():
+        return None
+
+    try:
+        with metadata_path.open(encoding="utf-8") as f:
+            metadata = json.load(f)
+    except (IOError, ValueError):
+        return None
+
+    # si el archivo local cambió desde la última descarga, no se puede
+    # revalidar contra el servidor
+    if (path.stat().st_size != metadata.get("size") or
+            get_file_hash(file_path) != metadata.get("sha256")):
+        return None
+
+    return metadata
+
+
+def write_file_metadata(file_path, response, size, sha256):
+    metadata = {
+        "url": response.url,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "size": size,
+        "sha256": sha256,
+    }
+
+    write_atomically(
+        get_metadata_path(file_path),
+        [json.dumps(metadata, indent=4).encode("utf-8")]
+    )
+
+
+def get_conditional_headers(metadata):
+    headers = {}
+
+    if metadata.get("etag"):
+        headers["If-None-Match"] = metadata["etag"]
+    if metadata.get("last_modified"):
+        headers["If-Modified-Since"] = metadata["last_modified"]
 
+    return headers
 
-def download_to_file(url, file_path,verify=False, **kwargs):
+
+def download_to_file(url, file_path, verify=False, revalidate=True,
+                     chunk_size=CHUNK_SIZE, tries=DEFAULT_TRIES,
+                     retry_delay=RETRY_DELAY, backoff_factor=BACKOFF_FACTOR,
+                     max_retry_delay=MAX_RETRY_DELAY, **kwargs):
     """Descarga un archivo a través del protocolo HTTP, en uno o más intentos,
     y escribe el contenido descargado el el path especificado.
 
+    El contenido se escribe por bloques en un archivo temporal del directorio
+    destino, que sólo reemplaza a file_path una vez completa la descarga. Una
+    descarga fallida o interrumpida nunca deja un archivo truncado.
+
+    Junto al archivo se guardan los metadatos de la descarga (ETag,
+    Last-Modified, tamaño y hash del contenido). Si el archivo ya fue
+    descargado, se envía un pedido condicional y, si el servidor responde que
+    no hubo cambios (304), se conserva la copia local.
+
     Args:
         url (str): URL (schema HTTP) del archivo a descargar.
         file_path (str): Path del archivo a escribir. Si un archivo ya existe
             en el path especificado, se sobrescribirá con nuevos contenidos.
-        kwargs: Parámetros para download().
+        revalidate (bool): Si es True, revalida la copia local en lugar de
+            descargarla nuevamente cuando sea posible.
+        chunk_size (int): Tamaño en bytes de los bloques a escribir.
+        tries (int): Intentos a realizar (default: 1).
+        retry_delay (int o float): Tiempo a esperar, en segundos, antes del
+            primer reintento (ver retry()).
+        backoff_factor (int o float): Ver retry().
+        max_retry_delay (int o float): Ver retry().
+        kwargs: Parámetros para get_response().
+
+    Returns:
+        str: FRESH si se descargó el archivo o REVALIDATED si se conservó la
+            copia local.
 
     """
-    # print(url, file_path, kwargs)
-    content = download(url, **kwargs)
+    metadata = read_file_metadata(file_path) if revalidate else None
+    headers = get_conditional_headers(metadata) if metadata else None
 
-    # crea todos los directorios necesarios
-    path = pathlib.Path(file_path)
-    path.parent.mkdir(parents=True, exist_ok=True)
+    def download_once():
+        response = get_response(url, headers=headers, stream=True, **kwargs)
+
+        with response:
+            if response.status_code == 304:
+                return REVALIDATED
+
+            size, sha256 = write_atomically(
+                file_path, response.iter_content(chunk_size=chunk_size))
+
+        write_file_metadata(file_path, response, size, sha256)
+
+        return FRESH
+
+    return retry(download_once, tries=tries, retry_delay=retry_delay,
+                 backoff_factor=backoff_factor,
+                 max_retry_delay=max_retry_delay)
+
+
+class CircuitBreaker:
+    """Registra las fallas de cada host durante una corrida.
+
+    Cuando un host acumula max_failures fallas seguidas (errores de conexión,
+    timeouts o respuestas 429/5xx), el circuito se abre y el resto de sus
+    descargas falla inmediatamente, sin intentar conectarse.
+    """
+
+    def __init__(self):
+        self._failures = {}
+        self._open_hosts = set()
+        self._lock = threading.Lock()
+
+    def is_open(self, host):
+        return host in self._open_hosts
+
+    def record_failure(self, host, max_failures=DEFAULT_MAX_HOST_FAILURES):
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+
+            if max_failures and self._failures[host] >= max_failures:
+                self._open_hosts.add(host)
+
+    def record_success(self, host):
+        with self._lock:
+            if host not in self._open_hosts:
+                self._failures[host] = 0
+
+    def get_state(self, url):
+        """Devuelve el estado del circuito del host de una URL.
+
+        Returns:
+            str: CIRCUIT_OPEN o CIRCUIT_CLOSED, o None si no se realizaron
+                pedidos al host.
+        """
+        host = urlparse(url).netloc
+        if host not in self._failures:
+            return None
+
+        return CIRCUIT_OPEN if self.is_open(host) else CIRCUIT_CLOSED
+
+
+class DownloadSession(requests.Session):
+    """Sesión HTTP con un timeout por defecto para todos sus pedidos, que
+    registra el estado de cada host en un CircuitBreaker."""
+
+    def __init__(self, timeout=None, breaker=None,
+                 max_host_failures=DEFAULT_MAX_HOST_FAILURES):
+        super().__init__()
+        self.timeout = timeout
+        self.breaker = breaker
+        self.max_host_failures = max_host_failures
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+
+        if not self.breaker:
+            return super().request(method, url, **kwargs)
+
+        host = urlparse(url).netloc
+        if self.breaker.is_open(host):
+            raise HostUnavailableError(host)
 
-    with path.open("wb") as f:
         try:
-            f.write(content)
-        except IOError as e:
-            # raise DownloadException() from e
-            raise e
+            response = super().request(method, url, **kwargs)
+        except (requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout):
+            self.breaker.record_failure(host, self.max_host_failures)
+            raise
+
+        if response.status_code in RETRY_AFTER_STATUS or \
+                response.status_code >= 500:
+            self.breaker.record_failure(host, self.max_host_failures)
+        else:
+            self.breaker.record_success(host)
+
+        return response
+
+
+class SessionPool:
+    """Sesiones HTTP compartidas durante una corrida del ETL.
+
+    Mantiene una sesión por combinación de proxies, timeout y tamaño de pool,
+    de modo que las descargas de un mismo catálogo reutilizan las conexiones
+    keep-alive abiertas contra cada host. Todas las sesiones comparten un
+    mismo CircuitBreaker.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.breaker = CircuitBreaker()
+
+    def get_session(self, proxies=None, try_timeout=None,
+                    pool_connections=DEFAULT_POOL_CONNECTIONS,
+                    pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                    max_host_failures=DEFAULT_MAX_HOST_FAILURES,
+                    verify=True):
+        """Devuelve la sesión correspondiente a la configuración, creándola
+        si todavía no existe.
+
+        Args:
+            proxies (dict): Proxies a utilizar.
+            try_timeout (int o float): Tiempo máximo a esperar por pedido.
+            pool_connections (int): Cantidad de hosts cuyas conexiones se
+                mantienen abiertas.
+            pool_maxsize (int): Cantidad máxima de conexiones abiertas por
+                host.
+            max_host_failures (int): Fallas seguidas tras las cuales se
+                descartan las descargas de un host (0 para no descartarlas).
+            verify (bool): Si es False, no se verifican los certificados TLS
+                de los hosts.
+
+        Returns:
+            DownloadSession: Sesión HTTP.
+        """
+        key = (
+            tuple(sorted((proxies or {}).items())),
+            try_timeout,
+            pool_connections,
+            pool_maxsize,
+            max_host_failures,
+            verify,
+        )
+
+        with self._lock:
+            if key not in self._sessions:
+                session = DownloadSession(
+                    timeout=try_timeout,
+                    breaker=self.breaker,
+                    max_host_failures=max_host_failures,
+                )
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=pool_connections,
+                    pool_maxsize=pool_maxsize,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.proxies.update(proxies or {})
+                session.verify = verify
+
+                self._sessions[key] = session
+
+            return self._sessions[key]
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+
+
+class HostLimiter:
+    """Limita la cantidad de descargas simultáneas contra un mismo host.
+
+    Args:
+        max_per_host (int): Conexiones simultáneas permitidas por host.
+    """
+
+    def __init__(self, max_per_host=DEFAULT_MAX_PER_HOST):
+        self.max_per_host = max_per_host
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def get_semaphore(self, url):
+        host = urlparse(url).netloc
+
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(
+                    self.max_per_host)
+
+            return self._semaphores[host]
+
+
+class DownloadQueue:
+    """Cola de descargas que se ejecutan en segundo plano, en paralelo y
+    respetando un límite de conexiones simultáneas por host.
+
+    Las descargas comienzan en el orden en que se encolan.
+
+    Args:
+        download_function (callable): Función que recibe url y file_path y
+            realiza la descarga. Es responsable de manejar sus propios errores.
+        workers (int): Cantidad máxima de descargas simultáneas.
+        max_per_host (int): Cantidad máxima de descargas simultáneas contra
+            un mismo host.
+    """
+
+    def __init__(self, download_function, workers=DEFAULT_WORKERS,
+                 max_per_host=DEFAULT_MAX_PER_HOST):
+        self.download_function = download_function
+        self.limiter = HostLimiter(max_per_host)
+        self.executor = ThreadPoolExecutor(max_workers=max(1, workers))
+
+    def _download(self, url, file_path):
+        with self.limiter.get_semaphore(url):
+            return self.download_function(url, file_path)
+
+    def submit(self, url, file_path):
+        """Encola una descarga.
+
+        Returns:
+            concurrent.futures.Future: Resultado de download_function.
+        """
+        return self.executor.submit(self._download, url, file_path)
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+def download_many(jobs, download_function, workers=DEFAULT_WORKERS,
+                  max_per_host=DEFAULT_MAX_PER_HOST):
+    """Ejecuta varias descargas en paralelo, respetando un límite de
+    conexiones simultáneas por host.
+
+    Args:
+        jobs (list): Lista de tuplas (url, file_path) a descargar.
+        download_function (callable): Función que recibe url y file_path y
+            realiza la descarga. Es responsable de manejar sus propios errores.
+        workers (int): Cantidad máxima de descargas simultáneas.
+        max_per_host (int): Cantidad máxima de descargas simultáneas contra
+            un mismo host.
+
+    Returns:
+        list: Resultados de download_function, en el mismo orden que jobs.
+    """
+    queue = DownloadQueue(download_function, workers, max_per_host)
+
+    try:
+        futures = [queue.submit(url, file_path) for url, file_path in jobs]
+
+        return [future.result() for future in futures]
+    finally:
+        queue.shutdown()
@@ -3,7 +3,7 @@ import os
 import click
 import yaml
 
-from series_tiempo_ar_scraping.base import ETL
+from series_tiempo_ar_scraping.base import ETL, get_parsed_sheet_cache
 
 logging.getLogger("requests").setLevel(logging.WARNING)
 logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -54,6 +54,27 @@ def get_logger(log_level):
     default=True,
     type=bool,
 )
+@click.option(
+    '--full-rebuild',
+    is_flag=True,
+    default=False,
+    help='Regenera todas las distribuciones, aunque sus entradas no hayan '
+         'cambiado desde la última corrida.',
+)
+@click.option(
+    '--jobs',
+    default=1,
+    type=int,
+    help='Cantidad de catálogos a procesar en paralelo, cada uno en su '
+         'propio proceso.',
+)
+@click.option(
+    '--distribution-jobs',
+    default=1,
+    type=int,
+    help='Cantidad de distribuciones de cada catálogo a procesar en '
+         'paralelo, cada una en su propio proceso.',
+)
 @click.option(
     '--catalog-id-filter',
     default=None,
@@ -68,13 +89,17 @@ def get_logger(log_level):
     '--interactive/--no-interactive',
     default=False
 )
-def cli(config, log_level, replace, catalog_id_filter, distribution_id_filter, interactive):
+def cli(config, log_level, replace, full_rebuild, jobs, distribution_jobs,
+        catalog_id_filter, distribution_id_filter, interactive):
     main(config, log_level.upper(), replace,
-         catalog_id_filter, distribution_id_filter, interactive)
+         catalog_id_filter, distribution_id_filter, interactive,
+         full_rebuild=full_rebuild, jobs=jobs,
+         distribution_jobs=distribution_jobs)
 
 
 def main(config, log_level, replace, catalog_id_filter,
-         distribution_id_filter, interactive):
+         distribution_id_filter, interactive, full_rebuild=False, jobs=1,
+         distribution_jobs=1):
     index = read_config(file_path=config)
     config = read_config(file_path=os.path.join(
         CONFIG_DIR, 'config_general.yaml'))
@@ -88,14 +113,26 @@ def main(config, log_level, replace, catalog_id_filter,
         extension=None,
         index=index,
         replace=replace,
+        full_rebuild=full_rebuild,
         config=config,
         catalog_id_filter=catalog_id_filter,
         distribution_id_filter=distribution_id_filter,
-        interactive=interactive
+        interactive=interactive,
+        jobs=jobs,
+        distribution_jobs=distribution_jobs,
     )
 
     etl.run()
 
+
+@click.command()
+def clear_cache():
+    """Elimina el caché de distribuciones scrapeadas de Excels."""
+    get_logger('INFO')
+    removed = get_parsed_sheet_cache().clear()
+    logging.info(f'Se eliminaron {removed} archivos del caché')
+
+
 """PARA PRUEBAS"""
 #if __name__ == "__main__":
     #import sys
@@ -0,0 +1,56 @@
+import logging
+import resource
+import sys
+
+PROC_STATUS_PATH = '/proc/self/status'
+PROC_CLEAR_REFS_PATH = '/proc/self/clear_refs'
+
+KILOBYTE = 1024
+
+
+def _read_proc_status(key):
+    try:
+        with open(PROC_STATUS_PATH) as f:
+            for line in f:
+                if line.startswith(key + ':'):
+                    return int(line.split()[1]) * KILOBYTE
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return None
+
+
+def get_rss():
+    """Devuelve la memoria residente actual del proceso en bytes, o None si
+    no se puede medir."""
+    return _read_proc_status('VmRSS')
+
+
+def get_peak_rss():
+    """Devuelve el pico de memoria residente del proceso en bytes desde el
+    último reset_peak_rss(), o desde que empezó el proceso si no se puede
+    reiniciar la medición."""
+    peak = _read_proc_status('VmHWM')
+    if peak is not None:
+        return peak
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # en macOS ru_maxrss está en bytes, en Linux en kilobytes
+    return max_rss if sys.platform == 'darwin' else max_rss * KILOBYTE
+
+
+def reset_peak_rss():
+    """Reinicia la medición del pico de memoria del proceso, si el sistema
+    lo permite.
+
+    Returns:
+        bool: True si se reinició.
+    """
+    try:
+        with open(PROC_CLEAR_REFS_PATH, 'w') as f:
+            f.write('5')
+    except OSError as e:
+        logging.debug(f'No se pudo reiniciar el pico de memoria: {repr(e)}')
+        return False
+
+    return True
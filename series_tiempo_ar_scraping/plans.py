@@ -0,0 +1,169 @@
+import hashlib
+import json
+import re
+from collections import namedtuple
+
+XLSERIES_PARAMS = {
+    'alignment': 'vertical',
+    'composed_headers_coord': None,
+    'context': None,
+    'continuity': True,
+    'blank_rows': False,
+    'missings': True,
+    "missing_value": [
+        None, "", " ", "-", "--", "---", ".", "...", "/", "///",
+        "s.d.", "s.d", "s/d",
+        "n,d,", "n,d", "n.d.", "n.d", "n/d",
+        "s", "x"
+    ],
+    'time_alignment': 0,
+    'time_multicolumn': False,
+    "headers_coord": None,
+    "data_starts": None,
+    "frequency": None,
+    "time_header_coord": None,
+}
+
+FREQUENCIES_MAP = {
+    "R/P1Y": "Y",
+    "R/P6M": "S",
+    "R/P3M": "Q",
+    "R/P1M": "M",
+    "R/P1D": "D"
+}
+
+CELL_COORD_REGEX = re.compile(r'^[A-Za-z]+(\d+)$')
+
+# planes ya compilados en este proceso, por hash de la metadata de scraping
+_PLANS = {}
+
+
+class ScrapingPlan(namedtuple('ScrapingPlan', [
+        'key', 'worksheet', 'headers_coord', 'headers_value', 'data_starts',
+        'frequency', 'time_header_coord', 'series_names'])):
+    """Parámetros de XlSeries para extraer una distribución de un Excel,
+    compilados a partir de su metadata (ver compile_scraping_plan()).
+
+    Es inmutable y se puede usar como clave de diccionarios: 'key' es el hash
+    de la metadata de scraping a partir de la cual se compiló.
+    """
+
+    __slots__ = ()
+
+    def to_xlseries_params(self, time_composed):
+        """Devuelve un diccionario nuevo de parámetros para
+        XlSeries.get_data_frames(), que puede modificarlo."""
+        params = dict(XLSERIES_PARAMS)
+        params["missing_value"] = list(XLSERIES_PARAMS["missing_value"])
+        params["headers_coord"] = list(self.headers_coord)
+        params["data_starts"] = list(self.data_starts)
+        params["frequency"] = self.frequency
+        params["time_header_coord"] = self.time_header_coord
+        params["series_names"] = list(self.series_names)
+        params["time_composed"] = time_composed
+
+        return params
+
+    def get_sheet_group_key(self, url):
+        """Devuelve la clave de las distribuciones que se pueden extraer junto
+        a esta en una misma pasada sobre la hoja."""
+        return (
+            url,
+            self.worksheet,
+            self.time_header_coord,
+            self.frequency,
+            tuple(sorted(set(self.data_starts))),
+        )
+
+
+def row_from_cell_coord(coord):
+    match = CELL_COORD_REGEX.match(coord)
+    if not match:
+        raise ValueError('Invalid coordinate')
+
+    return int(match.group(1))
+
+
+def freq_iso_to_xlseries(freq_iso8601):
+    return FREQUENCIES_MAP[freq_iso8601]
+
+
+def get_scraping_metadata_hash(distribution):
+    scraping_metadata = {
+        'scrapingFileSheet': distribution.get('scrapingFileSheet'),
+        'field': distribution.get('field'),
+    }
+    content = json.dumps(scraping_metadata, sort_keys=True, default=str)
+
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def compile_scraping_plan(distribution, key=None):
+    """Compila el plan de scraping de una distribución.
+
+    Args:
+        distribution (dict): Metadata de la distribución, con sus fields.
+        key (str): Hash de la metadata, si ya se calculó.
+
+    Returns:
+        ScrapingPlan: Plan de scraping.
+
+    Raises:
+        KeyError, ValueError: Si la metadata de scraping es inválida.
+    """
+    fields = distribution["field"]
+    series_fields = [field for field in fields if not field.get("specialType")]
+
+    time_field = next(
+        (field for field in fields if field.get("title") == "indice_tiempo"),
+        None)
+    if not time_field:
+        raise ValueError('La distribución no tiene un field "indice_tiempo"')
+
+    return ScrapingPlan(
+        key=key or get_scraping_metadata_hash(distribution),
+        # hoja de la Distribucion
+        worksheet=distribution["scrapingFileSheet"],
+        # coordenadas de los headers de las series
+        headers_coord=tuple(
+            field["scrapingIdentifierCell"] for field in series_fields),
+        headers_value=tuple(field["id"] for field in series_fields),
+        # fila donde empiezan los datos
+        data_starts=tuple(
+            row_from_cell_coord(field["scrapingDataStartCell"])
+            for field in series_fields),
+        # frecuencia de las series
+        frequency=freq_iso_to_xlseries(time_field["specialTypeDetail"]),
+        # coordenadas del header del indice de tiempo
+        time_header_coord=time_field["scrapingIdentifierCell"],
+        # nombres de las series
+        series_names=tuple(field["title"] for field in series_fields),
+    )
+
+
+def get_scraping_plan(distribution):
+    """Devuelve el plan de scraping de una distribución, compilándolo sólo
+    si no se compiló antes un plan con la misma metadata."""
+    key = get_scraping_metadata_hash(distribution)
+    if key not in _PLANS:
+        _PLANS[key] = compile_scraping_plan(distribution, key)
+
+    return _PLANS[key]
+
+
+def combine_scraping_plans(plans):
+    """Combina los planes de distribuciones que comparten hoja e índice de
+    tiempo en un plan que extrae todas sus series, nombradas por su id."""
+    headers_value = tuple(
+        value for plan in plans for value in plan.headers_value)
+
+    return plans[0]._replace(
+        key=hashlib.sha256(
+            '|'.join(plan.key for plan in plans).encode('utf-8')).hexdigest(),
+        headers_coord=tuple(
+            coord for plan in plans for coord in plan.headers_coord),
+        headers_value=headers_value,
+        data_starts=tuple(
+            row for plan in plans for row in plan.data_starts),
+        series_names=headers_value,
+    )
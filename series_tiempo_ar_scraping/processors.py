@@ -1,21 +1,49 @@
+import datetime
+import io
 import logging
 import os
+import tempfile
+import arrow
+import numpy as np
 import pandas as pd
 import re
-from copy import deepcopy
+from pydatajson.time_series import (
+    get_distribution_time_index,
+    get_distribution_time_index_frequency,
+)
 
 from series_tiempo_ar.readers.csv_reader import CSVReader
-from series_tiempo_ar.validations import validate_distribution
 from series_tiempo_ar.validations import validate_distribution_scraping
-from series_tiempo_ar.readers.csv_reader import CSVReader
 
 from xlseries import XlSeries
 from xlseries.strategies.clean.parse_time import TimeIsNotComposed
 
+from series_tiempo_ar_scraping.cache import get_parsed_sheet_key
+from series_tiempo_ar_scraping.download import CHUNK_SIZE
+from series_tiempo_ar_scraping.plans import (
+    combine_scraping_plans,
+    get_scraping_plan,
+)
+from series_tiempo_ar_scraping.store import get_source_file_name
+from series_tiempo_ar_scraping.texts import TextPanel, get_text_panel_key
+
 ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATOS_DIR = os.path.join(ROOT_DIR, "data")
 CATALOGS_DIR_INPUT = os.path.join(DATOS_DIR, "input", "catalog")
 
+# tamaño a partir del cual una distribución descargada se guarda en disco
+CSV_SPOOL_SIZE = 16 * 1024 * 1024
+# filas de una distribución descargada que se parsean por vez
+CSV_CHUNK_ROWS = 50000
+# tipo de datos con el que se leen las series, según el 'type' de su field
+FIELD_DTYPES = {
+    "number": np.float64,
+    "integer": np.float64,
+}
+# formato de las fechas de los índices de tiempo de frecuencia diaria o
+# mayor
+TIME_INDEX_FORMAT = "%Y-%m-%d"
+
 
 class BaseProcessor():
 
@@ -26,19 +54,162 @@ class BaseProcessor():
     def run(self):
         raise NotImplementedError
 
+    def release(self):
+        """Indica que la distribución terminó de procesarse, se haya
+        generado o no, para liberar lo que comparte con otras."""
+        pass
+
+
+class SessionCSVReader(CSVReader):
+    """CSVReader que descarga la distribución en streaming a través de una
+    sesión HTTP compartida.
+
+    El contenido descargado se guarda en un archivo temporal que sólo se
+    mantiene en memoria mientras es chico, y se parsea por bloques de filas
+    sobre arrays reservados de antemano. Las series se leen con el tipo de
+    datos que indica su field (ver FIELD_DTYPES) y el índice de tiempo con
+    el formato que corresponde a la frecuencia de la distribución; si alguna
+    columna no está documentada como numérica o no se puede leer así, se lee
+    el archivo como lo hace CSVReader.
+    """
+
+    def __init__(self, distribution, session=None, verify_ssl=False,
+                 file_source=None):
+        super().__init__(distribution, verify_ssl=verify_ssl,
+                         file_source=file_source)
+        self.session = session
+
+    def read_distribution(self):
+        if self.file_source or not self.session:
+            return super().read_distribution()
+
+        # no se pasa verify: se usa el de la sesión (ver
+        # SessionPool.get_session())
+        buffer = tempfile.SpooledTemporaryFile(max_size=CSV_SPOOL_SIZE)
+        response = self.session.get(
+            self.distribution["downloadURL"], stream=True)
+
+        with response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                buffer.write(chunk)
+
+        buffer.seek(io.SEEK_SET)
+        return buffer
+
+    def read_csv(self, buffer, encoding):
+        try:
+            return self.read_csv_with_time_format(buffer, encoding)
+        except UnicodeDecodeError:
+            raise
+        except Exception as e:
+            logging.debug(
+                f'No se pudo leer la distribución con los tipos de datos de '
+                f'sus fields: {repr(e)}')
+
+        buffer.seek(io.SEEK_SET)
+        return super().read_csv(buffer, encoding)
+
+    def get_time_index_format(self):
+        """Devuelve el formato de las fechas del índice de tiempo: sólo la
+        fecha para frecuencias de un día o mayores, o None para inferirlo si
+        la frecuencia es menor a un día (p. ej. 'R/PT1H')."""
+        frequency = get_distribution_time_index_frequency(self.distribution)
+        if not frequency or "T" in frequency:
+            return None
+
+        return TIME_INDEX_FORMAT
+
+    def get_series_dtypes(self):
+        """Devuelve el tipo de datos de cada serie documentada como numérica
+        en su field."""
+        time_index = get_distribution_time_index(self.distribution)
+
+        return {
+            field["title"]: FIELD_DTYPES[field["type"]]
+            for field in self.distribution.get("field", [])
+            if field.get("title") != time_index and
+            field.get("type") in FIELD_DTYPES
+        }
+
+    def read_csv_with_time_format(self, buffer, encoding):
+        time_index = get_distribution_time_index(self.distribution)
+        time_format = self.get_time_index_format()
+        dtypes = dict(self.get_series_dtypes(), **{time_index: str})
+
+        # cota de la cantidad de filas, para reservar los arrays de una vez
+        max_rows = count_lines(buffer)
+        buffer.seek(io.SEEK_SET)
+
+        chunks = pd.read_csv(buffer, dtype=dtypes, encoding=encoding,
+                             chunksize=CSV_CHUNK_ROWS)
+        columns, index, values, rows = None, None, None, 0
+
+        # se cierra el lector explícitamente para que no cierre el buffer,
+        # que se vuelve a leer si falla esta lectura
+        try:
+            for chunk in chunks:
+                if columns is None:
+                    columns = [column for column in chunk.columns
+                               if column != time_index]
+                    for column in columns:
+                        if dtypes.get(column) is None:
+                            raise ValueError(
+                                f'{column} no está documentada como numérica')
+
+                dates = pd.to_datetime(
+                    chunk[time_index], format=time_format).values
+                if index is None:
+                    index = np.empty(max_rows, dtype=dates.dtype)
+                    values = np.empty(
+                        (max_rows, len(columns)), dtype=np.float64)
+
+                end = rows + len(chunk)
+                index[rows:end] = dates
+                values[rows:end] = chunk[columns].values
+                rows = end
+        finally:
+            chunks.close()
+
+        if index is None:
+            raise ValueError('La distribución no tiene filas')
+
+        return pd.DataFrame(
+            values[:rows],
+            index=pd.DatetimeIndex(index[:rows], name=time_index),
+            columns=columns,
+        )
+
+
+def count_lines(file_object):
+    """Cuenta los saltos de línea de un archivo binario, leyéndolo por
+    bloques."""
+    lines = 0
+    for block in iter(lambda: file_object.read(CHUNK_SIZE), b""):
+        lines += block.count(b"\n")
+
+    return lines
+
 
 class DirectDownloadProcessor(BaseProcessor):
 
-    def __init__(self, distribution_metadata, catalog_metadata):
+    def __init__(self, distribution_metadata, catalog_metadata,
+                 catalog_context=None):
         super().__init__(distribution_metadata)
 
         self.catalog_metadata = catalog_metadata
+        self.catalog_context = catalog_context or {}
+
+    def get_session(self):
+        return self.catalog_context.get('catalog', {}).get(
+            self.catalog_metadata.get('identifier'), {}).get('session')
 
     def run(self):
         valid_df, distribution_df = False, None
 
         try:
-            reader = CSVReader(self.distribution_metadata)
+            reader = SessionCSVReader(
+                self.distribution_metadata, session=self.get_session())
             valid_df, distribution_df = True, reader.read()
             logging.debug('>>> Descargó la distribución <<<')
         except Exception:
@@ -50,10 +221,30 @@ class DirectDownloadProcessor(BaseProcessor):
 
 class TXTProcessor(BaseProcessor):
 
-    def __init__(self, distribution_metadata, catalog_metadata):
+    def __init__(self, distribution_metadata, catalog_metadata,
+                 catalog_context=None):
         super().__init__(distribution_metadata)
 
         self.catalog_metadata = catalog_metadata
+        self.catalog_context = catalog_context or {}
+
+    def get_text_panel(self, file_source):
+        """Devuelve el archivo de texto fuente leído, leyéndolo sólo si
+        ninguna otra distribución del catálogo lo leyó con los mismos
+        parámetros."""
+        text_panels = self.catalog_context.get('catalog', {}).get(
+            self.catalog_metadata.get('identifier'), {}).get('text_panels')
+        if text_panels is None:
+            return TextPanel(file_source, self.distribution_metadata)
+
+        url_panels = text_panels.setdefault(
+            self.distribution_metadata.get('scrapingFileURL'), {})
+        key = get_text_panel_key(self.distribution_metadata)
+        if key not in url_panels:
+            url_panels[key] = TextPanel(
+                file_source, self.distribution_metadata)
+
+        return url_panels[key]
 
     def run(self):
         distribution_df = None
@@ -62,14 +253,26 @@ class TXTProcessor(BaseProcessor):
             CATALOGS_DIR_INPUT,
             self.catalog_metadata.get('identifier'),
             'sources',
-            self.distribution_metadata.get('scrapingFileURL').split('/')[-1]
+            get_source_file_name(
+                self.distribution_metadata.get('scrapingFileURL'))
         )
         try:
-            distribution_df = self.catalog_metadata.load_ts_distribution(
-                identifier=self.distribution_metadata.get('identifier'),
-                catalog_id=self.catalog_metadata.get('identifier'),
-                file_source=file_source
-            )
+            identifier = self.distribution_metadata.get('identifier')
+            catalog_id = self.catalog_metadata.get('identifier')
+
+            # ids de las series en el archivo original del publicador, sin
+            # el catalog_id que los vuelve únicos en la base completa
+            series = {
+                ts["id"].replace(catalog_id + "_", ""): ts["title"]
+                for ts in self.catalog_metadata.get_time_series(
+                    distribution_identifier=identifier)
+            }
+            frequency = \
+                self.catalog_metadata.get_distribution_time_index_frequency(
+                    self.distribution_metadata)
+
+            distribution_df = self.get_text_panel(
+                file_source).get_series_df(series, frequency)
 
             logging.debug('Descargó la distribución')
 
@@ -80,27 +283,6 @@ class TXTProcessor(BaseProcessor):
         return distribution_df
 
 
-XLSERIES_PARAMS = {
-    'alignment': 'vertical',
-    'composed_headers_coord': None,
-    'context': None,
-    'continuity': True,
-    'blank_rows': False,
-    'missings': True,
-    "missing_value": [
-        None, "", " ", "-", "--", "---", ".", "...", "/", "///",
-        "s.d.", "s.d", "s/d",
-        "n,d,", "n,d", "n.d.", "n.d", "n/d",
-        "s", "x"
-    ],
-    'time_alignment': 0,
-    'time_multicolumn': False,
-    "headers_coord": None,
-    "data_starts": None,
-    "frequency": None,
-    "time_header_coord": None,
-}
-
 PRESERVE_WB_OBJ = False
 
 
@@ -118,36 +300,46 @@ class SpreadsheetProcessor(BaseProcessor):
             CATALOGS_DIR_INPUT,
             self.catalog_metadata.get('identifier'),
             'sources',
-            self.distribution_metadata.get('scrapingFileURL').split('/')[-1]
+            get_source_file_name(
+                self.distribution_metadata.get('scrapingFileURL'))
         )
-        file_name = os.path.basename(file_source)
-
         try:
-            xl = self.catalog_context['catalog'][self.catalog_metadata.get('identifier')][
-                'xl'].get(file_name)
+            plan = self.get_scraping_plan(
+                self.distribution_metadata.get('identifier'))
 
-            distribution_params = self.gen_distribution_params(
-                self.catalog_metadata, self.distribution_metadata.get('identifier'))
+            url = self.distribution_metadata.get('scrapingFileURL')
             distrib_meta = self.catalog_metadata.get_distribution(
                 self.distribution_metadata.get('identifier'))
-            dataset_meta = self.catalog_metadata.get_dataset(
-                self.distribution_metadata.get('identifier').split(".")[0])
 
-            diccionario = self.scrape_dataframe(xl, **distribution_params)
+            parsed_sheets = self.catalog_context.get('parsed_sheets')
+            parsed_sheet_key = self.get_parsed_sheet_key(plan)
+            diccionario = None
+            if parsed_sheets and parsed_sheet_key:
+                diccionario = parsed_sheets.read(parsed_sheet_key)
+
+            if diccionario is not None:
+                logging.debug('Se usa la distribución scrapeada en una corrida anterior')
+            else:
+                workbook_key = self.get_catalog_context()['workbook_keys'][url]
+                xl = self.catalog_context['workbooks'].get(
+                    workbook_key, file_source,
+                    sheets=self.get_catalog_context().get('source_sheets', {}).get(url))
 
+                diccionario = self.extract_dataframe(xl, plan)
 
-            if isinstance(diccionario["df"], list):
-                diccionario["df"] = pd.concat(diccionario["df"], axis=1)
+                if isinstance(diccionario["df"], list):
+                    diccionario["df"] = pd.concat(diccionario["df"], axis=1)
 
-            # VALIDACIONES
-            worksheet = distribution_params["worksheet"]
-            headers_coord = distribution_params["headers_coord"]
-            headers_value = distribution_params["headers_value"]
+                # VALIDACIONES
+                validate_distribution_scraping(xl, plan.worksheet,
+                                               list(plan.headers_coord),
+                                               list(plan.headers_value),
+                                               distrib_meta)
 
-            validate_distribution_scraping(xl, worksheet, headers_coord, headers_value,
-                                           distrib_meta)
-            validate_distribution(diccionario["df"], self.catalog_metadata, dataset_meta, distrib_meta,
-                                  self.distribution_metadata.get('identifier'))
+                if parsed_sheets and parsed_sheet_key:
+                    parsed_sheets.write(parsed_sheet_key, diccionario)
+
+            # el DataFrame se valida una sola vez en Distribution.validate()
             return diccionario
 
         except Exception:
@@ -156,83 +348,257 @@ class SpreadsheetProcessor(BaseProcessor):
 
         return diccionario
 
-    def gen_distribution_params(self, catalog, distribution_identifier):
-        distribution = catalog.get_distribution(distribution_identifier)
-
-        fields = distribution["field"]
-        params = {}
-
-        # hoja de la Distribucion
-        params["worksheet"] = distribution["scrapingFileSheet"]
-
-        # coordenadas de los headers de las series
-        params["headers_coord"] = [
-            field["scrapingIdentifierCell"]
-            for field in fields
-            if not field.get("specialType")
-        ]
-
-        # coordenadas de los headers de las series
-        params["headers_value"] = [field["id"] for field in fields
-                                   if not field.get("specialType")]
-
-        # fila donde empiezan los datos
-        params["data_starts"] = list(map(
-            self.row_from_cell_coord,
-            [field["scrapingDataStartCell"] for field in fields
-             if not field.get("specialType")]))
-
-        # frecuencia de las series
-        field = catalog.get_field(distribution_identifier=distribution_identifier,
-                                  title="indice_tiempo")
-        params["frequency"] = self.freq_iso_to_xlseries(
-            field["specialTypeDetail"])
-
-        # coordenadas del header del indice de tiempo
-        params["time_header_coord"] = field["scrapingIdentifierCell"]
-
-        # nombres de las series
-        params["series_names"] = [
-            f["title"] for f in fields
-            if not f.get("specialType")
-        ]
-
-        return params
-
-    def scrape_dataframe(self, xl, worksheet, headers_coord, headers_value, data_starts,
-                         frequency, time_header_coord, series_names):
-        params = deepcopy(XLSERIES_PARAMS)
-        params["headers_coord"] = headers_coord
-        params["data_starts"] = data_starts
-        params["frequency"] = frequency
-        params["time_header_coord"] = time_header_coord
-        params["series_names"] = series_names
+    def get_catalog_context(self):
+        return self.catalog_context['catalog'][
+            self.catalog_metadata.get('identifier')]
+
+    def get_parsed_sheet_key(self, plan):
+        """Devuelve la clave de la distribución en el caché de distribuciones
+        scrapeadas, o None si su archivo fuente no está en el almacén."""
+        store = self.catalog_context.get('store')
+        source_hash = store.get_hash(
+            self.distribution_metadata.get('scrapingFileURL')) if store else None
+        if not source_hash:
+            return None
+
+        return get_parsed_sheet_key(source_hash, plan.key)
+
+    def get_scraping_plan(self, distribution_identifier):
+        """Devuelve el plan de scraping de una distribución del catálogo,
+        compilado de antemano por el catálogo (ver
+        Catalog.compile_scraping_plans()) o, si no, a partir de su
+        metadata."""
+        plans = self.get_catalog_context().get('scraping_plans', {})
+        if distribution_identifier in plans:
+            return plans[distribution_identifier]
+
+        return get_scraping_plan(
+            self.catalog_metadata.get_distribution(distribution_identifier))
+
+    def get_sheet_groups(self):
+        """Agrupa las distribuciones del catálogo que se pueden extraer en
+        una misma pasada sobre una hoja: las que comparten archivo, hoja,
+        índice de tiempo, frecuencia y fila de inicio de los datos.
+
+        Returns:
+            dict: Identificadores de las distribuciones de cada grupo.
+        """
+        catalog_context = self.get_catalog_context()
+
+        if 'sheet_groups' not in catalog_context:
+            groups = {}
+            for identifier in catalog_context.get(
+                    'catalog_time_series_distributions_identifiers', []):
+                distribution = self.catalog_metadata.get_distribution(
+                    identifier)
+                url = distribution.get('scrapingFileURL')
+                if distribution.get('downloadURL') or not url or \
+                        url.split('.')[-1].lower() not in ['xls', 'xlsx']:
+                    continue
+
+                try:
+                    plan = self.get_scraping_plan(identifier)
+                except Exception:
+                    continue
+
+                groups.setdefault(
+                    plan.get_sheet_group_key(url), []
+                ).append(identifier)
+
+            catalog_context['sheet_groups'] = groups
+
+        return catalog_context['sheet_groups']
+
+    def extract_dataframe(self, xl, plan):
+        """Extrae las series de la distribución.
+
+        Si otras distribuciones del catálogo comparten hoja e índice de
+        tiempo (ver get_sheet_groups()), se extraen las series de todas en
+        una sola pasada sobre la hoja, que se reutiliza para el resto de las
+        distribuciones del grupo. Si la extracción conjunta falla, cada
+        distribución se extrae por separado.
+
+        Args:
+            xl (XlSeries): Excel fuente.
+            plan (ScrapingPlan): Plan de scraping de la distribución.
+
+        Returns:
+            dict: DataFrame de la distribución ('df') y filas de fin de la
+                tabla ('table_end') y del índice de tiempo ('end').
+        """
+        identifier = self.distribution_metadata.get('identifier')
+        key = plan.get_sheet_group_key(
+            self.distribution_metadata.get('scrapingFileURL'))
+        identifiers = self.get_sheet_groups().get(key, [identifier])
+
+        if len(identifiers) < 2 or identifier not in identifiers:
+            return self.scrape_dataframe(xl, plan)
+
+        extractions = self.get_catalog_context().setdefault(
+            'sheet_extractions', {})
+        if key in extractions:
+            result = extractions[key]
+        else:
+            result = self.scrape_sheet_group(xl, identifiers)
+            # se conserva hasta que terminan las demás distribuciones del
+            # grupo (ver release())
+            if self.get_sheet_group_pending(key) - {identifier}:
+                extractions[key] = result
+
+        diccionario = self.split_sheet_group_result(result, plan)
+        if diccionario is None:
+            return self.scrape_dataframe(xl, plan)
+
+        return diccionario
+
+    def get_sheet_group_pending(self, key):
+        """Devuelve las distribuciones de un grupo (ver get_sheet_groups())
+        que todavía no terminaron, o None si la clave no es de un grupo."""
+        identifiers = self.get_sheet_groups().get(key, [])
+        if len(identifiers) < 2:
+            return None
+
+        return self.get_catalog_context().setdefault(
+            'sheet_group_pending', {}).setdefault(key, set(identifiers))
+
+    def release(self):
+        """Descuenta la distribución de las pendientes de su grupo, aunque
+        no se haya extraído (p. ej. si no cambió o estaba en el caché).
+        Cuando terminan todas, se descarta la extracción conjunta de la
+        hoja."""
+        identifier = self.distribution_metadata.get('identifier')
+        try:
+            key = self.get_scraping_plan(identifier).get_sheet_group_key(
+                self.distribution_metadata.get('scrapingFileURL'))
+        except Exception:
+            return
+
+        pending = self.get_sheet_group_pending(key)
+        if pending is None:
+            return
+
+        pending.discard(identifier)
+        if not pending:
+            self.get_catalog_context().get('sheet_extractions', {}).pop(
+                key, None)
+
+    def scrape_sheet_group(self, xl, identifiers):
+        """Extrae en una sola pasada las series de un grupo de
+        distribuciones, nombradas por su id.
+
+        Returns:
+            dict: Resultado de scrape_dataframe(), o None si no se pudo
+                extraer el grupo.
+        """
+        group_plan = combine_scraping_plans([
+            self.get_scraping_plan(identifier) for identifier in identifiers
+        ])
+
+        if len(set(group_plan.series_names)) != len(group_plan.series_names):
+            return None
+
+        logging.debug(
+            f'Extrayendo {len(identifiers)} distribuciones de la hoja '
+            f'{group_plan.worksheet}')
+        try:
+            diccionario = self.scrape_dataframe(xl, group_plan)
+        except Exception as e:
+            logging.debug(f'Falló la extracción conjunta: {repr(e)}')
+            return None
+
+        if isinstance(diccionario["df"], list):
+            diccionario["df"] = pd.concat(diccionario["df"], axis=1)
+
+        return diccionario
+
+    def split_sheet_group_result(self, diccionario, plan):
+        if diccionario is None:
+            return None
+
+        headers_value = list(plan.headers_value)
+        if not set(headers_value).issubset(diccionario["df"].columns):
+            return None
+
+        df = diccionario["df"][headers_value].copy()
+        df.columns = list(plan.series_names)
+
+        return {
+            "df": df,
+            "table_end": diccionario["table_end"],
+            "end": diccionario["end"],
+        }
+
+    def scrape_dataframe(self, xl, plan):
+        """Extrae las series de un plan de scraping, leyendo el índice de
+        tiempo como compuesto o no según lo recordado en corridas anteriores
+        (ver get_time_composed_key()) o la primera fecha de la hoja. Lo que
+        se determine se recuerda para las siguientes."""
+        worksheet = plan.worksheet
+        time_composed_key = self.get_time_composed_key(
+            worksheet, plan.time_header_coord)
+        time_composed = self.get_catalog_context().get(
+            'time_composed', {}).get(time_composed_key)
+        if time_composed is None and self.time_values_are_parsed(
+                xl, worksheet, plan.time_header_coord, plan.data_starts):
+            time_composed = False
+
+        not_composed_error = None
+        if time_composed is False:
+            try:
+                diccionario = xl.get_data_frames(plan.to_xlseries_params(False), ws_name=worksheet,
+                                                 preserve_wb_obj=PRESERVE_WB_OBJ, dict_mode=True)
+            except Exception as e:
+                logging.debug('Falló el índice de tiempo no compuesto, se prueba como compuesto')
+                not_composed_error = e
+            else:
+                self.set_time_composed(time_composed_key, False)
+                return diccionario
 
         try:
-            params["time_composed"] = True
+            time_composed = True
 
-            diccionario = xl.get_data_frames(deepcopy(params), ws_name=worksheet,
+            diccionario = xl.get_data_frames(plan.to_xlseries_params(True), ws_name=worksheet,
                                      preserve_wb_obj=PRESERVE_WB_OBJ, dict_mode=True)
         except TimeIsNotComposed:
-            params["time_composed"] = False
-            diccionario = xl.get_data_frames(deepcopy(params), ws_name=worksheet,
+            # ya se intentó leer como no compuesto: el error es el de ese
+            # intento
+            if not_composed_error is not None:
+                raise not_composed_error
+
+            time_composed = False
+            diccionario = xl.get_data_frames(plan.to_xlseries_params(False), ws_name=worksheet,
                                      preserve_wb_obj=PRESERVE_WB_OBJ,dict_mode=True)
 
-        return diccionario
+        self.set_time_composed(time_composed_key, time_composed)
 
-    def row_from_cell_coord(self, coord):
-        match = re.match(r'^[A-Za-z]+(\d+)$', coord)
-        if not match:
-            raise ValueError('Invalid coordinate')
+        return diccionario
 
-        return int(match.group(1))
+    def set_time_composed(self, time_composed_key, time_composed):
+        """Recuerda si un índice de tiempo es compuesto, para las
+        distribuciones y corridas siguientes."""
+        self.get_catalog_context().setdefault('time_composed', {})[
+            time_composed_key] = time_composed
+
+    def get_time_composed_key(self, worksheet, time_header_coord):
+        """Devuelve la clave con la que se recuerda si un índice de tiempo es
+        compuesto: el contenido del archivo fuente (o su URL, si no está en
+        el almacén), la hoja y la celda del header del índice."""
+        url = self.distribution_metadata.get('scrapingFileURL')
+        store = self.catalog_context.get('store')
+        source = (store.get_hash(url) if store else None) or url
+
+        return f'{source}|{worksheet}|{time_header_coord}'
+
+    def time_values_are_parsed(self, xl, worksheet, time_header_coord,
+                               data_starts):
+        """Indica si la primera celda del índice de tiempo ya tiene una
+        fecha. En ese caso el índice no es compuesto, y XlSeries lanzaría
+        TimeIsNotComposed al leerlo como compuesto."""
+        try:
+            ws = xl.wb[XlSeries._sanitize_ws_name(worksheet, xl.wb.sheetnames)]
+            column = re.match(r'^([A-Za-z]+)\d+$', time_header_coord).group(1)
+            value = ws[f'{column}{data_starts[0]}'].value
+        except Exception:
+            return False
 
-    def freq_iso_to_xlseries(self, freq_iso8601):
-        frequencies_map = {
-            "R/P1Y": "Y",
-            "R/P6M": "S",
-            "R/P3M": "Q",
-            "R/P1M": "M",
-            "R/P1D": "D"
-        }
-        return frequencies_map[freq_iso8601]
+        return isinstance(value, (datetime.datetime, arrow.Arrow))
@@ -0,0 +1,256 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import threading
+import uuid
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from series_tiempo_ar_scraping.download import (
+    METADATA_SUFFIX,
+    get_metadata_path,
+)
+from series_tiempo_ar_scraping.utils import write_atomically
+
+URL_HASH_LENGTH = 8
+
+LOCK_SUFFIX = ".lock"
+# registro de la corrida que descargó cada URL por última vez
+RUN_SUFFIX = ".run.json"
+
+
+def get_url_hash(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def get_source_file_name(url):
+    """Devuelve el nombre con el que se guarda un archivo fuente en el
+    directorio 'sources' de un catálogo.
+
+    El nombre incluye un hash de la URL, para que dos archivos con el mismo
+    nombre publicados en URLs distintas no se sobrescriban entre sí.
+
+    Args:
+        url (str): URL del archivo fuente ('scrapingFileURL').
+
+    Returns:
+        str: Nombre del archivo, con la forma '<hash>_<nombre original>'.
+    """
+    return "{}_{}".format(
+        get_url_hash(url)[:URL_HASH_LENGTH], url.split('/')[-1])
+
+
+def link_or_copy(source_path, file_path):
+    """Crea file_path como hardlink de source_path, reemplazando
+    atómicamente cualquier archivo existente. Si no es posible crear el
+    hardlink (por ejemplo, si están en distintos filesystems), copia el
+    archivo."""
+    path = pathlib.Path(file_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.parent / ".{}.{}.link".format(
+        path.name, uuid.uuid4().hex[:8])
+
+    try:
+        os.link(str(source_path), str(temp_path))
+    except OSError:
+        shutil.copy2(str(source_path), str(temp_path))
+
+    try:
+        os.replace(str(temp_path), str(path))
+    except BaseException:
+        temp_path.unlink()
+        raise
+
+
+class SourceStore:
+    """Almacén de archivos fuente compartido por todos los catálogos.
+
+    Cada URL se descarga una única vez por corrida en 'urls/<hash de URL>'
+    (junto a sus metadatos de descarga, lo que permite revalidarla en
+    corridas siguientes) y su contenido se registra en
+    'objects/<hash de contenido>'. Los archivos de los directorios 'sources'
+    de cada catálogo son hardlinks a estos objetos, por lo que un mismo
+    contenido se guarda una sola vez en disco (o copias, si el filesystem no
+    permite crear hardlinks).
+
+    Varios procesos de una misma corrida (ver ETL.process_in_parallel())
+    pueden compartir el almacén: cada uno crea su propio SourceStore con el
+    mismo run_id, y las descargas de cada URL se sincronizan con un lock de
+    archivo.
+
+    Args:
+        store_dir (str): Directorio raíz del almacén.
+        run_id (str): Identificador de la corrida. Si no se indica, se
+            genera uno nuevo.
+    """
+
+    def __init__(self, store_dir, run_id=None):
+        self.store_dir = pathlib.Path(store_dir)
+        self.run_id = run_id or uuid.uuid4().hex
+        self._downloads = {}
+        self._lock = threading.Lock()
+
+    def get_url_path(self, url):
+        return self.store_dir / "urls" / get_url_hash(url)
+
+    def get_run_path(self, url):
+        url_path = self.get_url_path(url)
+        return url_path.parent / (url_path.name + RUN_SUFFIX)
+
+    @contextmanager
+    def lock_url(self, url):
+        """Bloquea la descarga de una URL para el resto de los procesos que
+        usan el almacén."""
+        url_path = self.get_url_path(url)
+        url_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with open(str(url_path.parent / (url_path.name + LOCK_SUFFIX)),
+                  "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def get_run_result(self, url):
+        """Devuelve el resultado de la descarga de una URL si ya se hizo en
+        esta corrida, en este u otro proceso, o None."""
+        try:
+            with self.get_run_path(url).open(encoding="utf-8") as f:
+                run = json.load(f)
+        except (IOError, ValueError):
+            return None
+
+        if run.get("run_id") != self.run_id:
+            return None
+
+        return run.get("result")
+
+    def set_run_result(self, url, result):
+        write_atomically(
+            self.get_run_path(url),
+            [json.dumps({"run_id": self.run_id, "result": result})
+             .encode("utf-8")]
+        )
+
+    def get_object_path(self, sha256):
+        return self.store_dir / "objects" / sha256[:2] / sha256
+
+    def get_hash(self, url):
+        """Devuelve el hash SHA-256 del último contenido descargado de una
+        URL, o None si nunca se descargó."""
+        metadata_path = get_metadata_path(self.get_url_path(url))
+
+        try:
+            with metadata_path.open(encoding="utf-8") as f:
+                return json.load(f).get("sha256")
+        except (IOError, ValueError):
+            return None
+
+    def fetch(self, url, download_function):
+        """Descarga una URL en el almacén, si todavía no se descargó en esta
+        corrida, y registra su contenido.
+
+        Si otro catálogo ya pidió la misma URL, espera a que termine esa
+        descarga y devuelve su resultado, aunque se haya hecho en otro
+        proceso.
+
+        Args:
+            url (str): URL a descargar.
+            download_function (callable): Función que recibe url y file_path
+                y realiza la descarga.
+
+        Returns:
+            El resultado de download_function.
+        """
+        with self._lock:
+            future = self._downloads.get(url)
+            is_owner = future is None
+            if is_owner:
+                future = Future()
+                self._downloads[url] = future
+
+        if not is_owner:
+            logging.debug('Reutilizando descarga de {}'.format(url))
+            return future.result()
+
+        try:
+            with self.lock_url(url):
+                result = self.get_run_result(url)
+                if result is None:
+                    result = download_function(
+                        url, str(self.get_url_path(url)))
+                    self.add_object(url)
+                    self.set_run_result(url, result)
+                else:
+                    logging.debug(
+                        'Reutilizando descarga de {}'.format(url))
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+
+        future.set_result(result)
+        return result
+
+    def add_object(self, url):
+        url_path = self.get_url_path(url)
+        sha256 = self.get_hash(url)
+        if not sha256 or not url_path.is_file():
+            return
+
+        object_path = self.get_object_path(sha256)
+        if not object_path.is_file():
+            link_or_copy(url_path, object_path)
+
+    def link(self, url, file_path):
+        """Publica el contenido de una URL en file_path.
+
+        Returns:
+            bool: True si la URL tiene un contenido descargado para publicar.
+        """
+        sha256 = self.get_hash(url)
+        if not sha256 or not self.get_object_path(sha256).is_file():
+            return False
+
+        link_or_copy(self.get_object_path(sha256), file_path)
+        return True
+
+    def get_referenced_hashes(self):
+        """Devuelve los hashes de contenido de la última descarga de cada
+        URL del almacén."""
+        hashes = set()
+
+        for metadata_path in (self.store_dir / "urls").glob(
+                "*" + METADATA_SUFFIX):
+            try:
+                with metadata_path.open(encoding="utf-8") as f:
+                    sha256 = json.load(f).get("sha256")
+            except (IOError, ValueError):
+                continue
+            if sha256:
+                hashes.add(sha256)
+
+        return hashes
+
+    def prune(self):
+        """Elimina los objetos que ya no corresponden a la última descarga de
+        ninguna URL.
+
+        Las referencias se leen de los metadatos de descarga de cada URL, y
+        no de la cantidad de hardlinks de cada objeto, porque los objetos
+        pueden ser copias (ver link_or_copy()). Los archivos de los
+        directorios 'sources' de los catálogos son hardlinks o copias, por
+        lo que no se ven afectados.
+        """
+        objects_dir = self.store_dir / "objects"
+        if not objects_dir.is_dir():
+            return
+
+        referenced = self.get_referenced_hashes()
+        for object_path in objects_dir.glob("*/*"):
+            if object_path.is_file() and object_path.name not in referenced:
+                object_path.unlink()
@@ -0,0 +1,87 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from series_tiempo_ar.readers.text_file_reader import (
+    _get_fields,
+    get_series_df_from_panel,
+)
+
+
+def get_text_panel_key(distribution):
+    """Devuelve los parámetros de lectura de un archivo de texto fuente:
+    las distribuciones con los mismos parámetros comparten el panel leído."""
+    return (
+        distribution["scrapingFileSeparator"],
+        distribution["scrapingFileEncoding"],
+        distribution["scrapingFileTimeFormat"],
+        str(distribution["scrapingFileTimeField"]),
+        str(distribution["scrapingFileIdsField"]),
+        str(distribution["scrapingFileValuesField"]),
+    )
+
+
+class TextPanel:
+    """Archivo de texto fuente leído una sola vez para todas las
+    distribuciones que lo usan.
+
+    El archivo es un panel con una fila por observación (id de serie, fecha
+    y valor). Se lee y se parsean sus fechas una única vez, y se indexan las
+    filas de cada serie para que cada distribución tome sólo las suyas (ver
+    get_series_df()).
+
+    Args:
+        file_path (str): Path del archivo de texto.
+        distribution (dict): Metadata de una distribución que usa el
+            archivo, con sus parámetros de lectura.
+    """
+
+    def __init__(self, file_path, distribution):
+        self.time_format = distribution["scrapingFileTimeFormat"]
+        self.fields = _get_fields(
+            distribution["scrapingFileTimeField"],
+            distribution["scrapingFileIdsField"],
+            distribution["scrapingFileValuesField"],
+        )
+
+        logging.debug(f'Leyendo {file_path}')
+        self.df_panel = pd.read_csv(
+            file_path,
+            sep=distribution["scrapingFileSeparator"],
+            names=self.fields["default_names"]
+            if self.fields["ordinal"] else None,
+            encoding=distribution["scrapingFileEncoding"],
+            converters={self.fields["series_id_field"]: str},
+        )
+        time_field = self.fields["time_field"]
+        self.df_panel[time_field] = pd.to_datetime(
+            self.df_panel[time_field], format=self.time_format)
+
+        self.rows = self.df_panel.groupby(
+            self.fields["series_id_field"], sort=False).indices
+
+    def get_series_df(self, series, frequency):
+        """Arma la distribución de series de tiempo de algunas series del
+        panel.
+
+        Args:
+            series (dict): Títulos de las series, por id en el archivo.
+            frequency (str): Frecuencia de las series en ISO 8601.
+
+        Returns:
+            pandas.DataFrame: Series de la distribución.
+        """
+        rows = [self.rows[series_id] for series_id in series
+                if series_id in self.rows]
+        rows = np.sort(np.concatenate(rows)) if rows else []
+
+        return get_series_df_from_panel(
+            self.df_panel.take(rows),
+            series,
+            frequency,
+            time_format=self.time_format,
+            time_field=self.fields["time_field"],
+            series_id_field=self.fields["series_id_field"],
+            values_field=self.fields["values_field"],
+        )
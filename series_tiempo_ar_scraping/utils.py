@@ -0,0 +1,150 @@
+import hashlib
+import os
+import pathlib
+import uuid
+import zipfile
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# resultado de escribir un archivo de salida
+WRITTEN = "written"
+UNCHANGED = "unchanged"
+
+# partes de un .xlsx que cambian en cada escritura aunque no cambie el
+# contenido (fechas de creación y modificación)
+XLSX_VOLATILE_PARTS = ("docProps/core.xml",)
+
+
+def get_file_hash(file_path):
+    """Calcula el hash SHA-256 del contenido de un archivo."""
+    file_hash = hashlib.sha256()
+
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+def files_are_equal(file_path, other_path):
+    """Compara el contenido de dos archivos, por tamaño y hash."""
+    return os.path.getsize(file_path) == os.path.getsize(other_path) and \
+        get_file_hash(file_path) == get_file_hash(other_path)
+
+
+def xlsx_files_are_equal(file_path, other_path):
+    """Compara el contenido de dos .xlsx, sin tener en cuenta las fechas que
+    se registran al escribirlos."""
+    try:
+        with zipfile.ZipFile(file_path) as xlsx, \
+                zipfile.ZipFile(other_path) as other_xlsx:
+            names = sorted(set(xlsx.namelist()) - set(XLSX_VOLATILE_PARTS))
+            other_names = sorted(
+                set(other_xlsx.namelist()) - set(XLSX_VOLATILE_PARTS))
+
+            return names == other_names and all(
+                xlsx.read(name) == other_xlsx.read(name) for name in names)
+    except zipfile.BadZipFile:
+        return files_are_equal(file_path, other_path)
+
+
+def get_temp_path(file_path):
+    """Devuelve un path temporal en el directorio de file_path, con su misma
+    extensión."""
+    path = pathlib.Path(file_path)
+    return path.parent / ".{}.{}".format(uuid.uuid4().hex[:8], path.name)
+
+
+def replace_if_changed(temp_path, file_path, same_content=files_are_equal):
+    """Reemplaza file_path por temp_path si su contenido es distinto; si no,
+    elimina temp_path y file_path queda intacto.
+
+    Returns:
+        str: WRITTEN si se reemplazó el archivo, o UNCHANGED.
+    """
+    if os.path.exists(file_path) and \
+            same_content(str(temp_path), str(file_path)):
+        os.remove(str(temp_path))
+        return UNCHANGED
+
+    os.replace(str(temp_path), str(file_path))
+    return WRITTEN
+
+
+def render_if_changed(file_path, render, same_content=files_are_equal):
+    """Genera un archivo con una función que escribe en un path, y sólo lo
+    publica en file_path si cambió su contenido (ver replace_if_changed()).
+
+    Args:
+        file_path (str): Path del archivo.
+        render (callable): Función que recibe un path y escribe el archivo.
+        same_content (callable): Función que compara dos archivos.
+
+    Returns:
+        str: WRITTEN o UNCHANGED.
+    """
+    temp_path = get_temp_path(file_path)
+    temp_path.parent.mkdir(parents=True, exist_ok=True)
+
+    try:
+        render(str(temp_path))
+        return replace_if_changed(temp_path, file_path, same_content)
+    except BaseException:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+
+
+def write_if_changed(file_path, chunks):
+    """Escribe una secuencia de bloques de bytes como write_atomically(),
+    pero deja intacto file_path si ya tiene ese contenido.
+
+    Returns:
+        str: WRITTEN o UNCHANGED.
+    """
+    return render_if_changed(
+        file_path, lambda temp_path: write_atomically(temp_path, chunks))
+
+
+def write_atomically(file_path, chunks):
+    """Escribe una secuencia de bloques de bytes en un archivo temporal del
+    directorio destino y luego lo renombra atómicamente a file_path.
+
+    Si la escritura falla o se interrumpe, el archivo temporal se elimina y
+    file_path conserva su contenido anterior.
+
+    Args:
+        file_path (str): Path del archivo a escribir.
+        chunks (iterable): Bloques de bytes a escribir.
+
+    Returns:
+        tuple: Tamaño en bytes y hash SHA-256 del contenido escrito.
+    """
+    path = pathlib.Path(file_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.parent / ".{}.{}.part".format(
+        path.name, uuid.uuid4().hex[:8])
+
+    file_hash = hashlib.sha256()
+    size = 0
+
+    try:
+        with temp_path.open("xb") as f:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                f.write(chunk)
+                file_hash.update(chunk)
+                size += len(chunk)
+
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(str(temp_path), str(path))
+
+    except BaseException:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+
+    return size, file_hash.hexdigest()
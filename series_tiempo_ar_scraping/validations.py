@@ -0,0 +1,300 @@
+import re
+import string
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+from series_tiempo_ar import custom_exceptions as ce
+from series_tiempo_ar.helpers import freq_iso_to_pandas
+from series_tiempo_ar.validations.csv_validations import (
+    MINIMUM_VALUES,
+    MAX_MISSING_PROPORTION,
+    MAX_TOO_SMALL_PROPORTION,
+    MAX_FIELD_TITLE_LEN,
+    MAX_NULL_SERIES_PROPORTION,
+)
+
+VALID_FIELD_TITLE_CHARS = "abcdefghijklmnopqrstuvwxyz0123456789_"
+VALID_FIELD_ID_CHARS = string.ascii_letters + string.digits + "_-."
+
+INVALID_FIELD_TITLE_CHAR = re.compile(
+    "[^{}]".format(re.escape(VALID_FIELD_TITLE_CHARS)))
+INVALID_FIELD_ID_CHAR = re.compile(
+    "[^{}]".format(re.escape(VALID_FIELD_ID_CHARS)))
+
+
+def _get_series_fields(distrib_meta):
+    return [
+        field for field in distrib_meta["field"]
+        if field.get("specialType") != "time_index"
+    ]
+
+
+def _get_repeated(values):
+    seen, repeated = set(), []
+    for value in values:
+        if value in seen:
+            repeated.append(value)
+        seen.add(value)
+
+    return repeated
+
+
+class DistributionValidator:
+    """Valida los DataFrames de las distribuciones de un catálogo.
+
+    Aplica las validaciones de series_tiempo_ar (mismos umbrales, errores y
+    orden) en una única pasada por distribución: los conteos de valores de
+    todas las series se calculan juntos sobre un array de NumPy, y los ids
+    de fields del catálogo se indexan una sola vez.
+
+    Args:
+        catalog (TimeSeriesDataJson): Metadata del catálogo.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._field_ids = self._get_field_ids()
+
+    def _get_field_ids(self):
+        field_ids = {}
+
+        for dataset in self.catalog["dataset"]:
+            for distribution in dataset["distribution"]:
+                for field in distribution.get("field", []):
+                    if field["title"] != "indice_tiempo" and "id" in field:
+                        field_ids.setdefault(field["id"], set()).add(
+                            distribution["identifier"])
+
+        return field_ids
+
+    def validate(self, df, distrib_meta):
+        """Valida el DataFrame de una distribución.
+
+        Args:
+            df (pandas.DataFrame): Series de la distribución.
+            distrib_meta (dict): Metadata de la distribución.
+
+        Returns:
+            tuple: Resultado de la validación (dict con 'status', tamaño y
+                fechas de la distribución, 'errors' y 'warnings') y errores
+                encontrados (TimeSeriesError). Como en series_tiempo_ar, las
+                validaciones se detienen en el primer error.
+        """
+        counts = pd.notna(df.values).sum(axis=0) if len(df.columns) \
+            else np.zeros(0, dtype=int)
+
+        checks = [
+            ('df_shape', self.check_df_shape),
+            ('null_series_amount', self.check_null_series_amount),
+            ('field_descriptions', self.check_field_descriptions),
+            ('field_few_values', self.check_field_few_values),
+            ('field_id', self.check_field_id),
+            ('field_title', self.check_field_title),
+            ('missing_fields', self.check_missing_fields),
+            ('missing_values', self.check_missing_values),
+            ('no_repeated_descriptions', self.check_no_repeated_descriptions),
+            ('no_repeated_fields', self.check_no_repeated_fields),
+            ('no_repeated_fields_in_distribution',
+             self.check_no_repeated_fields_in_distribution),
+            ('no_repeated_titles', self.check_no_repeated_titles),
+            ('title_length', self.check_title_length),
+            ('values_are_numeric', self.check_values_are_numeric),
+        ]
+
+        errors, result_errors = [], []
+        for name, check in checks:
+            error = check(df, distrib_meta, counts)
+            if error:
+                errors.append(error)
+                result_errors.append({'check': name, 'message': str(error)})
+                break
+
+        result = {
+            'status': 'ERROR' if errors else 'OK',
+            'rows': len(df),
+            'series': len(df.columns),
+            'start': str(df.index[0]) if len(df) else None,
+            'end': str(df.index[-1]) if len(df) else None,
+            'errors': result_errors,
+            'warnings': [] if errors else self.get_warnings(df, counts),
+        }
+
+        return result, errors
+
+    def get_warnings(self, df, counts):
+        """Detecta series vacías o constantes, que no invalidan la
+        distribución."""
+        warnings = []
+        if not len(df):
+            return warnings
+
+        for position in np.flatnonzero(counts == 0):
+            warnings.append({
+                'check': 'empty_series',
+                'message': f'{df.columns[position]} no tiene valores',
+            })
+
+        numeric = df.select_dtypes(include='number')
+        if len(numeric.columns):
+            values = numeric.values.astype(float)
+            # sólo se comparan las series con más de un valor
+            positions = np.flatnonzero(pd.notna(values).sum(axis=0) > 1)
+            values = values[:, positions]
+            constant = np.nanmax(values, axis=0) == np.nanmin(values, axis=0)
+            for position in positions[constant]:
+                warnings.append({
+                    'check': 'constant_series',
+                    'message': f'{numeric.columns[position]} es constante',
+                })
+
+        return warnings
+
+    def check_df_shape(self, df, distrib_meta, counts):
+        """Verifica que el índice de tiempo sea creciente y continuo para la
+        frecuencia de la distribución."""
+        periodicity = None
+        for field in distrib_meta["field"]:
+            if field.get("specialType") == "time_index":
+                periodicity = field.get("specialTypeDetail")
+
+        if not len(df):
+            return ce.TimeSeriesError(
+                f'La distribución {distrib_meta["identifier"]} no tiene valores')
+
+        freq = freq_iso_to_pandas(periodicity)
+        is_monotonic = df.index.is_monotonic_increasing and \
+            df.index.is_unique
+
+        time_index_size = len(
+            pd.date_range(df.index[0], df.index[-1], freq=freq))
+        if is_monotonic and time_index_size == len(df):
+            return None
+
+        if is_monotonic and freq == "D" and len(
+                pd.date_range(df.index[0], df.index[-1], freq="B")) == len(df):
+            return None
+
+        return ce.DistributionBadDataError(
+            distrib_meta["identifier"],
+            df.index[0],
+            df.index[-1],
+            periodicity,
+            time_index_size,
+            len(df),
+        )
+
+    def check_null_series_amount(self, df, distrib_meta, counts):
+        if not len(counts):
+            return None
+
+        null_proportion = float((counts == 0).sum()) / len(counts)
+        if null_proportion >= MAX_NULL_SERIES_PROPORTION:
+            return ce.DistributionTooManyNullSeriesError(
+                distrib_meta["identifier"], MAX_NULL_SERIES_PROPORTION,
+                null_proportion)
+
+    def check_field_descriptions(self, df, distrib_meta, counts):
+        for field in _get_series_fields(distrib_meta):
+            if "description" not in field:
+                return ce.NonExistentDescriptionError(
+                    distrib_meta["identifier"])
+
+    def check_field_few_values(self, df, distrib_meta, counts):
+        if not len(counts):
+            return None
+
+        too_small = np.cumsum((counts > 0) & (counts < MINIMUM_VALUES))
+        exceeded = np.flatnonzero(
+            too_small / float(len(counts)) > MAX_TOO_SMALL_PROPORTION)
+        if len(exceeded):
+            position = exceeded[0]
+            return ce.FieldFewValuesError(
+                df.columns[position], int(counts[position]), MINIMUM_VALUES)
+
+    def check_field_id(self, df, distrib_meta, counts):
+        for field in distrib_meta["field"]:
+            if "id" not in field:
+                continue
+
+            match = INVALID_FIELD_ID_CHAR.search(field["id"])
+            if match:
+                return ce.InvalidFieldIdError(
+                    field["id"], match.group(), VALID_FIELD_ID_CHARS)
+
+    def check_field_title(self, df, distrib_meta, counts):
+        for field in df.columns:
+            if "unnamed" in field.lower():
+                return ce.InvalidFieldTitleError(field, is_unnamed=True)
+
+            match = INVALID_FIELD_TITLE_CHAR.search(field)
+            if match:
+                return ce.InvalidFieldTitleError(
+                    field, char=match.group(),
+                    valid_field_chars=VALID_FIELD_TITLE_CHARS)
+
+    def check_missing_fields(self, df, distrib_meta, counts):
+        for field in _get_series_fields(distrib_meta):
+            if field["title"] not in df:
+                return ce.FieldMissingInDistrbutionError(
+                    field["title"], distrib_meta["identifier"])
+
+    def check_missing_values(self, df, distrib_meta, counts):
+        if not len(df) or not len(counts):
+            return None
+
+        missing = len(df) - counts
+        exceeded = np.flatnonzero(
+            missing / float(len(df)) > MAX_MISSING_PROPORTION)
+        if len(exceeded):
+            position = exceeded[0]
+            return ce.FieldTooManyMissingsError(
+                df.columns[position], int(missing[position]),
+                int(counts[position]))
+
+    def check_no_repeated_descriptions(self, df, distrib_meta, counts):
+        repeated = _get_repeated(
+            field["description"] for field in distrib_meta["field"]
+            if "description" in field)
+        if repeated:
+            return ce.FieldDescriptionRepetitionError(
+                repeated_fields=repeated)
+
+    def check_no_repeated_fields(self, df, distrib_meta, counts):
+        """Verifica que los ids de los fields no se repitan en otras
+        distribuciones del catálogo."""
+        for field in distrib_meta["field"]:
+            distributions = self._field_ids.get(field.get("id"), set())
+            if "id" in field and distributions - {distrib_meta["identifier"]}:
+                return ce.FieldIdRepetitionError(field["id"])
+
+    def check_no_repeated_fields_in_distribution(self, df, distrib_meta,
+                                                 counts):
+        repeated = _get_repeated(
+            field["id"] for field in distrib_meta["field"] if field.get("id"))
+        if repeated:
+            return ce.FieldIdRepetitionError(repeated_fields=repeated[0])
+
+    def check_no_repeated_titles(self, df, distrib_meta, counts):
+        repeated = _get_repeated(
+            field["title"] for field in distrib_meta["field"])
+        if repeated:
+            return ce.FieldTitleRepetitionError(repeated_fields=repeated)
+
+    def check_title_length(self, df, distrib_meta, counts):
+        for field in df.columns:
+            if len(field) > MAX_FIELD_TITLE_LEN:
+                return ce.FieldTitleTooLongError(
+                    field, len(field), MAX_FIELD_TITLE_LEN)
+
+    def check_values_are_numeric(self, df, distrib_meta, counts):
+        """Verifica que las series documentadas con un tipo especial distinto
+        del índice de tiempo sean numéricas, como series_tiempo_ar."""
+        for field in distrib_meta["field"]:
+            if field.get("specialType", "time_index") == "time_index":
+                continue
+
+            title = field.get("title")
+            if title in df.columns and not is_numeric_dtype(df[title]):
+                return ce.InvalidNumericField(title, df[title])
@@ -0,0 +1,227 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import xlrd
+from openpyxl import Workbook, load_workbook
+from xlseries import XlSeries
+
+# estimación de la memoria que ocupa un Excel abierto con XlSeries, en
+# relación al tamaño del archivo (los .xlsx están comprimidos)
+WORKBOOK_MEMORY_FACTOR = 20
+
+MEGABYTE = 1024 * 1024
+
+
+def estimate_workbook_size(file_path):
+    return os.path.getsize(file_path) * WORKBOOK_MEMORY_FACTOR
+
+
+def resolve_sheet_names(sheets, sheet_names):
+    """Devuelve los nombres reales de las hojas pedidas, con la misma
+    tolerancia a diferencias que usa XlSeries al buscar una hoja."""
+    names = []
+
+    for sheet in sheets:
+        name = XlSeries._sanitize_ws_name(sheet, sheet_names)
+        if name in sheet_names and name not in names:
+            names.append(name)
+
+    return names
+
+
+def load_xlsx_sheets(file_path, sheets):
+    """Carga sólo los valores de algunas hojas de un .xlsx, leyéndolo en
+    modo de sólo lectura."""
+    source = load_workbook(file_path, read_only=True, data_only=True)
+
+    try:
+        wb = Workbook()
+        wb.remove(wb.active)
+
+        for name in resolve_sheet_names(sheets, source.sheetnames):
+            ws = wb.create_sheet(title=name)
+            max_row, max_column = 0, 0
+
+            # iter_rows(values_only=True) no existe en openpyxl 2.5
+            for row, cells in enumerate(
+                    source[name].iter_rows(min_row=1, min_col=1), start=1):
+                for column, cell in enumerate(cells, start=1):
+                    if cell.value is not None:
+                        ws.cell(row=row, column=column).value = cell.value
+                max_row, max_column = row, max(max_column, len(cells))
+
+            # conserva las dimensiones de la hoja original
+            if max_row and max_column:
+                ws.cell(row=max_row, column=max_column)
+    finally:
+        source.close()
+
+    return wb
+
+
+def load_xls_sheets(file_path, sheets):
+    """Carga sólo algunas hojas de un .xls, como lo hace XlSeries con el
+    archivo completo."""
+    source = xlrd.open_workbook(file_path, on_demand=True)
+
+    try:
+        wb = Workbook()
+        wb.remove(wb.active)
+
+        for name in resolve_sheet_names(sheets, source.sheet_names()):
+            source_ws = source.sheet_by_name(name)
+            ws = wb.create_sheet(title=name)
+
+            for row in range(source_ws.nrows):
+                for column in range(source_ws.ncols):
+                    ws.cell(row=row + 1, column=column + 1).value = \
+                        source_ws.cell_value(row, column)
+    finally:
+        source.release_resources()
+
+    return wb
+
+
+def open_workbook(file_path, sheets=None):
+    """Abre un Excel con XlSeries, cargando sólo las hojas indicadas.
+
+    XlSeries sólo usa los valores de las celdas, por lo que no se cargan
+    estilos ni las hojas que no se van a usar. Si no se indican hojas o no
+    se pueden cargar por separado, se carga el Excel completo.
+
+    Args:
+        file_path (str): Path del Excel.
+        sheets (list): Nombres de las hojas a cargar.
+
+    Returns:
+        XlSeries: Excel abierto.
+    """
+    loaders = {'xlsx': load_xlsx_sheets, 'xls': load_xls_sheets}
+    loader = loaders.get(file_path.split('.')[-1].lower())
+
+    if sheets and loader:
+        try:
+            return XlSeries(loader(file_path, sheets))
+        except Exception as e:
+            logging.warning(
+                f'No se pudieron cargar sólo las hojas de {file_path}, se '
+                f'carga completo: {repr(e)}')
+
+    return XlSeries(file_path)
+
+
+class WorkbookCache:
+    """Excels fuente abiertos con XlSeries durante una corrida.
+
+    Cada Excel se abre la primera vez que se pide (ver get()) y se libera
+    cuando terminan todas las distribuciones que lo usan (ver add_uses() y
+    release()), salvo que lo vaya a usar otro catálogo de la corrida. Si se indica un presupuesto de memoria, los Excels usados
+    menos recientemente se cierran cuando la memoria estimada de los Excels
+    abiertos lo supera; si se vuelven a pedir, se abren de nuevo.
+
+    Args:
+        max_size (int): Presupuesto de memoria en bytes, o None para no
+            limitar la cantidad de Excels abiertos.
+        open_function (callable): Función que recibe un path y las hojas a
+            cargar, y abre el Excel.
+    """
+
+    def __init__(self, max_size=None, open_function=open_workbook):
+        self.max_size = max_size
+        self.open_function = open_function
+        self._workbooks = OrderedDict()
+        self._sizes = {}
+        self._uses = {}
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return sum(self._sizes.values())
+
+    def __contains__(self, key):
+        return key in self._workbooks
+
+    def add_uses(self, key, count=1):
+        """Registra la cantidad de distribuciones que van a usar un Excel."""
+        with self._lock:
+            self._uses[key] = self._uses.get(key, 0) + count
+
+    def get(self, key, file_path, sheets=None):
+        """Devuelve un Excel abierto, abriéndolo si todavía no lo está.
+
+        Args:
+            key: Identificador del contenido del Excel y de las hojas
+                cargadas.
+            file_path (str): Path del Excel.
+            sheets (list): Hojas a cargar, o None para cargar todas.
+
+        Returns:
+            XlSeries: Excel abierto.
+        """
+        with self._lock:
+            if key in self._workbooks:
+                self._workbooks.move_to_end(key)
+                return self._workbooks[key]
+
+            logging.debug(f'Abriendo {file_path}')
+            workbook = self.open_function(file_path, sheets)
+            self._workbooks[key] = workbook
+            self._sizes[key] = estimate_workbook_size(file_path)
+            self._evict(keep=key)
+
+            return workbook
+
+    def release(self, key, keep=False):
+        """Indica que una distribución terminó de usar un Excel. Cuando lo
+        terminan de usar todas, se cierra, salvo que se indique conservarlo
+        (keep) para otro catálogo: en ese caso queda abierto hasta que se
+        cierra con discard() o para respetar el presupuesto de memoria."""
+        with self._lock:
+            if key not in self._uses:
+                return
+
+            self._uses[key] -= 1
+            if self._uses[key] <= 0:
+                del self._uses[key]
+                if not keep:
+                    self._discard(key)
+
+    def discard(self, key):
+        """Cierra un Excel conservado con release(), si no lo está usando
+        ninguna distribución."""
+        with self._lock:
+            if key not in self._uses:
+                self._discard(key)
+
+    def close_all(self):
+        """Cierra todos los Excels abiertos, conservando las distribuciones
+        que los van a usar: si se vuelven a pedir, se abren de nuevo."""
+        with self._lock:
+            self._workbooks.clear()
+            self._sizes.clear()
+
+    def clear(self):
+        with self._lock:
+            self._workbooks.clear()
+            self._sizes.clear()
+            self._uses.clear()
+
+    def _evict(self, keep):
+        if self.max_size is None:
+            return
+
+        while self.size > self.max_size and len(self._workbooks) > 1:
+            key = next(iter(self._workbooks))
+            if key == keep:
+                break
+
+            logging.debug(
+                f'Se cierra un Excel para respetar el límite de memoria '
+                f'({self.max_size // MEGABYTE} MB)')
+            self._discard(key)
+
+    def _discard(self, key):
+        self._workbooks.pop(key, None)
+        self._sizes.pop(key, None)
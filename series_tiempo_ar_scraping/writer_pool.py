@@ -0,0 +1,46 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WRITER_THREADS = 2
+DEFAULT_WRITER_QUEUE_SIZE = 8
+
+
+class WriterPool:
+    """Hilos que escriben los archivos de salida de las distribuciones en
+    segundo plano, mientras se procesan las siguientes.
+
+    La cantidad de escrituras pendientes está acotada: cuando la cola se
+    llena, submit() espera a que termine alguna escritura, para que los
+    DataFrames en espera de ser escritos no ocupen memoria sin límite.
+
+    Args:
+        threads (int): Cantidad de escrituras simultáneas.
+        queue_size (int): Cantidad de escrituras que pueden esperar a que se
+            libere un hilo.
+    """
+
+    def __init__(self, threads=DEFAULT_WRITER_THREADS,
+                 queue_size=DEFAULT_WRITER_QUEUE_SIZE):
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+        self._slots = threading.BoundedSemaphore(threads + queue_size)
+
+    def submit(self, function, *args, **kwargs):
+        """Encola una escritura, esperando si la cola está llena.
+
+        Returns:
+            concurrent.futures.Future: Resultado de la escritura.
+        """
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(function, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self):
+        """Espera a que terminen las escrituras pendientes y libera los
+        hilos."""
+        self._executor.shutdown(wait=True)
@@ -29,7 +29,8 @@ setup(
     ],
     entry_points={
         'console_scripts': [
-            'etl=series_tiempo_ar_scraping.main:cli'
+            'etl=series_tiempo_ar_scraping.main:cli',
+            'etl-clear-cache=series_tiempo_ar_scraping.main:clear_cache',
         ]
     },
     license="MIT license",
@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+
+from series_tiempo_ar_scraping.cache import (
+    ParsedSheetCache,
+    dump_parsed_sheet,
+    get_parsed_sheet_key,
+)
+
+
+def _get_parsed_sheet():
+    df = pd.DataFrame(
+        {'serie_1': [1.5, None, 3.0], 'serie_2': [1, 2, 3]},
+        index=pd.date_range('2010-01-01', periods=3, freq='MS',
+                            name='indice_tiempo'),
+    )
+    return {'df': df, 'table_end': 10, 'end': 9}
+
+
+def test_parsed_sheet_cache_roundtrip(tmp_path):
+    cache = ParsedSheetCache(str(tmp_path))
+    key = get_parsed_sheet_key('hash', 'plan')
+    parsed_sheet = _get_parsed_sheet()
+
+    assert cache.read(key) is None
+    assert cache.write(key, parsed_sheet)
+
+    cached = cache.read(key)
+    pd.testing.assert_frame_equal(cached['df'], parsed_sheet['df'])
+    assert cached['df'].index.freq == parsed_sheet['df'].index.freq
+    assert cached['table_end'] == 10
+    assert cached['end'] == 9
+
+
+def test_parsed_sheet_cache_skips_non_numeric_frames():
+    parsed_sheet = _get_parsed_sheet()
+    parsed_sheet['df']['serie_3'] = ['a', 'b', 'c']
+
+    assert dump_parsed_sheet(parsed_sheet) is None
+
+
+def test_parsed_sheet_cache_evicts_least_recently_used(tmp_path):
+    size = len(dump_parsed_sheet(_get_parsed_sheet()))
+    cache = ParsedSheetCache(str(tmp_path), max_size=2 * size)
+
+    for mtime, key in enumerate(['a1', 'b2', 'c3']):
+        cache.write(key, _get_parsed_sheet())
+        os.utime(str(cache.get_path(key)), (mtime, mtime))
+
+    cache.evict()
+
+    assert not cache.get_path('a1').exists()
+    assert cache.get_path('b2').exists()
+    assert cache.get_path('c3').exists()
+
+    assert cache.clear() == 2
+    assert cache.read('b2') is None
@@ -1,7 +1,19 @@
-from mock import patch
+import os
+from collections import Counter
+from concurrent.futures import Future
+
+from mock import Mock, patch
 import pytest
 
-from series_tiempo_ar_scraping.base import Catalog, ETLObject, Distribution
+from series_tiempo_ar_scraping.base import (
+    Catalog,
+    Distribution,
+    ETL,
+    ETLObject,
+    OUTPUT_DIR,
+    get_memory_config,
+)
+from series_tiempo_ar_scraping.processors import TXTProcessor
 from tests.factories import CatalogFactory, DistributionFactory
 
 
@@ -184,3 +196,456 @@ def test_get_scraping_mail_subject(config, identifier, expected):
         catalog.identifier = identifier
 
         assert expected in catalog.get_scraping_mail_subject()
+
+
+def test_wait_for_source_registers_workbook_until_last_distribution():
+    with patch.object(
+            ETLObject,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        catalog = CatalogFactory()
+        catalog.identifier = 'foo'
+        url = 'http://example.com/a.xlsx'
+        future = Future()
+        future.set_result('fresh')
+        workbooks = Mock()
+        catalog.context = {
+            'workbooks': workbooks,
+            'catalog': {
+                'foo': {
+                    'sources': {url: future},
+                    'source_uses': {url: 2},
+                    'source_sheets': {url: ['Hoja1']},
+                    'workbook_keys': {},
+                }
+            }
+        }
+
+        with patch.object(Catalog, 'get_workbook_key', return_value='key'):
+            catalog.wait_for_source(url)
+            catalog.wait_for_source(url)
+            catalog.wait_for_source(None)
+
+        workbooks.add_uses.assert_called_once_with('key')
+        assert catalog.context['catalog']['foo']['workbook_keys'] == \
+            {url: 'key'}
+
+        catalog.release_source(url)
+        workbooks.release.assert_not_called()
+
+        catalog.release_source(url)
+        workbooks.release.assert_called_once_with('key', keep=False)
+
+
+def test_workbook_is_kept_for_later_catalogs():
+    url = 'http://example.com/a.xlsx'
+    workbooks = Mock()
+    context = {
+        'workbooks': workbooks,
+        'workbook_catalogs': Counter({url: 2}),
+        'catalog': {},
+    }
+    catalogs = []
+
+    with patch.object(
+            ETLObject,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        for identifier in ['foo', 'bar']:
+            catalog = CatalogFactory()
+            catalog.identifier = identifier
+            catalog.context = context
+            context['catalog'][identifier] = {
+                'source_uses': {url: 1},
+                'workbook_keys': {url: 'key'},
+            }
+            catalogs.append(catalog)
+
+    with patch.object(Catalog, 'get_workbook_key', return_value='key'), \
+            patch.object(Catalog, 'get_workbook_sheets',
+                         return_value={url: ['Hoja1']}):
+        catalogs[0].release_source(url)
+        workbooks.release.assert_called_once_with('key', keep=True)
+        catalogs[0].release_workbooks()
+        workbooks.discard.assert_not_called()
+
+        catalogs[1].release_source(url)
+        workbooks.release.assert_called_with('key', keep=False)
+        catalogs[1].release_workbooks()
+        workbooks.discard.assert_called_once_with('key')
+
+
+@pytest.mark.parametrize(
+    'full_rebuild, csv_exists, previous_fingerprint, expected',
+    [
+        (False, True, 'abc', True),
+        (True, True, 'abc', False),
+        (False, False, 'abc', False),
+        (False, True, 'def', False),
+        (False, True, None, False),
+    ],
+)
+def test_distribution_is_unchanged(full_rebuild, csv_exists,
+                                   previous_fingerprint, expected):
+    with patch.object(
+            Distribution,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        distribution = DistributionFactory()
+        distribution.identifier = 'foo'
+        distribution.fingerprint = 'abc'
+        distribution.context = {
+            'full_rebuild': full_rebuild,
+            'fingerprints': {'foo': previous_fingerprint},
+        }
+
+        with patch.object(Distribution, 'csv_exists', return_value=csv_exists):
+            assert distribution.is_unchanged() == expected
+
+
+def test_distribution_fingerprint_depends_on_source_and_sheet():
+    with patch.object(
+            Distribution,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        distribution = DistributionFactory()
+        distribution.parent = Mock()
+        distribution.parent.parent.get_source_hash.return_value = 'hash1'
+        distribution.config = {}
+        distribution.metadata = {
+            'scrapingFileURL': 'http://example.com/a.xlsx',
+            'scrapingFileSheet': 'Hoja1',
+            'title': 'Distribución',
+            'field': [{'title': 'indice_tiempo'}],
+        }
+
+        fingerprint = distribution.get_fingerprint()
+
+        distribution.metadata['title'] = 'Otro título'
+        assert distribution.get_fingerprint() == fingerprint
+
+        distribution.metadata['scrapingFileSheet'] = 'Hoja2'
+        assert distribution.get_fingerprint() != fingerprint
+
+        distribution.metadata['scrapingFileSheet'] = 'Hoja1'
+        distribution.parent.parent.get_source_hash.return_value = 'hash2'
+        assert distribution.get_fingerprint() != fingerprint
+
+        distribution.parent.parent.get_source_hash.return_value = 'hash1'
+        distribution.config = {'distribution_formats': ['parquet']}
+        assert distribution.get_fingerprint() != fingerprint
+
+        distribution.parent.parent.get_source_hash.return_value = None
+        assert distribution.get_fingerprint() is None
+
+
+class FakeCatalog:
+
+    def __init__(self, identifier, context):
+        self.identifier = identifier
+        self.context = context
+
+    def process(self):
+        self.context['catalog'][self.identifier][
+            'catalog_distributions_reports'].append({'pid': os.getpid()})
+
+
+def test_etl_process_in_parallel_merges_catalog_reports():
+    with patch.object(
+            ETL,
+            '__init__',
+            lambda _, identifier: None
+        ):
+        etl = ETL(identifier=None)
+        etl.jobs = 2
+        etl.config = {}
+        etl.context = {
+            'catalog': {
+                identifier: {'catalog_distributions_reports': []}
+                for identifier in ['foo', 'bar']
+            }
+        }
+        etl.childs = [
+            FakeCatalog(identifier, etl.context)
+            for identifier in ['foo', 'bar']
+        ]
+
+        etl.process_in_parallel()
+
+        for identifier in ['foo', 'bar']:
+            reports = etl.context['catalog'][identifier][
+                'catalog_distributions_reports']
+            assert len(reports) == 1
+            assert reports[0]['pid'] != os.getpid()
+
+
+class FakeDataset:
+
+    def __init__(self, distributions):
+        self.childs = distributions
+
+    def pre_process(self):
+        pass
+
+    def post_process(self):
+        pass
+
+
+def fake_distribution_run(distribution):
+    distribution.report['distribution_note'] = os.getpid()
+    distribution.metadata['downloadURL'] = \
+        'http://example.com/' + distribution.identifier
+
+
+def test_catalog_process_in_parallel_keeps_distributions_order():
+    with patch.object(
+            ETLObject,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ), patch.object(
+            Distribution,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        catalog = CatalogFactory()
+        catalog.identifier = 'foo'
+        catalog.distribution_jobs = 2
+        metadata = Mock()
+        catalog_context = {
+            'metadata': metadata,
+            'sources': {},
+            'catalog_distributions_reports': [],
+        }
+        catalog.context = {'catalog': {'foo': catalog_context}}
+
+        distributions = {}
+        for identifier in ['1.1', '1.2', '2.1']:
+            distribution = DistributionFactory()
+            distribution.identifier = identifier
+            distribution.parent = Mock()
+            distribution.parent.parent = catalog
+            distribution.context = catalog_context
+            distribution.metadata = {
+                'scrapingFileURL': 'http://example.com/a.txt'
+                if identifier != '1.2' else None,
+            }
+            distribution.processor = Mock(spec=TXTProcessor) \
+                if identifier != '1.2' else None
+            distribution.source_url = None
+            distribution.fingerprint = None
+            distribution.report = {
+                'distribution_identifier': identifier,
+                'distribution_status': 'OK',
+                'distribution_note': None,
+            }
+            distributions[identifier] = distribution
+        catalog.childs = [
+            FakeDataset([distributions['1.1'], distributions['1.2']]),
+            FakeDataset([distributions['2.1']]),
+        ]
+        metadata.get_distribution.side_effect = \
+            lambda identifier: distributions[identifier].metadata
+
+        with patch.object(Catalog, 'init_worker_resources'), \
+                patch.object(Catalog, 'start_downloads'), \
+                patch.object(Catalog, 'get_host_status'), \
+                patch.object(Distribution, 'pre_process'), \
+                patch.object(Distribution, 'run', fake_distribution_run):
+            catalog.process_in_parallel()
+
+        reports = catalog_context['catalog_distributions_reports']
+        assert [report['distribution_identifier'] for report in reports] == \
+            ['1.1', '1.2', '2.1']
+        assert all(report['distribution_note'] != os.getpid()
+                   for report in reports)
+        # las distribuciones que comparten archivo fuente se generan en el
+        # mismo proceso
+        assert reports[0]['distribution_note'] == \
+            reports[2]['distribution_note']
+        assert distributions['2.1'].metadata['downloadURL'] == \
+            'http://example.com/2.1'
+
+
+def test_release_memory_closes_workbooks_above_max_rss():
+    with patch.object(
+            ETLObject,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        catalog = CatalogFactory()
+        catalog.identifier = 'foo'
+        catalog.bounded_memory, catalog.max_rss = get_memory_config(
+            {'max_rss_mb': 1})
+        workbooks = Mock()
+        catalog.context = {
+            'workbooks': workbooks,
+            'catalog': {'foo': {'text_panels': {'url': {}}}},
+        }
+        distribution = Mock()
+
+        catalog.release_memory(distribution)
+
+        distribution.release_memory.assert_called_once_with()
+        workbooks.close_all.assert_called_once_with()
+        assert catalog.context['catalog']['foo']['text_panels'] == {}
+
+
+def test_release_memory_keeps_data_without_bounded_memory():
+    with patch.object(
+            ETLObject,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        catalog = CatalogFactory()
+        catalog.bounded_memory, catalog.max_rss = get_memory_config({})
+        distribution = Mock()
+
+        catalog.release_memory(distribution)
+
+        distribution.release_memory.assert_not_called()
+
+
+def test_finish_writes_reports_background_write_errors():
+    with patch.object(
+            ETLObject,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        catalog = CatalogFactory()
+        catalog.identifier = 'foo'
+        catalog.config = {'writer_threads': 1, 'writer_queue_size': 0}
+        catalog_context = {
+            'fingerprints': {'1.1': 'abc'},
+            'catalog_distributions_reports': [],
+        }
+        catalog.context = {'catalog': {'foo': catalog_context}}
+        catalog_context['writer_pool'] = catalog.get_writer_pool()
+
+    with patch.object(
+            Distribution,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        distribution = DistributionFactory()
+        distribution.identifier = '1.1'
+        distribution.config = {}
+        distribution.context = catalog_context
+        distribution.metadata = {
+            'field': [{'title': 'indice_tiempo', 'scrapingIdentifierCell': 'A1'}],
+        }
+        distribution.report = {'distribution_status': 'OK'}
+        distribution.context['distribution_output_path'] = '/tmp/1.1.csv'
+        distribution._df = Mock()
+
+        with patch.object(Distribution, 'write_distribution_dataframe',
+                          side_effect=OSError('disco lleno')):
+            catalog.submit_write(distribution)
+            catalog.finish_writes()
+
+        assert distribution.report['distribution_status'] == 'ERROR'
+        assert 'disco lleno' in distribution.report['distribution_note']
+        assert 'distribution_output' not in distribution.report
+        assert catalog_context['fingerprints'] == {}
+        assert 'writer_pool' not in catalog_context
+
+
+def test_background_write_publishes_downloadURL_when_finished():
+    with patch.object(
+            ETLObject,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        catalog = CatalogFactory()
+        catalog.identifier = 'foo'
+        catalog.config = {'writer_threads': 1, 'writer_queue_size': 0}
+        catalog_context = {'catalog_distributions_reports': []}
+        catalog.context = {'catalog': {'foo': catalog_context}}
+        catalog_context['writer_pool'] = catalog.get_writer_pool()
+
+    with patch.object(
+            Distribution,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        distribution = DistributionFactory()
+        distribution.identifier = '1.1'
+        distribution.config = {'host': 'http://host'}
+        distribution.context = catalog_context
+        distribution_metadata = {}
+        distribution.context['metadata'] = Mock(
+            get_distribution=Mock(return_value=distribution_metadata))
+        distribution.report = {
+            'distribution_status': 'OK', 'distribution_note': None}
+        file_path = os.path.join(OUTPUT_DIR, 'foo', '1.1.csv')
+        distribution.context['distribution_output_path'] = file_path
+        distribution._df = Mock()
+
+        # devuelve la URL publicada al momento de escribir
+        with patch.object(
+                Distribution, 'write_outputs',
+                side_effect=lambda *args: distribution_metadata.get(
+                    'downloadURL')):
+            catalog.submit_write(distribution)
+            assert distribution.write_pending
+            catalog.finish_writes()
+
+        # la URL no estaba publicada mientras se escribía el archivo
+        assert distribution.report['distribution_output'] is None
+        assert not distribution.write_pending
+        assert distribution_metadata['downloadURL'] == \
+            'http://host/foo/1.1.csv'
+
+
+@pytest.mark.parametrize('write_xlsx', [False, True])
+def test_write_xlsx_metadata_only_if_requested(write_xlsx):
+    with patch.object(
+            ETLObject,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        catalog = CatalogFactory()
+        catalog.identifier = 'foo'
+        catalog.write_xlsx = write_xlsx
+        catalog.metadata = Mock()
+        catalog.context = {'catalog': {'foo': {}}}
+
+        with patch('series_tiempo_ar_scraping.base.render_if_changed',
+                   return_value='written') as render, \
+                patch.object(Catalog, 'ensure_dir_exists'):
+            catalog.write_xlsx_metadata()
+
+        assert render.called == write_xlsx
+
+
+def test_time_composed_state_keeps_only_current_sources():
+    with patch.object(
+            ETLObject,
+            '__init__',
+            lambda _, identifier, parent, context: None
+        ):
+        catalog = CatalogFactory()
+        catalog.identifier = 'foo'
+        catalog.metadata = {'dataset': [{'distribution': [
+            {'scrapingFileURL': 'http://example.com/a.xlsx'},
+            {'scrapingFileURL': 'http://example.com/b.xlsx'},
+        ]}]}
+        store = Mock()
+        store.get_hash.side_effect = lambda url: {
+            'http://example.com/a.xlsx': 'nuevo'}.get(url)
+        catalog.context = {
+            'store': store,
+            'catalog': {'foo': {'time_composed': {
+                'nuevo|Hoja1|A1': True,
+                'viejo|Hoja1|A1': False,
+                'http://example.com/b.xlsx|Hoja1|A1': False,
+            }}},
+        }
+
+        assert catalog.get_time_composed_state() == {
+            'nuevo|Hoja1|A1': True,
+            'http://example.com/b.xlsx|Hoja1|A1': False,
+        }
@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+from mock import patch
+
+from series_tiempo_ar_scraping import columnar
+from series_tiempo_ar_scraping.columnar import (
+    get_columnar_path,
+    normalize_columnar_formats,
+    read_distribution_metadata,
+    write_columnar_distribution,
+)
+
+
+def _get_df():
+    return pd.DataFrame(
+        {'serie': [1.5, 2.5, None]},
+        index=pd.date_range('2000-01-01', periods=3, freq='MS'),
+    )
+
+
+def test_get_columnar_path():
+    assert get_columnar_path('/tmp/download/1.1.csv', 'parquet') == \
+        '/tmp/download/1.1.parquet'
+    assert get_columnar_path('/tmp/download/1.1', 'feather') == \
+        '/tmp/download/1.1.feather'
+
+
+def test_normalize_columnar_formats():
+    assert normalize_columnar_formats(
+        ['Parquet', 'csv', 'parquet', 'feather']) == ['parquet', 'feather']
+    assert normalize_columnar_formats('feather') == ['feather']
+    assert normalize_columnar_formats(None) == []
+
+
+def test_write_columnar_distribution_requires_pyarrow(tmp_path):
+    with patch.object(columnar, 'pyarrow', None):
+        with pytest.raises(ImportError):
+            write_columnar_distribution(
+                _get_df(), str(tmp_path / '1.1.parquet'), 'parquet')
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'feather'])
+def test_write_columnar_distribution(tmp_path, file_format):
+    pytest.importorskip('pyarrow')
+    file_path = str(tmp_path / ('1.1.' + file_format))
+
+    write_columnar_distribution(
+        _get_df(), file_path, file_format, {'frequency': 'R/P1M'})
+
+    if file_format == 'parquet':
+        df = pd.read_parquet(file_path)
+    else:
+        df = pd.read_feather(file_path).set_index('indice_tiempo')
+    pd.testing.assert_frame_equal(
+        df, _get_df().rename_axis('indice_tiempo'), check_freq=False)
+    assert read_distribution_metadata(file_path, file_format) == \
+        {'frequency': 'R/P1M'}
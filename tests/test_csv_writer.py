@@ -0,0 +1,90 @@
+import gzip
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from mock import patch
+
+from series_tiempo_ar_scraping.csv_writer import write_distribution_csv
+from series_tiempo_ar_scraping.utils import UNCHANGED, WRITTEN
+
+
+def _get_df(freq):
+    index = pd.date_range('2000-01-01', periods=4, freq=freq)
+    return pd.DataFrame({
+        'serie_a': [1.5, np.nan, 1e-05, 1e16],
+        'serie_b': [1, 2, 3, 4],
+        'serie_c': [0.1, 0.2, -0.0, np.inf],
+    }, index=index)
+
+
+@pytest.mark.parametrize('freq', ['D', 'MS', 'QS', 'h'])
+def test_write_distribution_csv_is_byte_identical_to_to_csv(tmp_path, freq):
+    df = _get_df(freq)
+    file_path = tmp_path / 'distribucion.csv'
+
+    write_distribution_csv(df, str(file_path))
+
+    expected = df.to_csv(encoding='utf-8', index_label='indice_tiempo')
+    assert file_path.read_bytes() == expected.encode('utf-8')
+
+
+def test_write_distribution_csv_with_float_format(tmp_path):
+    df = _get_df('MS')
+    file_path = tmp_path / 'distribucion.csv'
+
+    write_distribution_csv(df, str(file_path), float_format='%.2f')
+
+    expected = df.to_csv(encoding='utf-8', index_label='indice_tiempo',
+                         float_format='%.2f')
+    assert file_path.read_bytes() == expected.encode('utf-8')
+
+
+def test_write_distribution_csv_writes_gzip_copy(tmp_path):
+    file_path = tmp_path / 'distribucion.csv'
+
+    write_distribution_csv(_get_df('MS'), str(file_path),
+                           compressions=['gzip'])
+
+    with gzip.open(str(file_path) + '.gz') as f:
+        assert f.read() == file_path.read_bytes()
+    assert sorted(path.name for path in tmp_path.iterdir()) == \
+        ['distribucion.csv', 'distribucion.csv.gz']
+
+
+def test_write_distribution_csv_keeps_unchanged_file(tmp_path):
+    file_path = tmp_path / 'distribucion.csv'
+    df = _get_df('MS')
+
+    assert write_distribution_csv(df, str(file_path)) == WRITTEN
+    os.utime(str(file_path), (0, 0))
+
+    assert write_distribution_csv(df, str(file_path)) == UNCHANGED
+    assert file_path.stat().st_mtime == 0
+    assert [path.name for path in tmp_path.iterdir()] == ['distribucion.csv']
+
+    df.iloc[0, 0] = 2.5
+    assert write_distribution_csv(df, str(file_path)) == WRITTEN
+
+
+def test_write_distribution_csv_falls_back_on_unsupported_columns(tmp_path):
+    df = _get_df('MS')
+    df['serie_d'] = ['a', 'b', None, 'd,e']
+    file_path = tmp_path / 'distribucion.csv'
+
+    write_distribution_csv(df, str(file_path))
+
+    expected = df.to_csv(encoding='utf-8', index_label='indice_tiempo')
+    assert file_path.read_bytes() == expected.encode('utf-8')
+
+
+def test_write_distribution_csv_does_not_hide_fast_path_errors(tmp_path):
+    file_path = tmp_path / 'distribucion.csv'
+
+    with patch('series_tiempo_ar_scraping.csv_writer.format_column',
+                    side_effect=ValueError('error')):
+        with pytest.raises(ValueError):
+            write_distribution_csv(_get_df('MS'), str(file_path))
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,169 @@
+import threading
+import time
+
+import pytest
+import requests
+from mock import MagicMock, Mock, patch
+
+from series_tiempo_ar_scraping import download
+
+
+def test_download_many_keeps_jobs_order():
+    jobs = [
+        ('http://example.com/{}.xlsx'.format(i), '/tmp/{}.xlsx'.format(i))
+        for i in range(10)
+    ]
+
+    def fake_download(url, file_path):
+        time.sleep(0.001 * (10 - int(file_path[5])))
+        return file_path
+
+    results = download.download_many(jobs, fake_download, workers=4)
+
+    assert results == [file_path for _, file_path in jobs]
+
+
+def test_download_many_respects_max_per_host():
+    jobs = [
+        ('http://example.com/{}.xlsx'.format(i), '/tmp/{}.xlsx'.format(i))
+        for i in range(8)
+    ]
+    lock = threading.Lock()
+    state = {'current': 0, 'max': 0}
+
+    def fake_download(url, file_path):
+        with lock:
+            state['current'] += 1
+            state['max'] = max(state['max'], state['current'])
+        time.sleep(0.01)
+        with lock:
+            state['current'] -= 1
+
+    download.download_many(jobs, fake_download, workers=8, max_per_host=2)
+
+    assert state['max'] <= 2
+
+
+def _fake_response(status_code=200, content=b'', headers=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.content = content
+    response.iter_content.return_value = [content[:4], content[4:]]
+    response.headers = headers or {}
+    response.url = 'http://example.com/file.xlsx'
+    return response
+
+
+def test_download_to_file_revalidates_unchanged_file(tmp_path):
+    file_path = str(tmp_path / 'sources' / 'file.xlsx')
+
+    with patch('series_tiempo_ar_scraping.download.requests.get') as get:
+        get.return_value = _fake_response(
+            content=b'contenido', headers={'ETag': '"abc"'})
+        assert download.download_to_file(
+            'http://example.com/file.xlsx', file_path) == download.FRESH
+
+        get.return_value = _fake_response(status_code=304)
+        assert download.download_to_file(
+            'http://example.com/file.xlsx', file_path) == download.REVALIDATED
+
+        assert get.call_args[1]['headers'] == {'If-None-Match': '"abc"'}
+
+    with open(file_path, 'rb') as f:
+        assert f.read() == b'contenido'
+
+
+def test_download_to_file_does_not_revalidate_modified_file(tmp_path):
+    file_path = str(tmp_path / 'file.xlsx')
+
+    with patch('series_tiempo_ar_scraping.download.requests.get') as get:
+        get.return_value = _fake_response(
+            content=b'contenido', headers={'ETag': '"abc"'})
+        download.download_to_file('http://example.com/file.xlsx', file_path)
+
+        with open(file_path, 'wb') as f:
+            f.write(b'otro contenido')
+
+        download.download_to_file('http://example.com/file.xlsx', file_path)
+
+        assert get.call_args[1]['headers'] is None
+
+
+def test_download_to_file_keeps_previous_file_on_failure(tmp_path):
+    file_path = tmp_path / 'file.xlsx'
+    file_path.write_bytes(b'contenido anterior')
+
+    def broken_stream(chunk_size):
+        yield b'conte'
+        raise requests.exceptions.ChunkedEncodingError()
+
+    with patch('series_tiempo_ar_scraping.download.requests.get') as get:
+        response = _fake_response()
+        response.iter_content.side_effect = broken_stream
+        get.return_value = response
+
+        with pytest.raises(requests.exceptions.ChunkedEncodingError):
+            download.download_to_file(
+                'http://example.com/file.xlsx', str(file_path),
+                revalidate=False)
+
+    assert file_path.read_bytes() == b'contenido anterior'
+    assert [p.name for p in tmp_path.iterdir()] == ['file.xlsx']
+
+
+def test_session_pool_reuses_sessions_by_config():
+    sessions = download.SessionPool()
+
+    session = sessions.get_session(try_timeout=10)
+
+    assert sessions.get_session(try_timeout=10) is session
+    assert sessions.get_session(try_timeout=20) is not session
+    assert session.timeout == 10
+    assert session.verify is True
+    assert sessions.get_session(try_timeout=10, verify=False).verify is False
+
+    sessions.close()
+
+
+def test_retry_waits_retry_after_header():
+    response = _fake_response(status_code=503, headers={'Retry-After': '7'})
+    error = requests.exceptions.HTTPError(response=response)
+    function = Mock(side_effect=[error, 'ok'])
+
+    with patch('series_tiempo_ar_scraping.download.time.sleep') as sleep:
+        assert download.retry(function, tries=2, retry_delay=1) == 'ok'
+
+    sleep.assert_called_once_with(7)
+
+
+@pytest.mark.parametrize('attempt, expected_max', [(0, 1), (1, 2), (2, 4), (10, 60)])
+def test_get_retry_delay_grows_exponentially(attempt, expected_max):
+    delay = download.get_retry_delay(attempt, retry_delay=1, backoff_factor=2)
+
+    assert expected_max / 2 <= delay <= expected_max
+
+
+def test_circuit_breaker_opens_after_max_failures():
+    breaker = download.CircuitBreaker()
+
+    breaker.record_failure('example.com', max_failures=2)
+    breaker.record_success('example.com')
+    breaker.record_failure('example.com', max_failures=2)
+    assert not breaker.is_open('example.com')
+
+    breaker.record_failure('example.com', max_failures=2)
+    assert breaker.is_open('example.com')
+    assert breaker.get_state('http://example.com/a.xlsx') == download.CIRCUIT_OPEN
+    assert breaker.get_state('http://other.com/a.xlsx') is None
+
+
+def test_session_fails_fast_when_circuit_is_open():
+    sessions = download.SessionPool()
+    sessions.breaker.record_failure('example.com', max_failures=1)
+    session = sessions.get_session()
+
+    with patch('requests.Session.request') as request:
+        with pytest.raises(download.HostUnavailableError):
+            session.get('http://example.com/a.xlsx')
+
+    request.assert_not_called()
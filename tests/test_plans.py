@@ -0,0 +1,64 @@
+import pytest
+
+from series_tiempo_ar_scraping.plans import (
+    compile_scraping_plan,
+    get_scraping_plan,
+)
+
+
+def _get_distribution():
+    return {
+        'identifier': '1.1',
+        'scrapingFileSheet': 'Hoja1',
+        'field': [
+            {
+                'title': 'indice_tiempo',
+                'specialType': 'time_index',
+                'specialTypeDetail': 'R/P1M',
+                'scrapingIdentifierCell': 'A1',
+                'scrapingDataStartCell': 'A2',
+            },
+            {
+                'id': '1.1_serie',
+                'title': 'serie',
+                'scrapingIdentifierCell': 'B1',
+                'scrapingDataStartCell': 'B2',
+            },
+        ],
+    }
+
+
+def test_compile_scraping_plan():
+    plan = compile_scraping_plan(_get_distribution())
+
+    assert plan.worksheet == 'Hoja1'
+    assert plan.headers_coord == ('B1',)
+    assert plan.headers_value == ('1.1_serie',)
+    assert plan.data_starts == (2,)
+    assert plan.frequency == 'M'
+    assert plan.time_header_coord == 'A1'
+    assert plan.series_names == ('serie',)
+
+    params = plan.to_xlseries_params(True)
+    assert params['headers_coord'] == ['B1']
+    assert params['time_composed'] is True
+    assert params is not plan.to_xlseries_params(True)
+
+
+def test_get_scraping_plan_is_cached_by_metadata():
+    distribution = _get_distribution()
+    plan = get_scraping_plan(distribution)
+
+    assert get_scraping_plan(dict(distribution, title='Otro')) is plan
+    assert hash(plan) == hash(compile_scraping_plan(distribution))
+
+    distribution['scrapingFileSheet'] = 'Hoja2'
+    assert get_scraping_plan(distribution).key != plan.key
+
+
+def test_compile_scraping_plan_rejects_invalid_coordinates():
+    distribution = _get_distribution()
+    distribution['field'][1]['scrapingDataStartCell'] = '2B'
+
+    with pytest.raises(ValueError):
+        compile_scraping_plan(distribution)
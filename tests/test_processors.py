@@ -0,0 +1,342 @@
+import datetime
+import io
+
+from mock import Mock, patch
+import pandas as pd
+import pytest
+import requests
+from xlseries.strategies.clean.parse_time import TimeIsNotComposed
+
+from series_tiempo_ar.readers.csv_reader import CSVReader
+from series_tiempo_ar.readers.text_file_reader import \
+    generate_ts_distribution_from_text_file
+
+from series_tiempo_ar_scraping import processors
+from series_tiempo_ar_scraping.plans import ScrapingPlan
+from series_tiempo_ar_scraping.processors import (
+    SessionCSVReader,
+    SpreadsheetProcessor,
+    TXTProcessor,
+)
+from series_tiempo_ar_scraping.store import get_source_file_name
+
+
+def _get_plan(distribution_identifier):
+    return ScrapingPlan(
+        key=distribution_identifier,
+        worksheet='Hoja1',
+        headers_coord=('B1',),
+        headers_value=(distribution_identifier + '_serie',),
+        data_starts=(2,),
+        frequency='M',
+        time_header_coord='A1',
+        series_names=('serie',),
+    )
+
+
+def _get_processor(identifier, catalog_metadata, catalog_context):
+    return SpreadsheetProcessor(
+        distribution_metadata={
+            'identifier': identifier,
+            'scrapingFileURL': 'http://example.com/a.xlsx',
+        },
+        catalog_metadata=catalog_metadata,
+        catalog_context=catalog_context,
+    )
+
+
+def test_spreadsheet_processor_extracts_sheet_once_per_group():
+    catalog_metadata = Mock()
+    catalog_metadata.get.return_value = 'foo'
+    catalog_metadata.get_distribution.return_value = {
+        'scrapingFileURL': 'http://example.com/a.xlsx'}
+    catalog_context = {
+        'catalog': {
+            'foo': {
+                'catalog_time_series_distributions_identifiers': ['1.1', '1.2'],
+            }
+        }
+    }
+    group_df = pd.DataFrame({'1.1_serie': [1, 2], '1.2_serie': [3, 4]})
+
+    with patch.object(SpreadsheetProcessor, 'get_scraping_plan',
+                      lambda _, identifier: _get_plan(identifier)), \
+            patch.object(SpreadsheetProcessor, 'scrape_dataframe',
+                         return_value={'df': group_df, 'table_end': 3,
+                                       'end': 3}) as scrape_dataframe:
+        results = {}
+        for identifier in ['1.1', '1.2']:
+            processor = _get_processor(
+                identifier, catalog_metadata, catalog_context)
+            results[identifier] = processor.extract_dataframe(
+                Mock(), _get_plan(identifier))
+            processor.release()
+
+    assert scrape_dataframe.call_count == 1
+    assert scrape_dataframe.call_args[0][1].series_names == \
+        ('1.1_serie', '1.2_serie')
+    assert list(results['1.1']['df'].columns) == ['serie']
+    assert list(results['1.2']['df']['serie']) == [3, 4]
+    assert results['1.2']['table_end'] == 3
+    assert not catalog_context['catalog']['foo']['sheet_extractions']
+
+
+def test_spreadsheet_processor_releases_group_of_skipped_distributions():
+    catalog_metadata = Mock()
+    catalog_metadata.get.return_value = 'foo'
+    catalog_metadata.get_distribution.return_value = {
+        'scrapingFileURL': 'http://example.com/a.xlsx'}
+    catalog_context = {
+        'catalog': {
+            'foo': {
+                'catalog_time_series_distributions_identifiers':
+                    ['1.1', '1.2', '1.3'],
+            }
+        }
+    }
+    group_df = pd.DataFrame({
+        '1.1_serie': [1], '1.2_serie': [2], '1.3_serie': [3]})
+    extractions = catalog_context['catalog']['foo'].setdefault(
+        'sheet_extractions', {})
+
+    with patch.object(SpreadsheetProcessor, 'get_scraping_plan',
+                      lambda _, identifier: _get_plan(identifier)), \
+            patch.object(SpreadsheetProcessor, 'scrape_dataframe',
+                         return_value={'df': group_df, 'table_end': 2,
+                                       'end': 2}):
+        # 1.2 no cambió: termina sin extraerse
+        _get_processor('1.2', catalog_metadata, catalog_context).release()
+
+        processor = _get_processor('1.1', catalog_metadata, catalog_context)
+        processor.extract_dataframe(Mock(), _get_plan('1.1'))
+        processor.release()
+        assert extractions
+
+        _get_processor('1.3', catalog_metadata, catalog_context).release()
+
+    assert not extractions
+
+
+def _scrape(processor, xl):
+    return processor.scrape_dataframe(xl, _get_plan('1.1'))
+
+
+def _get_time_composed_calls(xl):
+    return [call[0][0]['time_composed']
+            for call in xl.get_data_frames.call_args_list]
+
+
+def test_scrape_dataframe_remembers_time_is_not_composed():
+    catalog_metadata = Mock()
+    catalog_metadata.get.return_value = 'foo'
+    catalog_context = {'catalog': {'foo': {}}}
+    processor = _get_processor('1.1', catalog_metadata, catalog_context)
+
+    def get_data_frames(params, **kwargs):
+        if params['time_composed']:
+            raise TimeIsNotComposed('2010-01-01')
+        return {'df': pd.DataFrame(), 'table_end': 3, 'end': 3}
+
+    xl = Mock()
+    xl.get_data_frames.side_effect = get_data_frames
+    with patch.object(SpreadsheetProcessor, 'time_values_are_parsed',
+                      return_value=False):
+        _scrape(processor, xl)
+        _scrape(processor, xl)
+
+    assert _get_time_composed_calls(xl) == [True, False, False]
+    assert list(catalog_context['catalog']['foo']['time_composed'].values()) \
+        == [False]
+
+
+def test_scrape_dataframe_checks_time_column_before_parsing():
+    catalog_metadata = Mock()
+    catalog_metadata.get.return_value = 'foo'
+    processor = _get_processor(
+        '1.1', catalog_metadata, {'catalog': {'foo': {}}})
+
+    xl = Mock()
+    xl.wb.sheetnames = ['Hoja1']
+    xl.wb.__getitem__ = Mock(return_value={
+        'A2': Mock(value=datetime.datetime(2010, 1, 1))})
+    xl.get_data_frames.return_value = {
+        'df': pd.DataFrame(), 'table_end': 3, 'end': 3}
+
+    _scrape(processor, xl)
+
+    assert _get_time_composed_calls(xl) == [False]
+    assert list(processor.get_catalog_context()['time_composed'].values()) \
+        == [False]
+
+
+def test_scrape_dataframe_raises_not_composed_error_once():
+    catalog_metadata = Mock()
+    catalog_metadata.get.return_value = 'foo'
+    processor = _get_processor(
+        '1.1', catalog_metadata, {'catalog': {'foo': {}}})
+
+    def get_data_frames(params, **kwargs):
+        if params['time_composed']:
+            raise TimeIsNotComposed('2010-01-01')
+        raise ValueError('celdas inválidas')
+
+    xl = Mock()
+    xl.get_data_frames.side_effect = get_data_frames
+    with patch.object(SpreadsheetProcessor, 'time_values_are_parsed',
+                      return_value=True):
+        with pytest.raises(ValueError):
+            _scrape(processor, xl)
+
+    assert _get_time_composed_calls(xl) == [False, True]
+
+
+def _get_text_distribution(identifier):
+    return {
+        'identifier': identifier,
+        'scrapingFileURL': 'http://example.com/a.txt',
+        'scrapingFileSeparator': ';',
+        'scrapingFileEncoding': 'utf-8',
+        'scrapingFileTimeFormat': '%Y-%m-%d',
+        'scrapingFileTimeField': 1,
+        'scrapingFileIdsField': 0,
+        'scrapingFileValuesField': 2,
+    }
+
+
+def test_txt_processor_reads_source_once_per_catalog(tmp_path):
+    source_dir = tmp_path / 'foo' / 'sources'
+    source_dir.mkdir(parents=True)
+    (source_dir / get_source_file_name('http://example.com/a.txt')).write_text(
+        'a;2020-01-01;1\nb;2020-01-01;2\na;2020-02-01;3\n'
+        'b;2020-03-01;4\na;2020-03-01;5\n')
+
+    distributions = {
+        identifier: _get_text_distribution(identifier)
+        for identifier in ['1.1', '1.2']
+    }
+    time_series = {
+        '1.1': [{'id': 'foo_a', 'title': 'serie_a'}],
+        '1.2': [{'id': 'foo_b', 'title': 'serie_b'}],
+    }
+    catalog_metadata = Mock()
+    catalog_metadata.get.return_value = 'foo'
+    catalog_metadata.get_distribution.side_effect = distributions.get
+    catalog_metadata.get_distribution_time_index_frequency.return_value = \
+        'R/P1M'
+    catalog_metadata.get_time_series.side_effect = \
+        lambda distribution_identifier: time_series[distribution_identifier]
+    catalog_context = {'catalog': {'foo': {'text_panels': {}}}}
+
+    with patch.object(processors, 'CATALOGS_DIR_INPUT', str(tmp_path)), \
+            patch.object(pd, 'read_csv', wraps=pd.read_csv) as read_csv:
+        results = {
+            identifier: TXTProcessor(
+                distribution, catalog_metadata, catalog_context).run()
+            for identifier, distribution in distributions.items()
+        }
+
+    assert read_csv.call_count == 1
+    for identifier in distributions:
+        expected = generate_ts_distribution_from_text_file(
+            catalog_metadata, identifier, 'foo', file_source=str(
+                source_dir / get_source_file_name('http://example.com/a.txt')))
+        pd.testing.assert_frame_equal(results[identifier], expected)
+
+
+def _get_csv_distribution(frequency='R/P1M'):
+    return {
+        'identifier': '1.1',
+        'downloadURL': 'http://example.com/a.csv',
+        'field': [
+            {'title': 'indice_tiempo', 'specialType': 'time_index',
+             'specialTypeDetail': frequency},
+            {'id': '1.1_a', 'title': 'serie_a', 'type': 'number'},
+            {'id': '1.1_b', 'title': 'serie_b', 'type': 'number'},
+        ],
+    }
+
+
+def _get_session(content):
+    response = Mock()
+    response.__enter__ = Mock(return_value=response)
+    response.__exit__ = Mock(return_value=False)
+    response.iter_content.return_value = [content[:10], content[10:]]
+    session = Mock()
+    session.get.return_value = response
+    return session
+
+
+@pytest.mark.parametrize('content, frequency', [
+    (b'indice_tiempo,serie_a,serie_b\n2020-01-01,1,1.5\n2020-02-01,2,\n'
+     b'2020-03-01,3,2.5\n', 'R/P1M'),
+    # fechas en otro formato, se leen como lo hace CSVReader
+    (b'indice_tiempo,serie_a,serie_b\n2020-01,1,1.5\n2020-02,2,\n',
+     'R/P1M'),
+    # frecuencia menor a un día
+    (b'indice_tiempo,serie_a,serie_b\n2020-01-01 00:00:00,1,1.5\n'
+     b'2020-01-01 01:00:00,2,\n', 'R/PT1H'),
+    # series no numéricas
+    (b'indice_tiempo,serie_a,serie_b\n2020-01-01,1,a\n2020-02-01,2,b\n',
+     'R/P1M'),
+])
+def test_session_csv_reader_reads_as_csv_reader(tmp_path, content,
+                                                frequency):
+    file_path = tmp_path / 'a.csv'
+    file_path.write_bytes(content)
+    expected = CSVReader(
+        _get_csv_distribution(frequency), file_source=str(file_path)).read()
+
+    session = _get_session(content)
+    reader = SessionCSVReader(
+        _get_csv_distribution(frequency), session=session)
+    df = reader.read()
+
+    assert session.get.call_args[1]['stream'] is True
+    # las series numéricas se leen como float64, según su field
+    pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+    assert (reader.get_time_index_format() is None) == (frequency == 'R/PT1H')
+
+
+def test_session_csv_reader_reads_typed_chunks():
+    content = (b'indice_tiempo,serie_a,serie_b\n2020-01-01,1,1.5\n'
+               b'2020-02-01,2,\n2020-03-01,3,2.5')
+    reader = SessionCSVReader(
+        _get_csv_distribution(), session=_get_session(content))
+
+    with patch.object(processors, 'CSV_CHUNK_ROWS', 2), \
+            patch.object(CSVReader, 'read_csv') as read_csv:
+        df = reader.read()
+
+    read_csv.assert_not_called()
+    assert list(df.dtypes) == ['float64', 'float64']
+    assert list(df.index) == list(
+        pd.date_range('2020-01-01', periods=3, freq='MS'))
+    assert df['serie_a'].tolist() == [1.0, 2.0, 3.0]
+    assert df['serie_b'].isnull().tolist() == [False, True, False]
+
+
+def test_session_csv_reader_falls_back_on_undocumented_columns():
+    content = b'indice_tiempo,serie_a,serie_b,serie_c\n2020-01-01,1,1.5,2\n'
+    reader = SessionCSVReader(
+        _get_csv_distribution(), session=_get_session(content))
+
+    with patch.object(CSVReader, 'read_csv') as read_csv:
+        reader.read()
+
+    read_csv.assert_called_once()
+
+
+def test_session_csv_reader_uses_session_verify():
+    content = b'indice_tiempo,serie_a,serie_b\n2020-01-01,1,1.5\n'
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(content)
+    session = requests.Session()
+    session.trust_env = False
+    session.verify = True
+
+    with patch.object(requests.adapters.HTTPAdapter, 'send',
+                      return_value=response) as send:
+        SessionCSVReader(_get_csv_distribution(), session=session).read()
+
+    assert send.call_args[1]['verify'] is True
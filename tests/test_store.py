@@ -0,0 +1,100 @@
+import os
+
+from mock import Mock, patch
+
+from series_tiempo_ar_scraping import download
+from series_tiempo_ar_scraping.store import SourceStore, get_source_file_name
+from series_tiempo_ar_scraping.utils import write_atomically
+
+
+def _fake_download(content):
+    def download_function(url, file_path):
+        size, sha256 = write_atomically(file_path, [content])
+        write_atomically(
+            str(download.get_metadata_path(file_path)),
+            ['{{"sha256": "{}"}}'.format(sha256).encode('utf-8')]
+        )
+        return download.FRESH
+
+    return Mock(side_effect=download_function)
+
+
+def test_get_source_file_name_distinguishes_urls_with_same_name():
+    first = get_source_file_name('http://a.com/x/datos.xlsx')
+    second = get_source_file_name('http://b.com/y/datos.xlsx')
+
+    assert first != second
+    assert first.endswith('_datos.xlsx')
+
+
+def test_store_fetches_each_url_once_per_run(tmp_path):
+    store = SourceStore(str(tmp_path / 'store'))
+    download_function = _fake_download(b'contenido')
+
+    store.fetch('http://a.com/datos.xlsx', download_function)
+    store.fetch('http://a.com/datos.xlsx', download_function)
+
+    assert download_function.call_count == 1
+
+
+def test_store_links_same_content_once(tmp_path):
+    store = SourceStore(str(tmp_path / 'store'))
+    first_path = str(tmp_path / 'catalog1' / 'sources' / 'datos.xlsx')
+    second_path = str(tmp_path / 'catalog2' / 'sources' / 'otros.xlsx')
+
+    store.fetch('http://a.com/datos.xlsx', _fake_download(b'contenido'))
+    store.fetch('http://b.com/otros.xlsx', _fake_download(b'contenido'))
+    store.link('http://a.com/datos.xlsx', first_path)
+    store.link('http://b.com/otros.xlsx', second_path)
+
+    assert os.path.samefile(first_path, second_path)
+    assert len(list((tmp_path / 'store' / 'objects').glob('*/*'))) == 1
+
+
+def test_store_prune_removes_unreferenced_objects(tmp_path):
+    store = SourceStore(str(tmp_path / 'store'))
+
+    store.fetch('http://a.com/datos.xlsx', _fake_download(b'viejo'))
+    old_object = store.get_object_path(store.get_hash('http://a.com/datos.xlsx'))
+    store = SourceStore(str(tmp_path / 'store'))
+    store.fetch('http://a.com/datos.xlsx', _fake_download(b'nuevo'))
+
+    store.prune()
+
+    assert not old_object.exists()
+    assert store.get_object_path(
+        store.get_hash('http://a.com/datos.xlsx')).exists()
+
+
+def test_store_prune_keeps_copied_objects(tmp_path):
+    store = SourceStore(str(tmp_path / 'store'))
+
+    with patch('series_tiempo_ar_scraping.store.os.link',
+               side_effect=OSError('cross-device link')):
+        store.fetch('http://a.com/datos.xlsx', _fake_download(b'datos'))
+        store.link('http://a.com/datos.xlsx', str(tmp_path / 'datos.xlsx'))
+
+    object_path = store.get_object_path(
+        store.get_hash('http://a.com/datos.xlsx'))
+    assert object_path.stat().st_nlink == 1
+
+    store.prune()
+
+    assert object_path.exists()
+
+
+def test_store_shares_downloads_between_processes_of_a_run(tmp_path):
+    download_function = _fake_download(b'datos')
+
+    SourceStore(str(tmp_path / 'store'), run_id='run1').fetch(
+        'http://a.com/datos.xlsx', download_function)
+    result = SourceStore(str(tmp_path / 'store'), run_id='run1').fetch(
+        'http://a.com/datos.xlsx', download_function)
+
+    assert result == download.FRESH
+    assert download_function.call_count == 1
+
+    SourceStore(str(tmp_path / 'store'), run_id='run2').fetch(
+        'http://a.com/datos.xlsx', download_function)
+
+    assert download_function.call_count == 2
@@ -0,0 +1,41 @@
+import time
+
+from openpyxl import Workbook
+
+from series_tiempo_ar_scraping.utils import (
+    UNCHANGED,
+    WRITTEN,
+    render_if_changed,
+    xlsx_files_are_equal,
+)
+
+
+def _write_xlsx(path, value):
+    wb = Workbook()
+    wb.active['A1'] = value
+    wb.save(path)
+
+
+def test_xlsx_files_are_equal_ignores_write_dates(tmp_path):
+    _write_xlsx(str(tmp_path / 'a.xlsx'), 'foo')
+    time.sleep(1)
+    _write_xlsx(str(tmp_path / 'b.xlsx'), 'foo')
+    _write_xlsx(str(tmp_path / 'c.xlsx'), 'bar')
+
+    assert xlsx_files_are_equal(
+        str(tmp_path / 'a.xlsx'), str(tmp_path / 'b.xlsx'))
+    assert not xlsx_files_are_equal(
+        str(tmp_path / 'a.xlsx'), str(tmp_path / 'c.xlsx'))
+
+
+def test_render_if_changed(tmp_path):
+    file_path = tmp_path / 'data.json'
+
+    def render(content):
+        return lambda path: open(path, 'w').write(content)
+
+    assert render_if_changed(str(file_path), render('{}')) == WRITTEN
+    assert render_if_changed(str(file_path), render('{}')) == UNCHANGED
+    assert render_if_changed(str(file_path), render('[]')) == WRITTEN
+    assert file_path.read_text() == '[]'
+    assert [path.name for path in tmp_path.iterdir()] == ['data.json']
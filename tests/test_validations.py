@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from series_tiempo_ar import custom_exceptions as ce
+from series_tiempo_ar.validations import validate_distribution
+
+from series_tiempo_ar_scraping.validations import DistributionValidator
+
+
+def _get_distribution(identifier='1.1', field_ids=('1.1_serie',)):
+    fields = [{
+        'title': 'indice_tiempo',
+        'specialType': 'time_index',
+        'specialTypeDetail': 'R/P1M',
+    }]
+    for position, field_id in enumerate(field_ids):
+        fields.append({
+            'id': field_id,
+            'title': f'serie_{position}',
+            'description': f'Serie {position}',
+        })
+
+    return {'identifier': identifier, 'field': fields}
+
+
+def _get_catalog(*distributions):
+    return {'dataset': [{'identifier': '1',
+                         'distribution': list(distributions)}]}
+
+
+def _get_df(index=None, columns=1):
+    index = index if index is not None else pd.date_range(
+        '2020-01-01', periods=12, freq='MS')
+    data = np.arange(len(index) * columns, dtype=float).reshape(
+        len(index), columns)
+    return pd.DataFrame(
+        data, index=index,
+        columns=[f'serie_{position}' for position in range(columns)])
+
+
+def test_validate_valid_distribution():
+    distribution = _get_distribution()
+    validator = DistributionValidator(_get_catalog(distribution))
+
+    result, errors = validator.validate(_get_df(), distribution)
+
+    assert errors == []
+    assert result['status'] == 'OK'
+    assert result['rows'] == 12
+    assert result['series'] == 1
+    assert result['start'] == '2020-01-01 00:00:00'
+    assert result['errors'] == []
+
+
+def test_validate_non_continuous_index():
+    distribution = _get_distribution()
+    validator = DistributionValidator(_get_catalog(distribution))
+    df = _get_df().drop(pd.Timestamp('2020-06-01'))
+
+    result, errors = validator.validate(df, distribution)
+
+    assert isinstance(errors[0], ce.DistributionBadDataError)
+    assert result['status'] == 'ERROR'
+    assert result['errors'][0]['check'] == 'df_shape'
+
+
+def test_validate_non_monotonic_index():
+    distribution = _get_distribution()
+    validator = DistributionValidator(_get_catalog(distribution))
+    df = _get_df()
+    df.index = df.index[[1, 0] + list(range(2, 12))]
+
+    _, errors = validator.validate(df, distribution)
+
+    assert isinstance(errors[0], ce.DistributionBadDataError)
+
+
+def test_validate_repeated_field_in_catalog():
+    distribution = _get_distribution()
+    other_distribution = _get_distribution('1.2')
+    validator = DistributionValidator(
+        _get_catalog(distribution, other_distribution))
+
+    _, errors = validator.validate(_get_df(), distribution)
+
+    assert [type(error) for error in errors] == [ce.FieldIdRepetitionError]
+
+
+def test_validate_warns_constant_series():
+    distribution = _get_distribution(field_ids=('1.1_a', '1.1_b'))
+    validator = DistributionValidator(_get_catalog(distribution))
+    df = _get_df(columns=2)
+    df['serie_1'] = 1.0
+
+    result, errors = validator.validate(df, distribution)
+
+    assert errors == []
+    assert result['warnings'] == [
+        {'check': 'constant_series', 'message': 'serie_1 es constante'}]
+
+
+@pytest.mark.parametrize('values', [
+    [np.nan] * 12,
+    [1.0] + [np.nan] * 11,
+])
+def test_validate_reports_same_error_as_series_tiempo_ar(values):
+    distribution = _get_distribution()
+    catalog = _get_catalog(distribution)
+    df = _get_df()
+    df['serie_0'] = values
+
+    _, errors = DistributionValidator(catalog).validate(df, distribution)
+
+    with pytest.raises(ce.TimeSeriesError) as expected:
+        validate_distribution(df, catalog, None, distribution)
+    assert type(errors[0]) is type(expected.value)
+    assert str(errors[0]) == str(expected.value)
+
+
+def test_validate_stops_at_first_error():
+    distribution = _get_distribution()
+    validator = DistributionValidator(_get_catalog(distribution))
+    df = _get_df().iloc[:0]
+
+    result, errors = validator.validate(df, distribution)
+
+    assert [type(error) for error in errors] == [ce.TimeSeriesError]
+    assert [error['check'] for error in result['errors']] == ['df_shape']
+    assert result['warnings'] == []
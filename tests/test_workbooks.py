@@ -0,0 +1,129 @@
+import datetime
+
+from mock import Mock, patch
+from openpyxl import Workbook, load_workbook
+from xlseries import XlSeries
+
+from series_tiempo_ar_scraping.workbooks import (
+    WorkbookCache,
+    WORKBOOK_MEMORY_FACTOR,
+    load_xlsx_sheets,
+    open_workbook,
+)
+
+
+def _write_workbook(tmp_path, name, size):
+    file_path = tmp_path / name
+    file_path.write_bytes(b'x' * size)
+    return str(file_path)
+
+
+def test_workbook_cache_opens_each_workbook_once(tmp_path):
+    open_function = Mock(side_effect=lambda file_path, sheets: object())
+    cache = WorkbookCache(open_function=open_function)
+    file_path = _write_workbook(tmp_path, 'a.xlsx', 10)
+
+    assert cache.get('a', file_path) is cache.get('a', file_path)
+    assert open_function.call_count == 1
+
+
+def test_workbook_cache_releases_workbook_after_last_use(tmp_path):
+    cache = WorkbookCache(open_function=lambda file_path, sheets: object())
+    file_path = _write_workbook(tmp_path, 'a.xlsx', 10)
+    cache.add_uses('a', 2)
+    cache.get('a', file_path)
+
+    cache.release('a')
+    assert 'a' in cache
+
+    cache.release('a')
+    assert 'a' not in cache
+    assert cache.size == 0
+
+
+def test_workbook_cache_keeps_released_workbook_until_discarded(tmp_path):
+    cache = WorkbookCache(open_function=lambda file_path, sheets: object())
+    file_path = _write_workbook(tmp_path, 'a.xlsx', 10)
+    cache.add_uses('a')
+    workbook = cache.get('a', file_path)
+
+    cache.release('a', keep=True)
+    assert 'a' in cache
+
+    # otro catálogo lo usa sin volver a abrirlo
+    cache.add_uses('a')
+    assert cache.get('a', file_path) is workbook
+    cache.discard('a')
+    assert 'a' in cache
+
+    cache.release('a')
+    assert 'a' not in cache
+
+
+def test_workbook_cache_evicts_least_recently_used(tmp_path):
+    cache = WorkbookCache(
+        max_size=25 * WORKBOOK_MEMORY_FACTOR,
+        open_function=lambda file_path, sheets: object(),
+    )
+    paths = {
+        key: _write_workbook(tmp_path, key + '.xlsx', 10)
+        for key in ['a', 'b', 'c']
+    }
+
+    cache.get('a', paths['a'])
+    cache.get('b', paths['b'])
+    cache.get('a', paths['a'])
+    cache.get('c', paths['c'])
+
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+
+
+def test_load_xlsx_sheets_loads_only_requested_sheets(tmp_path):
+    file_path = str(tmp_path / 'a.xlsx')
+    wb = Workbook()
+    ws = wb.active
+    ws.title = 'Hoja1'
+    ws['A1'] = 'indice_tiempo'
+    ws['A2'] = datetime.datetime(2010, 1, 1)
+    ws['B3'] = 1.5
+    ws['D5'].number_format = '0.00'
+    wb.create_sheet('Hoja2')['A1'] = 'otra'
+    wb.save(file_path)
+
+    loaded = load_xlsx_sheets(file_path, [' Hoja1 '])
+    full = load_workbook(file_path, data_only=True)
+
+    assert loaded.sheetnames == ['Hoja1']
+    assert loaded['Hoja1']['A2'].value == datetime.datetime(2010, 1, 1)
+    assert loaded['Hoja1']['B3'].value == 1.5
+    assert loaded['Hoja1'].max_row == full['Hoja1'].max_row
+    assert loaded['Hoja1'].max_column == full['Hoja1'].max_column
+
+
+def test_open_workbook_falls_back_to_full_workbook(tmp_path):
+    with patch('series_tiempo_ar_scraping.workbooks.XlSeries') as xl_series, \
+            patch('series_tiempo_ar_scraping.workbooks.load_xlsx_sheets',
+                  side_effect=ValueError):
+        open_workbook('a.xlsx', ['Hoja1'])
+
+    xl_series.assert_called_once_with('a.xlsx')
+
+
+def test_open_workbook_loads_only_requested_sheets(tmp_path):
+    file_path = str(tmp_path / 'a.xlsx')
+    wb = Workbook()
+    wb.active.title = 'Hoja1'
+    wb.active['A1'] = 1.5
+    wb.save(file_path)
+
+    with patch('series_tiempo_ar_scraping.workbooks.XlSeries',
+               wraps=XlSeries) as xl_series, \
+            patch('series_tiempo_ar_scraping.workbooks.logging') as logging:
+        open_workbook(file_path, ['Hoja1'])
+
+    logging.warning.assert_not_called()
+    loaded = xl_series.call_args[0][0]
+    assert isinstance(loaded, Workbook)
+    assert loaded['Hoja1']['A1'].value == 1.5
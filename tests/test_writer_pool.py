@@ -0,0 +1,26 @@
+import threading
+
+from series_tiempo_ar_scraping.writer_pool import WriterPool
+
+
+def test_submit_waits_when_queue_is_full():
+    writer_pool = WriterPool(threads=1, queue_size=1)
+    release = threading.Event()
+    futures = [writer_pool.submit(release.wait) for _ in range(2)]
+
+    submitted = threading.Event()
+
+    def submit_third():
+        futures.append(writer_pool.submit(lambda: 'ok'))
+        submitted.set()
+
+    thread = threading.Thread(target=submit_third)
+    thread.start()
+    assert not submitted.wait(0.2)
+
+    release.set()
+    thread.join(5)
+    writer_pool.shutdown()
+
+    assert submitted.is_set()
+    assert futures[2].result() == 'ok'